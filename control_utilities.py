@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------
+# Programmer(s):  Daniel R. Reynolds @ SMU
+#------------------------------------------------------------
+# Copyright (c) 2025, Southern Methodist University.
+# All rights reserved.
+# For details, see the LICENSE file.
+#------------------------------------------------------------
+
+# Registry of the MRI adaptivity controllers used by the test and plotting scripts.
+# Each controller is listed once (in the order used for sweeps and plots), with
+#   'family': 'Hh' (MRI-CC, MRI-LL, MRI-PI and MRI-PID controllers, run with the
+#             sundials-mrihh executables), 'HTol' or 'Dec'
+#   'flags':  the command-line options that select the controller, for each family of
+#             test executables: 'mriadapt' (ark_test_*_mriadapt and ark_test_*_mriadapt_hh,
+#             which share one numbering) and 'nested' (ark_kpr_nestedmri)
+#   'label':  the name used in plot legends and tables
+#   'color':  the index of the controller's color in the 'tab10' colormap
+#   'symbol': the controller's matplotlib marker
+# New controllers only need to be added here.
+Controllers = {
+    'MRICC':         {'family': 'Hh', 'label': 'Hh-CC', 'color': 0, 'symbol': '.',
+                      'flags': {'mriadapt': '--scontrol 1 --fcontrol 0 --safety 0.85'}},
+    'MRILL':         {'family': 'Hh', 'label': 'Hh-LL', 'color': 11, 'symbol': ',',
+                      'flags': {'mriadapt': '--scontrol 2 --fcontrol 0 --safety 0.85'}},
+    'MRIPI':         {'family': 'Hh', 'label': 'Hh-PI', 'color': 12, 'symbol': 'o',
+                      'flags': {'mriadapt': '--scontrol 3 --fcontrol 0 --safety 0.85'}},
+    'MRIPID':        {'family': 'Hh', 'label': 'Hh-PID', 'color': 13, 'symbol': 'v',
+                      'flags': {'mriadapt': '--scontrol 4 --fcontrol 0 --safety 0.85'}},
+    'MRIHTol-I':     {'family': 'HTol', 'label': 'HT-I', 'color': 10, 'symbol': '1',
+                      'flags': {'mriadapt': '--scontrol 5 --fcontrol 1',
+                                'nested': '--scontrol 1 --fcontrol 1'}},
+    'MRIHTol-H0211': {'family': 'HTol', 'label': 'HT-H0211', 'color': 6, 'symbol': 'P',
+                      'flags': {'mriadapt': '--scontrol 17 --fcontrol 7',
+                                'nested': '--scontrol 2 --fcontrol 2'}},
+    'MRIHTol-H0321': {'family': 'HTol', 'label': 'HT-H0321', 'color': 7, 'symbol': 'x',
+                      'flags': {'mriadapt': '--scontrol 19 --fcontrol 8',
+                                'nested': '--scontrol 3 --fcontrol 3'}},
+    'MRIHTol-H211':  {'family': 'HTol', 'label': 'HT-H211', 'color': 8, 'symbol': 'd',
+                      'flags': {'mriadapt': '--scontrol 21 --fcontrol 9',
+                                'nested': '--scontrol 4 --fcontrol 4'}},
+    'MRIHTol-H312':  {'family': 'HTol', 'label': 'HT-H312', 'color': 9, 'symbol': '$f$',
+                      'flags': {'mriadapt': '--scontrol 23 --fcontrol 10',
+                                'nested': '--scontrol 5 --fcontrol 5'}},
+    'MRIDec-I':      {'family': 'Dec', 'label': 'D-I', 'color': 5, 'symbol': 'p',
+                      'flags': {'mriadapt': '--scontrol 6 --fcontrol 1',
+                                'nested': '--scontrol 6 --fcontrol 1'}},
+    'MRIDec-H0211':  {'family': 'Dec', 'label': 'D-H0211', 'color': 1, 'symbol': 's',
+                      'flags': {'mriadapt': '--scontrol 18 --fcontrol 7',
+                                'nested': '--scontrol 7 --fcontrol 2'}},
+    'MRIDec-H0321':  {'family': 'Dec', 'label': 'D-H0321', 'color': 2, 'symbol': '*',
+                      'flags': {'mriadapt': '--scontrol 20 --fcontrol 8',
+                                'nested': '--scontrol 8 --fcontrol 3'}},
+    'MRIDec-H211':   {'family': 'Dec', 'label': 'D-H211', 'color': 3, 'symbol': 'D',
+                      'flags': {'mriadapt': '--scontrol 22 --fcontrol 9',
+                                'nested': '--scontrol 9 --fcontrol 4'}},
+    'MRIDec-H312':   {'family': 'Dec', 'label': 'D-H312', 'color': 4, 'symbol': '<',
+                      'flags': {'mriadapt': '--scontrol 24 --fcontrol 10',
+                                'nested': '--scontrol 10 --fcontrol 5'}},
+}
+
+# utility functions
+def controllers(family=None, executables=None):
+    """
+    Returns the list of controller names (in registry order), optionally restricted to
+    the controller family family ('Hh', 'HTol' or 'Dec', or a list of these, in which
+    case the controllers are grouped by family in that order) and/or to the controllers
+    supported by the family of test executables executables (e.g., 'nested').
+    """
+    if (family is None):
+        family = list(dict.fromkeys(c['family'] for c in Controllers.values()))
+    elif isinstance(family, str):
+        family = [family]
+    return [name for fam in family for name, c in Controllers.items()
+            if (c['family'] == fam) and ((executables is None) or (executables in c['flags']))]
+
+def controller_args(name, executables='mriadapt'):
+    """
+    Returns the command-line options (with a leading space) that select the controller
+    name in the family of test executables executables, or a single space if the
+    controller is not supported there (so the executable uses its default controller).
+    """
+    flags = Controllers.get(name, {}).get('flags', {})
+    return ' ' + flags.get(executables, '')
+
+def family(name):
+    """
+    Returns the family ('Hh', 'HTol' or 'Dec') of the controller name.
+    """
+    return Controllers[name]['family']
+
+def metadata(key):
+    """
+    Returns the dictionary holding the entry key (e.g., 'label', 'color' or 'symbol') of
+    every controller, keyed on the controller names.
+    """
+    return {name: c[key] for name, c in Controllers.items()}
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------
+# Programmer(s):  Daniel R. Reynolds @ SMU
+#------------------------------------------------------------
+# Copyright (c) 2025, Southern Methodist University.
+# All rights reserved.
+# For details, see the LICENSE file.
+#------------------------------------------------------------
+
+# imports
+import os
+import sys
+import ctypes
+import shutil
+import tempfile
+import threading
+import subprocess
+import run_utilities as rutil
+
+# library runs temporarily redirect the standard output and error of the whole process,
+# so only one may execute at a time
+_run_lock = threading.Lock()
+
+# utility functions
+def library_name(exe):
+    """
+    Given the path to a test executable (e.g., './bin/ark_test_kpr_mriadapt'), returns
+    the path to the corresponding shared library built alongside it (e.g.,
+    './bin/libark_test_kpr_mriadapt.so').
+    """
+    ext = '.dylib' if sys.platform == 'darwin' else '.so'
+    return os.path.join(os.path.dirname(exe), 'lib' + os.path.basename(exe) + ext)
+
+class TestLibrary:
+    """
+    Runs the tests from a test driver that was built as a shared library (i.e., with
+    MRIADAPT_LIBRARY defined) within the current process, avoiding the cost of
+    launching the executable and of reading its results back through a pipe.
+
+    This is experimental, and is not used by the sweep scripts: since each run
+    redirects the standard output and error of the whole process to capture the
+    test's output, library runs execute one at a time (even from several threads),
+    and anything else that the Python process prints during a run is captured along
+    with it.  Note also that the SUNDIALS libraries used by the src-v7.5.0 and
+    src-mrihh drivers share symbol names, so libraries from both folders should not
+    be loaded into the same Python process.
+    """
+
+    def __init__(self, exe):
+        self.exe = exe
+        self.lib = ctypes.CDLL(library_name(exe))
+        self.lib.mriadapt_run.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_char_p)]
+        self.lib.mriadapt_run.restype = ctypes.c_int
+        self.lib.mriadapt_output.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_long)]
+        self.lib.mriadapt_output.restype = ctypes.c_void_p
+
+    def output(self, fd):
+        """
+        Returns the standard output (fd = 1) or error (fd = 2) of the last test, as bytes.
+        """
+        size = ctypes.c_long(0)
+        ptr = self.lib.mriadapt_output(fd, ctypes.byref(size))
+        return ctypes.string_at(ptr, size.value) if (size.value > 0) else b''
+
+    def run_args(self, args):
+        """
+        Given a list of command-line arguments (without the program name), this runs a
+        single test and returns a subprocess.CompletedProcess object holding its return
+        code and output, matching what rutil.run_command would return for the
+        corresponding executable run.
+        """
+        encoded = [arg.encode() for arg in args]
+        argv = (ctypes.c_char_p * len(encoded))(*encoded)
+        with _run_lock:
+            flag = self.lib.mriadapt_run(len(encoded), argv)
+            stdout, stderr = self.output(1), self.output(2)
+        return subprocess.CompletedProcess([self.exe] + list(args), flag, stdout, stderr)
+
+    def run(self, options, step_history=False):
+        """
+        Given a dictionary of test options, e.g.
+           {'es': 5.0, 'w': 50.0, 'rtol': 1e-4, 'mri_method': 'ARKODE_MERK21', 'scontrol': 6}
+        (each key is the name of a command-line option, without the leading '--'), this
+        runs a single test and returns a dictionary holding its 'ReturnCode' and, if the
+        run succeeded, its final solver statistics (as printed with --json_stats).
+
+        If step_history is True, then the slow and fast step histories of a successful
+        run are also returned in its 'StepHistory' entry, as the tuple of NumPy arrays
+           (T, H, DSM, t, h, dsm)
+        from rutil.load_step_history.
+        """
+        args = []
+        for key, value in options.items():
+            args += ['--' + key, str(value)]
+        args += ['--json_stats', '1', '--quiet', '1']
+        folder = tempfile.mkdtemp() if (step_history) else None
+        try:
+            if (step_history):
+                args += ['--step_history', os.path.join(folder, 'steps')]
+            result = self.run_args(args)
+            stats = {'ReturnCode': result.returncode}
+            if (result.returncode == 0):
+                record = rutil.parse_json_stats(result.stdout)
+                if (record is None):
+                    stats['ReturnCode'] = 1
+                else:
+                    stats.update(record)
+                    if (step_history):
+                        stats['StepHistory'] = rutil.load_step_history(os.path.join(folder, 'steps'))
+        finally:
+            if (folder is not None):
+                shutil.rmtree(folder, ignore_errors=True)
+        return stats
@@ -38,140 +38,59 @@ RKlines ={'DIRK' :'--',
           'ERK' : '-'}
 
 # utility functions
-def get_row_adaptive(line):
+def get_rows(lines, stepkey):
     """
-    This routine processes an adaptive run line
+    This routine processes a list of adaptive run lines (stepkey = 'rtol') or fixed step run
+    lines (stepkey = 'h'), converting all of their values at once into a dataframe
     """
-    txt = line.split()
-    rtol = float(txt[1])
-    rk_type = int(txt[3])
-    if (rk_type == 0):
-        RK = 'DIRK'
-    else:
-        RK = 'ERK'
-    order = int(txt[5])
-    acc = int(txt[7])
-    if (acc == 1):
-        accumulator = 'Maximum'
-    elif (acc == 2):
-        accumulator = 'Additive'
-    elif (acc == 3):
-        accumulator = 'Average'
-    else:
-        accumulator = 'Double-Step'
-    time = float(txt[9])
-    dsm = float(txt[11])
-    dsm_est = float(txt[13])
-    nsteps = int(txt[15])
-    data = [{'rtol': rtol, 'RK': RK, 'order': order, 'accumulator': accumulator,  't': time, 'dsm': dsm, 'dsm_est': dsm_est, 'nsteps': nsteps}]
-    return pd.DataFrame.from_records(data)
-
-def get_row_fixedstep(line):
-    """
-    This routine processes a fixed step run line
-    """
-    txt = line.split()
-    h = float(txt[1])
-    rk_type = int(txt[3])
-    if (rk_type == 0):
-        RK = 'DIRK'
-    else:
-        RK = 'ERK'
-    order = int(txt[5])
-    acc = int(txt[7])
-    if (acc == 1):
-        accumulator = 'Maximum'
-    elif (acc == 2):
-        accumulator = 'Additive'
-    elif (acc == 3):
-        accumulator = 'Average'
-    else:
-        accumulator = 'Double-Step'
-    time = float(txt[9])
-    dsm = float(txt[11])
-    dsm_est = float(txt[13])
-    nsteps = int(txt[15])
-    data = [{'h': h, 'RK': RK, 'order': order, 'accumulator': accumulator,  't': time, 'dsm': dsm, 'dsm_est': dsm_est, 'nsteps': nsteps}]
-    return pd.DataFrame.from_records(data)
+    cols = np.array([line.split()[1:16:2] for line in lines], dtype=float).reshape(-1, 8)
+    RK = np.where(cols[:,1] == 0, 'DIRK', 'ERK')
+    acc = cols[:,3]
+    accumulator = np.where(acc == 1, 'Maximum', np.where(acc == 2, 'Additive',
+                           np.where(acc == 3, 'Average', 'Double-Step')))
+    return pd.DataFrame({stepkey: cols[:,0], 'RK': RK, 'order': cols[:,2], 'accumulator': accumulator,
+                         't': cols[:,4], 'dsm': cols[:,5], 'dsm_est': cols[:,6], 'nsteps': cols[:,7]})
 
 def load_file(fname):
     """
-    Creates time-step level dataframes from a file.
+    Creates time-step level dataframes from a file, in a single pass through the file.
+    """
+    adaptive_lines = []
+    fixedstep_lines = []
+    with open(fname) as f:
+        for line in f:
+            txt = line.split()
+            if ('rtol' in txt):
+                adaptive_lines.append(line)
+            elif ('h' in txt):
+                fixedstep_lines.append(line)
+    return get_rows(adaptive_lines, 'rtol'), get_rows(fixedstep_lines, 'h')
+
+def group_stats(df, stepkey):
+    """
+    Given a time-step level dataframe and the name of its step column ('rtol' or 'h'), this
+    groups the dataframe once by (accumulator, RK, stepkey, order), and computes the min, max
+    and geometric mean of the ratio dsm/dsm_est, and the total number of steps, in each group.
+    As with scipy.stats.mstats.gmean, the geometric mean of a group is NaN if any of its
+    ratios are NaN.
     """
-    adaptive_df = pd.DataFrame({'rtol': [], 'RK': [], 'order': [], 'accumulator': [], 't': [], 'dsm': [], 'dsm_est': [], 'nsteps': []})
-    fixedstep_df = pd.DataFrame({'h': [], 'RK': [], 'order': [], 'accumulator': [], 't': [], 'dsm': [], 'dsm_est': [], 'nsteps': []})
-    f = open(fname)
-    for line in f:
-        txt = line.split()
-        if ('rtol' in txt):
-            new_row = get_row_adaptive(line)
-            adaptive_df = pd.concat([adaptive_df, new_row])
-        elif ('h' in txt):
-            new_row = get_row_fixedstep(line)
-            fixedstep_df = pd.concat([fixedstep_df, new_row])
-    f.close()
-    return adaptive_df, fixedstep_df
+    ratio = df['dsm']/df['dsm_est']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logratio = np.log(ratio)
+    steps = pd.DataFrame({stepkey: df[stepkey], 'RK': df['RK'], 'order': df['order'],
+                          'accumulator': df['accumulator'], 'ratio': ratio, 'logratio': logratio,
+                          'nanratio': logratio.isna(), 'nsteps': df['nsteps']})
+    stats = steps.groupby(['accumulator', 'RK', stepkey, 'order']).agg(
+        min=('ratio', 'min'), max=('ratio', 'max'), gmean=('logratio', 'mean'),
+        nanratio=('nanratio', 'any'), nsteps=('nsteps', 'sum')).reset_index()
+    stats['gmean'] = np.where(stats['nanratio'], np.nan, np.exp(stats['gmean']))
+    return stats[[stepkey, 'RK', 'order', 'accumulator', 'min', 'max', 'gmean', 'nsteps']]
 
 def compile_stats(adaptive_df, fixedstep_df):
     """
     Creates "statistics" dataframes from time-step level dataframes.
     """
-    from scipy import stats
-    rtols = []
-    RKs = []
-    orders = []
-    accumulators = []
-    mins = []
-    maxs = []
-    gmeans = []
-    steps = []
-    for acc in adaptive_df['accumulator'].sort_values().unique():
-        for RK in adaptive_df['RK'].sort_values().unique():
-            for rtol in adaptive_df['rtol'].sort_values().unique():
-                for order in (adaptive_df.groupby(['RK']).get_group((RK,)))['order'].sort_values().unique():
-                    dsm = (adaptive_df.groupby(['rtol','RK','order','accumulator']).get_group((rtol,RK,order,acc)))['dsm']
-                    dsm_est = (adaptive_df.groupby(['rtol','RK','order','accumulator']).get_group((rtol,RK,order,acc)))['dsm_est']
-                    nsteps = (adaptive_df.groupby(['rtol','RK','order','accumulator']).get_group((rtol,RK,order,acc)))['nsteps']
-                    ratio = dsm/dsm_est
-                    rtols.append(rtol)
-                    RKs.append(RK)
-                    orders.append(order)
-                    accumulators.append(acc)
-                    mins.append(np.min(ratio))
-                    maxs.append(np.max(ratio))
-                    gmeans.append(stats.mstats.gmean(ratio))
-                    steps.append(np.sum(nsteps))
-    adaptive_stats = pd.DataFrame({'rtol': rtols, 'RK': RKs, 'order': orders, 'accumulator': accumulators,
-                                   'min': mins, 'max': maxs, 'gmean': gmeans, 'nsteps': steps})
-
-    hs = []
-    RKs = []
-    orders = []
-    accumulators = []
-    mins = []
-    maxs = []
-    gmeans = []
-    steps = []
-    for acc in fixedstep_df['accumulator'].sort_values().unique():
-        for RK in fixedstep_df['RK'].sort_values().unique():
-            for h in (fixedstep_df.groupby(['RK']).get_group((RK,)))['h'].sort_values().unique():
-                for order in (fixedstep_df.groupby(['RK']).get_group((RK,)))['order'].sort_values().unique():
-                    dsm = (fixedstep_df.groupby(['h','RK','order','accumulator']).get_group((h,RK,order,acc)))['dsm']
-                    dsm_est = (fixedstep_df.groupby(['h','RK','order','accumulator']).get_group((h,RK,order,acc)))['dsm_est']
-                    nsteps = (fixedstep_df.groupby(['h','RK','order','accumulator']).get_group((h,RK,order,acc)))['nsteps']
-                    ratio = dsm/dsm_est
-                    hs.append(h)
-                    RKs.append(RK)
-                    orders.append(order)
-                    accumulators.append(acc)
-                    mins.append(np.min(ratio))
-                    maxs.append(np.max(ratio))
-                    gmeans.append(stats.mstats.gmean(ratio))
-                    steps.append(np.sum(nsteps))
-    fixedstep_stats = pd.DataFrame({'h': hs, 'RK': RKs, 'order': orders, 'accumulator': accumulators,
-                                    'min': mins, 'max': maxs, 'gmean': gmeans, 'nsteps': steps})
-
-    return adaptive_stats, fixedstep_stats
+    return group_stats(adaptive_df, 'rtol'), group_stats(fixedstep_df, 'h')
 
 
 # load KPR data
@@ -185,15 +104,14 @@ bruss_adaptive_stats, bruss_fixedstep_stats = compile_stats(bruss_adaptive, brus
 # KPR plots
 if (Generate_detailed_plots):
     t = kpr_adaptive['t'].sort_values().unique()
+    steps = kpr_adaptive.groupby(['rtol','RK','order','accumulator'])
     for acc in kpr_adaptive['accumulator'].sort_values().unique():
         plt.figure()
         for RK in kpr_adaptive['RK'].sort_values().unique():
             for order in (kpr_adaptive.groupby(['RK']).get_group((RK)))['order'].sort_values().unique():
                 for rtol in kpr_adaptive['rtol'].sort_values().unique():
-                    dsm = (kpr_adaptive.groupby(['rtol','RK','order','accumulator']).get_group((rtol,RK,order,acc)))['dsm']
-                    dsm_est = (kpr_adaptive.groupby(['rtol','RK','order','accumulator']).get_group((rtol,RK,order,acc)))['dsm_est']
-                    nsteps = (kpr_adaptive.groupby(['rtol','RK','order','accumulator']).get_group((rtol,RK,order,acc)))['nsteps']
-                    ratio = dsm/dsm_est
+                    group = steps.get_group((rtol,RK,order,acc))
+                    ratio = group['dsm']/group['dsm_est']
                     labeltxt = RK + '-{0:d}'.format(int(order)) + ' rtol {0:.1e}'.format(rtol)
                     plt.semilogy(t[:len(ratio)], ratio, label=labeltxt)
 
@@ -209,15 +127,14 @@ if (Generate_detailed_plots):
             plt.savefig('kpr-ratio-adaptive-' + acc + '.pdf')
 
     t = kpr_fixedstep['t'].sort_values().unique()
+    steps = kpr_fixedstep.groupby(['h','RK','order','accumulator'])
     for acc in kpr_fixedstep['accumulator'].sort_values().unique():
         plt.figure()
         for RK in kpr_fixedstep['RK'].sort_values().unique():
             for h in (kpr_fixedstep.groupby(['RK']).get_group((RK)))['h'].sort_values().unique():
                 for order in (kpr_fixedstep.groupby(['RK']).get_group((RK)))['order'].sort_values().unique():
-                    dsm = (kpr_fixedstep.groupby(['h','RK','order','accumulator']).get_group((h,RK,order,acc)))['dsm']
-                    dsm_est = (kpr_fixedstep.groupby(['h','RK','order','accumulator']).get_group((h,RK,order,acc)))['dsm_est']
-                    nsteps = (kpr_fixedstep.groupby(['h','RK','order','accumulator']).get_group((h,RK,order,acc)))['nsteps']
-                    ratio = dsm/dsm_est
+                    group = steps.get_group((h,RK,order,acc))
+                    ratio = group['dsm']/group['dsm_est']
                     labeltxt = RK + '-{0:d}'.format(int(order)) + ' h {0:.1e}'.format(h)
                     plt.semilogy(t[:len(ratio)], ratio, label=labeltxt)
 
@@ -234,12 +151,14 @@ if (Generate_detailed_plots):
 # this the one we use!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 if (Generate_stats_plots):
     plt.figure()
+    groups = kpr_adaptive_stats.groupby(['order','RK','accumulator'])
     for acc in kpr_adaptive_stats['accumulator'].sort_values().unique():
         RK = 'ERK'
         #for RK in kpr_adaptive_stats['RK'].sort_values().unique():
         for order in plotorders:
-            rtol   = (kpr_adaptive_stats.groupby(['order','RK','accumulator']).get_group((order,RK,acc)))['rtol']
-            gmeans = (kpr_adaptive_stats.groupby(['order','RK','accumulator']).get_group((order,RK,acc)))['gmean']
+            stats  = groups.get_group((order,RK,acc))
+            rtol   = stats['rtol']
+            gmeans = stats['gmean']
             if (len(plotorders) > 1):
                 labeltxt = '{0:1}'.format(acc) + ' (order {0:d})'.format(order)
             else:
@@ -258,13 +177,15 @@ if (Generate_stats_plots):
         plt.savefig('kpr-ratio-adaptive-stats.pdf')
 
     plt.figure()
+    groups = kpr_fixedstep_stats.groupby(['order','RK','accumulator'])
     for acc in kpr_fixedstep_stats['accumulator'].sort_values().unique():
         RK = 'ERK'
         for order in plotorders:
             #for RK in kpr_fixedstep_stats['RK'].sort_values().unique():
-            h      = (kpr_fixedstep_stats.groupby(['order','RK','accumulator']).get_group((order,RK,acc)))['h']
+            stats  = groups.get_group((order,RK,acc))
+            h      = stats['h']
             #orders = (kpr_fixedstep_stats.groupby(['h','RK','accumulator']).get_group((h,RK,acc)))['order']
-            gmeans = (kpr_fixedstep_stats.groupby(['order','RK','accumulator']).get_group((order,RK,acc)))['gmean']
+            gmeans = stats['gmean']
             if (len(plotorders) > 1):
                 labeltxt = '{0:1}'.format(acc) + ' (order {0:d})'.format(order)
             else:
@@ -289,15 +210,14 @@ if (Generate_stats_plots):
 if (Generate_detailed_plots):
     #plt.figure()
     t = bruss_adaptive['t'].sort_values().unique()
+    steps = bruss_adaptive.groupby(['rtol','RK','order','accumulator'])
     for acc in bruss_adaptive['accumulator'].sort_values().unique():
         plt.figure()
         for RK in bruss_adaptive['RK'].sort_values().unique():
             for rtol in bruss_adaptive['rtol'].sort_values().unique():
                 for order in (bruss_adaptive.groupby(['RK']).get_group((RK)))['order'].sort_values().unique():
-                    dsm = (bruss_adaptive.groupby(['rtol','RK','order','accumulator']).get_group((rtol,RK,order,acc)))['dsm']
-                    dsm_est = (bruss_adaptive.groupby(['rtol','RK','order','accumulator']).get_group((rtol,RK,order,acc)))['dsm_est']
-                    nsteps = (bruss_adaptive.groupby(['rtol','RK','order','accumulator']).get_group((rtol,RK,order,acc)))['nsteps']
-                    ratio = dsm/dsm_est
+                    group = steps.get_group((rtol,RK,order,acc))
+                    ratio = group['dsm']/group['dsm_est']
                     labeltxt = RK + '-{0:d}'.format(int(order)) + ' rtol {0:.1e}'.format(rtol)
                     plt.semilogy(t[:len(ratio)], ratio, label=labeltxt)
 
@@ -313,15 +233,14 @@ if (Generate_detailed_plots):
             plt.savefig('bruss-ratio-adaptive-' + acc + '.pdf')
 
     t = bruss_fixedstep['t'].sort_values().unique()
+    steps = bruss_fixedstep.groupby(['h','RK','order','accumulator'])
     for acc in bruss_fixedstep['accumulator'].sort_values().unique():
         plt.figure()
         for RK in bruss_fixedstep['RK'].sort_values().unique():
             for h in (bruss_fixedstep.groupby(['RK']).get_group((RK)))['h'].sort_values().unique():
                 for order in (bruss_fixedstep.groupby(['RK']).get_group((RK)))['order'].sort_values().unique():
-                    dsm = (bruss_fixedstep.groupby(['h','RK','order','accumulator']).get_group((h,RK,order,acc)))['dsm']
-                    dsm_est = (bruss_fixedstep.groupby(['h','RK','order','accumulator']).get_group((h,RK,order,acc)))['dsm_est']
-                    nsteps = (bruss_fixedstep.groupby(['h','RK','order','accumulator']).get_group((h,RK,order,acc)))['nsteps']
-                    ratio = dsm/dsm_est
+                    group = steps.get_group((h,RK,order,acc))
+                    ratio = group['dsm']/group['dsm_est']
                     labeltxt = RK + '-{0:d}'.format(int(order)) + ' h {0:.1e}'.format(h)
                     plt.semilogy(t[:len(ratio)], ratio, label=labeltxt)
 
@@ -339,12 +258,14 @@ if (Generate_detailed_plots):
 
 if (Generate_stats_plots):
     plt.figure()
+    groups = bruss_adaptive_stats.groupby(['order','RK','accumulator'])
     for acc in bruss_adaptive_stats['accumulator'].sort_values().unique():
         RK = 'ERK'
         for order in plotorders:
             #for RK in bruss_adaptive_stats['RK'].sort_values().unique():
-            rtol   = (bruss_adaptive_stats.groupby(['order','RK','accumulator']).get_group((order,RK,acc)))['rtol']
-            gmeans = (bruss_adaptive_stats.groupby(['order','RK','accumulator']).get_group((order,RK,acc)))['gmean']
+            stats  = groups.get_group((order,RK,acc))
+            rtol   = stats['rtol']
+            gmeans = stats['gmean']
             if (len(plotorders) > 1):
                 labeltxt = '{0:1}'.format(acc) + ' (order {0:d})'.format(order)
             else:
@@ -363,13 +284,15 @@ if (Generate_stats_plots):
     if (Generate_PDF):
         plt.savefig('bruss-ratio-adaptive-stats.pdf')
     plt.figure()
+    groups = bruss_fixedstep_stats.groupby(['order','RK','accumulator'])
     for acc in bruss_fixedstep_stats['accumulator'].sort_values().unique():
         RK = 'ERK'
         for order in plotorders:
             #for RK in bruss_fixedstep_stats['RK'].sort_values().unique():
-            h      = (bruss_fixedstep_stats.groupby(['order','RK','accumulator']).get_group((order,RK,acc)))['h']
+            stats  = groups.get_group((order,RK,acc))
+            h      = stats['h']
             #orders = (bruss_fixedstep_stats.groupby(['h','RK','accumulator']).get_group((h,RK,acc)))['order']
-            gmeans = (bruss_fixedstep_stats.groupby(['order','RK','accumulator']).get_group((order,RK,acc)))['gmean']
+            gmeans = stats['gmean']
             if (len(plotorders) > 1):
                 labeltxt = '{0:1}'.format(acc) + ' (order {0:d})'.format(order)
             else:
@@ -12,6 +12,7 @@ import pickle
 import matplotlib.pyplot as plt
 from matplotlib.gridspec import GridSpec
 import numpy as np
+import control_utilities as cutil
 
 # Set plot defaults: increase default font size, increase plot width, enable LaTeX rendering
 plt.rc('font', size=15)
@@ -27,35 +28,8 @@ NPlotFast = 1000
 
 # utility functions
 cmap = plt.get_cmap('tab10')
-controlcolor = {'MRIHTol-I': cmap(0),
-                'MRIHTol-H0211': cmap(1),
-                'MRIHTol-H0321': cmap(2),
-                'MRIHTol-H211': cmap(3),
-                'MRIHTol-H312': cmap(4),
-                'MRIDec-I': cmap(5),
-                'MRIDec-H0211': cmap(6),
-                'MRIDec-H0321': cmap(7),
-                'MRIDec-H211': cmap(8),
-                'MRIDec-H312': cmap(9),
-                'MRICC': cmap(4),
-                'MRILL': cmap(9),
-                'MRIPI': cmap(2),
-                'MRIPID': cmap(3)}
-
-controlname = {'MRIHTol-I': 'HT-I',
-               'MRIHTol-H0211': 'HT-H0211',
-               'MRIHTol-H0321': 'HT-H0321',
-               'MRIHTol-H211': 'HT-H211',
-               'MRIHTol-H312': 'HT-H312',
-               'MRIDec-I': 'D-I',
-               'MRIDec-H0211': 'D-H0211',
-               'MRIDec-H0321': 'D-H0321',
-               'MRIDec-H211': 'D-H211',
-               'MRIDec-H312': 'D-H312',
-               'MRICC': 'MRI-CC',
-               'MRILL': 'MRILL',
-               'MRIPI': 'MRIPI',
-               'MRIPID': 'MRIPID'}
+controlcolor = {control: cmap(c) for control, c in cutil.metadata('color').items()}
+controlname = cutil.metadata('label')
 
 def do_test_plots(fname, titletxt, picname, slowstride=None, faststride=None):
     """
@@ -14,46 +14,24 @@ import sys
 sys.path.append('..')
 import plot_utilities_extras as putil
 import pandas as pd
+import table_utilities as tutil
+import control_utilities as cutil
 
-Bruss_fname = 'brusselator_mriadapt_results.xlsx'
-KPR_fname = 'kpr_mriadapt_results.xlsx'
+Bruss_fname = 'brusselator_mriadapt_results'
+KPR_fname = 'kpr_mriadapt_results'
 
-data=pd.read_excel(Bruss_fname)
-bruss_failed_pairs = data.loc[data['ReturnCode'] == 1, ['control', 'mri_method']]
-data2=pd.read_excel(KPR_fname)
-kpr_failed_pairs = data2.loc[data2['ReturnCode'] == 1, ['control', 'mri_method']]
+data=putil.drop_pruned(tutil.load_table(Bruss_fname))
+bruss_failed_pairs = data.loc[data['ReturnCode'] > 0, ['control', 'mri_method']]
+data2=putil.drop_pruned(tutil.load_table(KPR_fname))
+kpr_failed_pairs = data2.loc[data2['ReturnCode'] > 0, ['control', 'mri_method']]
 
 # flags to turn on/off certain plots
 Plot_KPR = True
 Plot_Bruss = True
-Hh={'MRICC',
-              'MRILL',
-              'MRIPI',
-              'MRIPID'}
-Htol={'MRIHTol-H0211',
-                'MRIHTol-H0321',
-                'MRIHTol-H211',
-                'MRIHTol-I',
-                'MRIHTol-H312'}
-Decoupled={'MRIDec-H0211',
-                'MRIDec-H0321',
-                'MRIDec-H211',
-                'MRIDec-I',
-                'MRIDec-H312',}
-Full_controllers={'MRICC',
-                'MRILL',
-                'MRIPI',
-                'MRIPID',
-                'MRIDec-H0211',
-                'MRIDec-H0321',
-                'MRIDec-H211',
-                'MRIDec-I',
-                'MRIDec-H312',
-                'MRIHTol-H0211',
-                'MRIHTol-H0321',
-                'MRIHTol-H211',
-                'MRIHTol-I',
-                'MRIHTol-H312'}
+Hh=set(cutil.controllers('Hh'))
+Htol=set(cutil.controllers('HTol'))
+Decoupled=set(cutil.controllers('Dec'))
+Full_controllers=set(cutil.controllers())
 
 kpr_retained_low_pairs=[('MRIDec-I','ARKODE_MRI_GARK_IRK21a'),
                     ('MRIDec-H211','ARKODE_IMEX_MRI_SR21'),
@@ -40,37 +40,31 @@ def mname(method):
     pruned2 = [s for s in pruned if s != 'GARK']
     return " ".join(pruned2)
 
-def get_row_fixedstep(line):
+def get_rows(lines):
     """
-    This routine processes a fixed step run line
+    This routine processes a list of fixed step run lines, converting all of their values at
+    once into a dataframe
     """
-    txt = line.split()
-    H = float(txt[1])
-    method = txt[3]
-    time = float(txt[5])
-    dsm = float(txt[7])
-    dsm_est = float(txt[9])
-    if (dsm_est < dsm_floor or dsm < dsm_floor):
-        #ratio = np.nan
-        ratio = 1.0
-    else:
-        ratio = dsm/dsm_est/H
-    data = [{'H': H, 'method': method, 't': time, 'ratio': ratio}]
-    return pd.DataFrame.from_records(data)
+    cols = np.array([line.split()[1:10:2] for line in lines], dtype=str).reshape(-1, 5)
+    H = cols[:,0].astype(float)
+    dsm = cols[:,3].astype(float)
+    dsm_est = cols[:,4].astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        #ratio = np.where((dsm_est < dsm_floor) | (dsm < dsm_floor), np.nan, dsm/dsm_est/H)
+        ratio = np.where((dsm_est < dsm_floor) | (dsm < dsm_floor), 1.0, dsm/dsm_est/H)
+    return pd.DataFrame({'H': H, 'method': cols[:,1], 't': cols[:,2].astype(float),
+                         'dsm': dsm, 'dsm_est': dsm_est, 'ratio': ratio})
 
 def load_file(fname):
     """
-    Creates time-step level dataframes from a file.
+    Creates time-step level dataframes from a file, in a single pass through the file.
     """
-    df = pd.DataFrame({'H': [], 'method': [], 't': [], 'dsm': [], 'dsm_est': []})
-    f = open(fname)
-    for line in f:
-        txt = line.split()
-        if ('dsm_est' in txt):
-            new_row = get_row_fixedstep(line)
-            df = pd.concat([df, new_row])
-    f.close()
-    return df
+    lines = []
+    with open(fname) as f:
+        for line in f:
+            if ('dsm_est' in line.split()):
+                lines.append(line)
+    return get_rows(lines)
 
 def compile_stats(df):
     """
@@ -9,6 +9,8 @@
 
 # imports
 import pandas as pd
+import table_utilities as tutil
+import control_utilities as cutil
 import matplotlib.pyplot as plt
 from matplotlib.gridspec import GridSpec
 import numpy as np
@@ -33,24 +35,24 @@ work_bbox = (0.57, 0.97)
 efficiency_figsize = (10,6)
 efficiency_bbox = (0.725, 0.975)
 
+# work measure for the work plots, efficiency comparisons and rankings: 'steps' uses
+# the slow (SlowSteps+SlowFails) and fast (FastSteps+FastFails) step counts, while the
+# modeled cost ('cost', see cost_model) or any of the run timings recorded by the test
+# scripts ('WallTime', 'CPUTime' (UserTime plus SystemTime), or 'EvolveTime') is used
+# as both the slow and fast work
+work_metric = 'steps'
+
+# cost model for work_metric = 'cost': the modeled cost of a run is the sum of each of
+# these solver statistics times its cost per unit, e.g., the relative costs of one slow
+# explicit or implicit RHS evaluation, one fast RHS evaluation, and one slow Newton
+# iteration.  Statistics that are missing from a results table count as zero.
+cost_model = {'FseEvals': 1.0, 'FsiEvals': 1.0, 'FfEvals': 1.0, 'SlowNewtonIters': 0.0}
+
 
 # controllers to include in verification plots
 
 
-usecontrol= {'MRICC':True,
-             'MRIDec-H0211':True,
-             'MRIDec-H0321':True,
-             'MRIDec-H211':True,
-             'MRIDec-H312':True,
-             'MRIDec-I':True,
-             'MRIHTol-H0211':True,
-             'MRIHTol-H0321':True,
-             'MRIHTol-H211':True,
-             'MRIHTol-H312':True,
-             'MRIHTol-I':True,
-             'MRILL':True,
-             'MRIPI':True,
-             'MRIPID':True}
+usecontrol = {control: True for control in cutil.controllers()}
 method_order = {'ARKODE_MRI_GARK_RALSTON2': 2,
                'ARKODE_MRI_GARK_ERK22a': 2,
                'ARKODE_MRI_GARK_ERK22b': 2,
@@ -73,35 +75,9 @@ method_order = {'ARKODE_MRI_GARK_RALSTON2': 2,
 cmap10 = plt.get_cmap('tab10')
 cmap20 = plt.get_cmap('tab20')
 
-controlcolor= {'MRICC': cmap10(0),
-             'MRIDec-H0211': cmap10(1),
-             'MRIDec-H0321': cmap10(2),
-             'MRIDec-H211': cmap10(3),
-             'MRIDec-H312': cmap10(4),
-             'MRIDec-I': cmap10(5),
-             'MRIHTol-H0211': cmap10(6),
-             'MRIHTol-H0321': cmap10(7),
-             'MRIHTol-H211': cmap10(8),
-             'MRIHTol-H312': cmap10(9),
-             'MRIHTol-I': cmap10(10),
-             'MRILL': cmap10(11),
-             'MRIPI': cmap10(12),
-             'MRIPID': cmap10(13),}
-
-controlsymbol = {'MRICC': '.',
-                'MRILL': ",",
-                'MRIPI': "o",
-                'MRIPID': "v",
-                'MRIDec-H0211': "s",
-                'MRIDec-H0321': "*",
-                'MRIDec-H211': "D",
-                'MRIDec-I': "p",
-                'MRIDec-H312': "<",
-                'MRIHTol-H0211': "P",
-                'MRIHTol-H0321': "x",
-                'MRIHTol-H211': "d",
-                'MRIHTol-I': "1",
-                'MRIHTol-H312':"$f$",}
+controlcolor = {control: cmap10(c) for control, c in cutil.metadata('color').items()}
+
+controlsymbol = cutil.metadata('symbol')
 
 methodcolor = {'ARKODE_MRI_GARK_RALSTON2': cmap10(0),
                'ARKODE_MRI_GARK_ERK22a': cmap10(1),
@@ -139,35 +115,11 @@ methods_lo = ['ARKODE_MRI_GARK_RALSTON2', 'ARKODE_MRI_GARK_ERK22a', 'ARKODE_MRI_
 methods_mid=['ARKODE_MRI_GARK_ERK33a', 'ARKODE_MERK32', 'ARKODE_MRI_GARK_ESDIRK34a', 'ARKODE_IMEX_MRI_SR32']
 methods_hi = ['ARKODE_MRI_GARK_ERK45a', 'ARKODE_MERK43', 'ARKODE_MRI_GARK_ESDIRK46a', 'ARKODE_IMEX_MRI_SR43', 'ARKODE_MERK54']
 
-controltext = {'MRICC': 'Hh-CC',
-               'MRILL': 'Hh-LL',
-               'MRIPI': 'Hh-PI',
-               'MRIPID': 'Hh-PID',
-               'MRIHTol-I': 'HT-I',
-               'MRIHTol-H0211': 'HT-H0211',
-               'MRIHTol-H0321': 'HT-H0321',
-               'MRIHTol-H211': 'HT-H211',
-               'MRIHTol-H312': 'HT-H312',
-               'MRIDec-I': 'D-I',
-               'MRIDec-H0211': 'D-H0211',
-               'MRIDec-H0321': 'D-H0321',
-               'MRIDec-H211': 'D-H211',
-               'MRIDec-H312': 'D-H312',}
-
-Hh_controllers={'MRICC',
-              'MRILL',
-              'MRIPI',
-              'MRIPID'}
-Htol_controllers={'MRIHTol-H0211',
-                'MRIHTol-H0321',
-                'MRIHTol-H211',
-                'MRIHTol-I',
-                'MRIHTol-H312'}
-Decoupled_controllers={'MRIDec-H0211',
-                'MRIDec-H0321',
-                'MRIDec-H211',
-                'MRIDec-I',
-                'MRIDec-H312',}
+controltext = cutil.metadata('label')
+
+Hh_controllers = set(cutil.controllers('Hh'))
+Htol_controllers = set(cutil.controllers('HTol'))
+Decoupled_controllers = set(cutil.controllers('Dec'))
 con = [("H-h", Hh_controllers),
     ("Htol", Htol_controllers),
     ("Decoupled", Decoupled_controllers)]
@@ -184,8 +136,20 @@ def mname(method):
     pruned3 = [s for s in pruned2 if s != 'MRI']
     return " ".join(pruned3)
 
+def drop_pruned(data):
+    """
+    Given a Pandas dataframe of results, returns the results of the tests that were not
+    pruned from the sweep (see PruneSweep in run_mriadapt_tests.py).
+    """
+    if ('Pruned' in data):
+        return data[~data['Pruned'].astype(bool)]
+    return data
+
 def print_failed_tests(fname, prefix):
-    data = pd.read_excel(fname)
+    data = tutil.load_table(fname)
+    if ('Pruned' in data):
+        print(prefix + ' pruned ' + str(int(data['Pruned'].astype(bool).sum())) + ' tests')
+    data = drop_pruned(data)
     failed = data[data.ReturnCode != 0]
     print(prefix + ' failed ' + str(len(failed)) + ' tests')
     if (len(failed) > 0):
@@ -198,8 +162,8 @@ def check(control, mri_method,removed_pairs,reverse=0):
     return (False+reverse)
 
 def filter_data(fname):
-    data=pd.read_excel(fname)
-    bad_combos = data.loc[data['ReturnCode'] == 1, ['control', 'mri_method']]
+    data=drop_pruned(tutil.load_table(fname))
+    bad_combos = data.loc[data['ReturnCode'] > 0, ['control', 'mri_method']]
     merged = data.merge(bad_combos.drop_duplicates(), on=['control', 'mri_method'], how='left', indicator=True)
     clean = merged[merged['_merge'] == 'left_only'].drop(columns=['_merge'])
     return clean
@@ -207,19 +171,47 @@ def filter_data(fname):
 def get_work(errorarr, workarr, errorval):
     """
     Given input arrays errorarr = [err0, err1, ..., errN] and workarr = [work0, work1, ..., workN],
-    and a value errorval in [min(errorarr), max(errorarr)], this interpolates to estimate the
-    corresponding workval.
+    and a value (or array of values) errorval in [min(errorarr), max(errorarr)], this interpolates
+    to estimate the corresponding workval(s).
 
-    If errorval is below min(errorarr), this just returns a huge work number (since this means
+    For any errorval below min(errorarr), this just returns a huge work number (since this means
     that the method was unable to attain the requested error).
     """
     # check for valid inputs
     if (len(errorarr) != len(workarr)):
         raise ValueError("inputs for errorarr and workarr have differing numbers of entries")
-    if (errorval < np.min(errorarr)):
-        return 1e20
 
-    return 10**(np.interp(np.log10(errorval), np.log10(errorarr[::-1]), np.log10(workarr[::-1])))
+    work = 10**(np.interp(np.log10(errorval), np.log10(errorarr[::-1]), np.log10(workarr[::-1])))
+    return np.where(np.less(errorval, np.min(errorarr)), 1e20, work)
+
+def get_work_matrix(data, errortests):
+    """
+    Given a list of dictionaries data (as in compare_efficiency) and an array of target error
+    values errortests, this returns the (methods x targets) array holding the work that each
+    method requires to attain each target error (see get_work).
+    """
+    work = np.empty((len(data), len(errortests)))
+    for i, X in enumerate(data):
+        work[i,:] = get_work(np.asarray(X['errors'], dtype=float), np.asarray(X['works'], dtype=float), errortests)
+    return work
+
+def rank_work(work, ties=True):
+    """
+    Given a (methods x targets) array of work values, this returns the array of the same shape
+    holding the rank of each method (1 = least work) for each target.  If ties is True, then
+    methods with equal work share the lowest rank of their group (e.g., 1, 2, 2, 4); otherwise
+    equal work values are ranked in the order that the methods are listed.
+    """
+    order = np.argsort(work, axis=0, kind='stable')
+    position = np.broadcast_to(np.arange(1.0, work.shape[0]+1)[:,np.newaxis], work.shape)
+    if (ties):
+        sorted_work = np.take_along_axis(work, order, axis=0)
+        newgroup = np.ones(work.shape, dtype=bool)
+        newgroup[1:] = (sorted_work[1:] != sorted_work[:-1])
+        position = np.maximum.accumulate(np.where(newgroup, position, 0.0), axis=0)
+    ranks = np.empty(work.shape)
+    np.put_along_axis(ranks, order, position, axis=0)
+    return ranks
 
 def compare_efficiency(data,param,metric, errorwindow=[1e-6,1e-2], nerr=20):
     """
@@ -267,29 +259,20 @@ def compare_efficiency(data,param,metric, errorwindow=[1e-6,1e-2], nerr=20):
     # create array of error test values
     errortests = np.logspace(np.log10(errorwindow[0]), np.log10(errorwindow[1]), nerr)
 
-    # initialize a dictionary of rank sums for each method
-    workranks = {}
-    for X in data:
-        workranks[X['method']] = 0
+    # get the work estimate for each method to attain each error value, and the
+    # corresponding rank of each method for each error value
+    work = get_work_matrix(data, errortests)
+    ranks = rank_work(work, ties=False)
 
-    # loop over error test values
-    for errortest in errortests:
-
-        # get work estimate for each method to attain this error value
-        workdict = []
-        for X in data:
-            workdict.append({'method': X['method'], 'work': get_work(X['errors'], X['works'], errortest)})
-
-        # sort by 'work' values
-        sorted_work = sorted(workdict, key=lambda x: x['work'])
-
-        # accumulate ranks for each method, dividing by the number of error test values to build running average
-        for i in range(len(sorted_work)):
-            s = sorted_work[i]
-            workranks[s['method']] += (i+1.0)/nerr
+    # accumulate ranks for each method over the error test values, dividing by the number
+    # of error test values (cumsum adds them in order, exactly as the original loop did,
+    # whereas sum may round differently and so change how ties are broken)
+    rank_sums = np.cumsum(ranks/nerr, axis=1)[:,-1]
 
     # sort the method names by their rank sums
-    method_ranks = dict(sorted(workranks.items(), key=lambda item: item[1]))
+    method_ranks = {}
+    for i in np.argsort(rank_sums, kind='stable'):
+        method_ranks[data[i]['method']] = rank_sums[i]
 
     # create ranked list of dictionaries for return
     ranked_dict = []
@@ -304,7 +287,82 @@ def compare_efficiency(data,param,metric, errorwindow=[1e-6,1e-2], nerr=20):
     return ranking_df
 
 
-def make_accuracy_comparison_plot(data, mratekey, mratevals, mratetxt,mri_methods, picname,removed_pairs):
+def make_work_error_table(data, mratekey):
+    """
+    Given a Pandas dataframe of results and the name of its multirate column, this
+    groups the results once, returning a dictionary keyed on
+       (control, mri_method, mrate)
+    where each entry holds NumPy arrays (ordered as in the data file) of the 'rtol'
+    and 'Accuracy' values for that test, along with the corresponding 'errors'
+    (Accuracy*rtol), 'slowwork' (SlowSteps+SlowFails) and 'fastwork'
+    (FastSteps+FastFails), or instead the modeled cost or run time selected by
+    work_metric for both.  Tests that were pruned from the sweep are skipped.
+    The accuracy, efficiency and ranking routines below all share this table, so it
+    should be built only once per data file.
+    """
+    table = {}
+    data = drop_pruned(data)
+    for key, group in data.groupby(['control','mri_method',mratekey], sort=False):
+        rtol = group['rtol'].to_numpy()
+        accuracy = group['Accuracy'].to_numpy()
+        if (work_metric == 'steps'):
+            slowwork = group['SlowSteps'].to_numpy() + group['SlowFails'].to_numpy()
+            fastwork = group['FastSteps'].to_numpy() + group['FastFails'].to_numpy()
+        elif (work_metric == 'cost'):
+            slowwork = fastwork = model_cost(group)
+        elif (work_metric == 'CPUTime'):
+            slowwork = fastwork = group['UserTime'].to_numpy() + group['SystemTime'].to_numpy()
+        else:
+            slowwork = fastwork = group[work_metric].to_numpy()
+        table[key] = {'rtol': rtol, 'Accuracy': accuracy, 'errors': accuracy*rtol,
+                      'slowwork': slowwork, 'fastwork': fastwork}
+    return table
+
+def model_cost(data, costs=None):
+    """
+    Given a Pandas dataframe of results and a dictionary of costs per unit of its solver
+    statistics (default: cost_model), e.g.,
+       costs = {'FseEvals': 100.0, 'FsiEvals': 100.0, 'FfEvals': 1.0, 'SlowNewtonIters': 10.0}
+    this returns the NumPy array holding the modeled total cost of each run.
+    """
+    if (costs is None):
+        costs = cost_model
+    cost = np.zeros(len(data))
+    for key, value in costs.items():
+        if (key in data) and (value != 0.0):
+            cost += value * data[key].fillna(0).to_numpy(dtype=float)
+    return cost
+
+def work_label(scale):
+    """
+    Given scale = 'slow' or 'fast', returns the axis label for the corresponding work
+    measure (see work_metric).
+    """
+    if (work_metric == 'steps'):
+        return scale + ' work'
+    return {'cost': 'modeled cost', 'WallTime': 'wall time (s)', 'CPUTime': 'CPU time (s)',
+            'EvolveTime': 'evolve time (s)'}.get(work_metric, work_metric)
+
+def accuracy_band(curves):
+    """
+    Given a list of (rtol, accuracy) array pairs holding the accuracy curves of several
+    tests, whose tolerance grids may differ (e.g., with AdaptiveRTols), this returns the
+    union of their tolerances (in increasing order), along with the minimum and maximum
+    accuracy at each of these tolerances.  Each curve is interpolated in log-log space
+    between its own tolerances, and only contributes within the range that it spans.
+    """
+    rtols = np.unique(np.concatenate([rtol for rtol, _ in curves]))
+    accuracy_min = np.full(len(rtols), np.inf)
+    accuracy_max = np.full(len(rtols), -np.inf)
+    for rtol, accuracy in curves:
+        order = np.argsort(rtol)
+        inside = (rtols >= rtol[order[0]]) & (rtols <= rtol[order[-1]])
+        values = np.exp(np.interp(np.log(rtols[inside]), np.log(rtol[order]), np.log(accuracy[order])))
+        accuracy_min[inside] = np.minimum(accuracy_min[inside], values)
+        accuracy_max[inside] = np.maximum(accuracy_max[inside], values)
+    return rtols, accuracy_min, accuracy_max
+
+def make_accuracy_comparison_plot(table, mratevals, mratetxt,mri_methods, picname,removed_pairs):
     color={"H-h":'red',
        "Htol":'blue',
        "Decoupled":'green'}
@@ -312,14 +370,10 @@ def make_accuracy_comparison_plot(data, mratekey, mratevals, mratetxt,mri_method
     gs = GridSpec(2, 2, figure=fig)
     ax1 = fig.add_subplot(gs[0,0])  # top-left
     ax2 = fig.add_subplot(gs[1,0])  # middle-left
-    Master_data=data
     for group, controllers in con:
-        accuracy_max1=np.array([-1e10] * 5)
-        accuracy_min1=np.array([1e10] * 5)
-        accuracy_max2=np.array([-1e10] * 5)
-        accuracy_min2=np.array([1e10] * 5)
+        curves1 = []
+        curves2 = []
         for control in controllers:
-            data=Master_data[Master_data['control'] == control]
             for mri_method in mri_methods:
                 # skip over failed tests
                 if check(control,mri_method,removed_pairs):
@@ -328,25 +382,28 @@ def make_accuracy_comparison_plot(data, mratekey, mratevals, mratetxt,mri_method
                 msymbol = controlsymbol[control]
                 # first multirate value
                 mrate = mratevals[0]
-                rtol = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['rtol'].array
-                accuracy = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['Accuracy'].array
-                accuracy_min1=np.minimum(accuracy_min1,accuracy)
-                accuracy_max1=np.maximum(accuracy_max1,accuracy)
+                results = table[(control, mri_method, mrate)]
+                rtol = results['rtol']
+                accuracy = results['Accuracy']
+                curves1.append((rtol, accuracy))
                 # this plots the lines within the bands
                 ax1.loglog(rtol, accuracy, marker=msymbol, color=color[group], ls='-', markersize=10)
                 #ax1.loglog()
 
                 # second multirate value
                 mrate = mratevals[1]
-                rtol = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['rtol'].array
-                accuracy = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['Accuracy'].array
-                accuracy_min2=np.minimum(accuracy_min2,accuracy)
-                accuracy_max2=np.maximum(accuracy_max2,accuracy)
+                results = table[(control, mri_method, mrate)]
+                rtol = results['rtol']
+                accuracy = results['Accuracy']
+                curves2.append((rtol, accuracy))
 
                 ax2.loglog(rtol, accuracy, marker=msymbol, color=color[group], ls='-', markersize=10)
                 #ax2.loglog()
-        ax1.fill_between(rtol, accuracy_min1, accuracy_max1, color=color[group], alpha=0.25,label=group)
-        ax2.fill_between(rtol, accuracy_min2, accuracy_max2, color=color[group], alpha=0.25,label=group)
+        # the bands span the accuracies of all curves, at the union of their tolerances
+        if (len(curves1) > 0):
+            ax1.fill_between(*accuracy_band(curves1), color=color[group], alpha=0.25,label=group)
+        if (len(curves2) > 0):
+            ax2.fill_between(*accuracy_band(curves2), color=color[group], alpha=0.25,label=group)
     handles, labels = ax1.get_legend_handles_labels()
     fig.suptitle(picname + ' accuracy plot')
     ax1.set_xlabel(r'reltol')
@@ -362,7 +419,7 @@ def make_accuracy_comparison_plot(data, mratekey, mratevals, mratetxt,mri_method
         plt.savefig(picname + " filled in"+'.pdf')
         
 
-def make_efficiency_comparison_plot(data, mratekey, mratevals, mratetxt, controllers, mri_methods, titletxt, picname,removed_pairs,rank_name):
+def make_efficiency_comparison_plot(table, mratevals, mratetxt, controllers, mri_methods, titletxt, picname,removed_pairs,rank_name):
     fig = plt.figure(figsize=efficiency_figsize)
     gs = GridSpec(2, 3, figure=fig)
     ax1 = fig.add_subplot(gs[0,0])  # top-left
@@ -375,9 +432,7 @@ def make_efficiency_comparison_plot(data, mratekey, mratevals, mratetxt, control
     comparison_data_slow2 = []
     comparison_data_fast2 = []
     cut_off_rank=12
-    Master_data=data
     for control in controllers:
-        data=Master_data[Master_data['control'] == control]
         for mri_method in mri_methods:
             if check(control,mri_method,removed_pairs):
                 continue
@@ -387,36 +442,24 @@ def make_efficiency_comparison_plot(data, mratekey, mratevals, mratetxt, control
 
             # first multirate value
             mrate = mratevals[0]
-            rtol = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['rtol']
-            accuracy = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['Accuracy']
-            error = accuracy*rtol
-            slowsteps = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['SlowSteps'].array
-            slowfails = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['SlowFails'].array
-            faststeps = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['FastSteps'].array
-            fastfails = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['FastFails'].array
-            ax1.loglog(slowsteps+slowfails, error, marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
-            ax2.loglog(faststeps+fastfails, error, marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
-            comparison_data_slow1.append({'method': mri_method+' + '+control, 'works': slowsteps+slowfails, 'errors': error})
-            comparison_data_fast1.append({'method': mri_method+' + '+control, 'works': faststeps+fastfails, 'errors': error})
+            results = table[(control, mri_method, mrate)]
+            ax1.loglog(results['slowwork'], results['errors'], marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
+            ax2.loglog(results['fastwork'], results['errors'], marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
+            comparison_data_slow1.append({'method': mri_method+' + '+control, 'works': results['slowwork'], 'errors': results['errors']})
+            comparison_data_fast1.append({'method': mri_method+' + '+control, 'works': results['fastwork'], 'errors': results['errors']})
 
             # second multirate value
             mrate = mratevals[1]
-            rtol = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['rtol']
-            accuracy = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['Accuracy']
-            error = accuracy*rtol
-            slowsteps = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['SlowSteps'].array
-            slowfails = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['SlowFails'].array
-            faststeps = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['FastSteps'].array
-            fastfails = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['FastFails'].array
-            ax3.loglog(slowsteps+slowfails, error, marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
-            ax4.loglog(faststeps+fastfails, error, marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
-            comparison_data_slow2.append({'method': mri_method+' + '+control, 'works': slowsteps+slowfails, 'errors': error})
-            comparison_data_fast2.append({'method': mri_method+' + '+control, 'works': faststeps+fastfails, 'errors': error})
+            results = table[(control, mri_method, mrate)]
+            ax3.loglog(results['slowwork'], results['errors'], marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
+            ax4.loglog(results['fastwork'], results['errors'], marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
+            comparison_data_slow2.append({'method': mri_method+' + '+control, 'works': results['slowwork'], 'errors': results['errors']})
+            comparison_data_fast2.append({'method': mri_method+' + '+control, 'works': results['fastwork'], 'errors': results['errors']})
 
     handles, labels = ax1.get_legend_handles_labels()
     fig.suptitle(titletxt + ' efficiency')
-    ax3.set_xlabel(r'slow work')
-    ax4.set_xlabel(r'fast work')
+    ax3.set_xlabel(work_label('slow'))
+    ax4.set_xlabel(work_label('fast'))
     ax1.set_ylabel(r'error, ' + mratetxt + ' = ' + str(mratevals[0]))
     ax3.set_ylabel(r'error, ' + mratetxt + ' = ' + str(mratevals[1]))
     ax1.grid(linestyle='--', linewidth=0.5)
@@ -464,9 +507,9 @@ def make_efficiency_comparison_plot(data, mratekey, mratevals, mratetxt, control
     # keeps all pairs who attains a low rank any any mrate values
     #ranks=pd.concat([ranks_slow1_loc,ranks_fast1_loc,ranks_slow2_loc,ranks_fast2_loc]).drop_duplicates()
     
-    ranks.to_excel(rank_name+'.xlsx',index=False)
+    tutil.save_table(ranks, rank_name)
     
-def efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetxt, controllers, mri_methods, titletxt, picname,removed_pairs,rank_name):
+def efficiency_comparison_plot_one_controller(table, mratevals, mratetxt, controllers, mri_methods, titletxt, picname,removed_pairs,rank_name):
     
 
     fig = plt.figure(figsize=efficiency_figsize)
@@ -480,9 +523,7 @@ def efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetx
     comparison_data_fast1 = []
     comparison_data_slow2 = []
     comparison_data_fast2 = []
-    Master_data=data
     for control in controllers:
-        data=Master_data[Master_data['control'] == control]
         for mri_method in mri_methods:
             if check(control,mri_method,removed_pairs):
                 continue
@@ -492,36 +533,24 @@ def efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetx
 
             # first multirate value
             mrate = mratevals[0]
-            rtol = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['rtol']
-            accuracy = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['Accuracy']
-            error = accuracy*rtol
-            slowsteps = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['SlowSteps'].array
-            slowfails = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['SlowFails'].array
-            faststeps = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['FastSteps'].array
-            fastfails = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['FastFails'].array
-            ax1.loglog(slowsteps+slowfails, error, marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
-            ax2.loglog(faststeps+fastfails, error, marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
-            comparison_data_slow1.append({'method': mri_method+' + '+control, 'works': slowsteps+slowfails, 'errors': error})
-            comparison_data_fast1.append({'method': mri_method+' + '+control, 'works': faststeps+fastfails, 'errors': error})
+            results = table[(control, mri_method, mrate)]
+            ax1.loglog(results['slowwork'], results['errors'], marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
+            ax2.loglog(results['fastwork'], results['errors'], marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
+            comparison_data_slow1.append({'method': mri_method+' + '+control, 'works': results['slowwork'], 'errors': results['errors']})
+            comparison_data_fast1.append({'method': mri_method+' + '+control, 'works': results['fastwork'], 'errors': results['errors']})
 
             # second multirate value
             mrate = mratevals[1]
-            rtol = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['rtol']
-            accuracy = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['Accuracy']
-            error = accuracy*rtol
-            slowsteps = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['SlowSteps'].array
-            slowfails = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['SlowFails'].array
-            faststeps = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['FastSteps'].array
-            fastfails = (data.groupby([mratekey,'mri_method']).get_group((mrate,mri_method)))['FastFails'].array
-            ax3.loglog(slowsteps+slowfails, error, marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
-            ax4.loglog(faststeps+fastfails, error, marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
-            comparison_data_slow2.append({'method': mri_method+' + '+control, 'works': slowsteps+slowfails, 'errors': error})
-            comparison_data_fast2.append({'method': mri_method+' + '+control, 'works': faststeps+fastfails, 'errors': error})
+            results = table[(control, mri_method, mrate)]
+            ax3.loglog(results['slowwork'], results['errors'], marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
+            ax4.loglog(results['fastwork'], results['errors'], marker=msymbol, color=mcolor, ls='-', label=ltext, markersize=10)
+            comparison_data_slow2.append({'method': mri_method+' + '+control, 'works': results['slowwork'], 'errors': results['errors']})
+            comparison_data_fast2.append({'method': mri_method+' + '+control, 'works': results['fastwork'], 'errors': results['errors']})
 
     handles, labels = ax1.get_legend_handles_labels()
     fig.suptitle(titletxt + ' efficiency')
-    ax3.set_xlabel(r'slow work')
-    ax4.set_xlabel(r'fast work')
+    ax3.set_xlabel(work_label('slow'))
+    ax4.set_xlabel(work_label('fast'))
     ax1.set_ylabel(r'error, ' + mratetxt + ' = ' + str(mratevals[0]))
     ax3.set_ylabel(r'error, ' + mratetxt + ' = ' + str(mratevals[1]))
     ax1.grid(linestyle='--', linewidth=0.5)
@@ -560,31 +589,32 @@ def do_comparison_plots(fname, mratekey, mratevals, mratetxt,controllers, titlet
        time scales for each 4th/5th order MRI method at each multirate value, and saves to disk
     """
 
-    data = pd.read_excel(fname)
+    data = tutil.load_table(fname)
     #data = filter_data(fname)
+    table = make_work_error_table(data, mratekey)
     # verify that there are only 2 mrate values
     if (len(mratevals) != 2):
         raise ValueError('Error: this function can only be run with 2 multirate values')
 
     # accuracy plots
-    make_accuracy_comparison_plot(data, mratekey, mratevals, mratetxt, methods_lo, picname+'-accuracy-lo',removed_pairs)
-    make_accuracy_comparison_plot(data, mratekey, mratevals, mratetxt, methods_mid, picname+'-accuracy-mid',removed_pairs)
-    make_accuracy_comparison_plot(data, mratekey, mratevals, mratetxt, methods_hi, picname+'-accuracy-hi',removed_pairs)
+    make_accuracy_comparison_plot(table, mratevals, mratetxt, methods_lo, picname+'-accuracy-lo',removed_pairs)
+    make_accuracy_comparison_plot(table, mratevals, mratetxt, methods_mid, picname+'-accuracy-mid',removed_pairs)
+    make_accuracy_comparison_plot(table, mratevals, mratetxt, methods_hi, picname+'-accuracy-hi',removed_pairs)
 
     # efficiency plots
-    make_efficiency_comparison_plot(data, mratekey, mratevals, mratetxt, controllers, methods_lo,  titletxt, picname,removed_pairs,rank_name+'-lo')
-    make_efficiency_comparison_plot(data, mratekey, mratevals, mratetxt, controllers, methods_mid,  titletxt, picname,removed_pairs,rank_name+'-mid')
-    make_efficiency_comparison_plot(data, mratekey, mratevals, mratetxt, controllers, methods_hi,  titletxt, picname,removed_pairs,rank_name+'-hi')
+    make_efficiency_comparison_plot(table, mratevals, mratetxt, controllers, methods_lo,  titletxt, picname,removed_pairs,rank_name+'-lo')
+    make_efficiency_comparison_plot(table, mratevals, mratetxt, controllers, methods_mid,  titletxt, picname,removed_pairs,rank_name+'-mid')
+    make_efficiency_comparison_plot(table, mratevals, mratetxt, controllers, methods_hi,  titletxt, picname,removed_pairs,rank_name+'-hi')
    
-    efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetxt, Hh, methods_lo,   'Hh controller ',picname+'_Hh_efficiency', removed_pairs,rank_name+'-lo')
-    efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetxt, Hh, methods_mid, 'Hh controller',picname+'_Hh_efficiency',removed_pairs,rank_name+'-mid')
-    efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetxt, Hh, methods_hi,  'Hh controller',picname+'_Hh_efficiency', removed_pairs,rank_name+'-hi')
+    efficiency_comparison_plot_one_controller(table, mratevals, mratetxt, Hh, methods_lo,   'Hh controller ',picname+'_Hh_efficiency', removed_pairs,rank_name+'-lo')
+    efficiency_comparison_plot_one_controller(table, mratevals, mratetxt, Hh, methods_mid, 'Hh controller',picname+'_Hh_efficiency',removed_pairs,rank_name+'-mid')
+    efficiency_comparison_plot_one_controller(table, mratevals, mratetxt, Hh, methods_hi,  'Hh controller',picname+'_Hh_efficiency', removed_pairs,rank_name+'-hi')
     
-    efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetxt, Htol, methods_lo,'Htol controller',picname+'_Htol_efficiency',removed_pairs,rank_name+'-lo')
-    efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetxt, Htol, methods_mid,'Htol controller',picname+'_Htol_efficiency',removed_pairs,rank_name+'-mid')
-    efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetxt, Htol, methods_hi, 'Htol controller',picname+'_Htol_efficiency',removed_pairs,rank_name+'-hi')
+    efficiency_comparison_plot_one_controller(table, mratevals, mratetxt, Htol, methods_lo,'Htol controller',picname+'_Htol_efficiency',removed_pairs,rank_name+'-lo')
+    efficiency_comparison_plot_one_controller(table, mratevals, mratetxt, Htol, methods_mid,'Htol controller',picname+'_Htol_efficiency',removed_pairs,rank_name+'-mid')
+    efficiency_comparison_plot_one_controller(table, mratevals, mratetxt, Htol, methods_hi, 'Htol controller',picname+'_Htol_efficiency',removed_pairs,rank_name+'-hi')
     
-    efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetxt, Decoupled, methods_lo, 'Decoupled controller',picname+'_Decoupled_efficiency',removed_pairs,rank_name+'-lo')
-    efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetxt, Decoupled, methods_mid, 'Decoupled controller',picname+'_Decoupled_efficiency',removed_pairs,rank_name+'-mid')
-    efficiency_comparison_plot_one_controller(data, mratekey, mratevals, mratetxt, Decoupled, methods_hi, 'Decoupled controller',picname+'_Decoupled_efficiency',removed_pairs,rank_name+'-hi')
+    efficiency_comparison_plot_one_controller(table, mratevals, mratetxt, Decoupled, methods_lo, 'Decoupled controller',picname+'_Decoupled_efficiency',removed_pairs,rank_name+'-lo')
+    efficiency_comparison_plot_one_controller(table, mratevals, mratetxt, Decoupled, methods_mid, 'Decoupled controller',picname+'_Decoupled_efficiency',removed_pairs,rank_name+'-mid')
+    efficiency_comparison_plot_one_controller(table, mratevals, mratetxt, Decoupled, methods_hi, 'Decoupled controller',picname+'_Decoupled_efficiency',removed_pairs,rank_name+'-hi')
 
@@ -28,6 +28,8 @@
 
 
 import pandas as pd
+import table_utilities as tutil
+import control_utilities as cutil
 import numpy as np
 
 # --------------------------------- z-score ----------------------------------------------
@@ -39,7 +41,7 @@ zscore_threshold = 1.0
 
 status         = ["best", "worse"] # Classification of Methods / Controllers 
 # params         = {"Brusselator":[0.0001, 0.00001], "KPR":[50,500]}
-ctrl_to_remove = ['MRIPI', 'MRIPID', 'MRICC', 'MRILL'] #Remove the H-h controllers
+ctrl_to_remove = cutil.controllers('Hh') #Remove the H-h controllers
 metric      = {"fast", "slow"}
 
 def allCtrl_tests(df, metric, ctrl_to_remove, status, zscore_threshold):
@@ -65,23 +67,25 @@ def allCtrl_tests(df, metric, ctrl_to_remove, status, zscore_threshold):
     return data
 
 #run test
-df = pd.read_excel("rank_stats.xlsx")
+df = tutil.load_table("rank_stats")
    
 # excel file containing z-scores for all controllers across all methods for each test problem
 fileName  = f"All_controllers.xlsx" 
             
 # worksheets in the excel file corresponding to a particular test problem 
+sheets = {}
 with pd.ExcelWriter(fileName) as writer:
     for mt in metric:
         data = allCtrl_tests(df, mt, ctrl_to_remove, status, zscore_threshold)
         sheetName = f"{mt}"
         data.to_excel(writer, sheet_name=sheetName, index=False)
+        sheets[sheetName] = data
 
 for mt in metric:
     controllers = ["MRIHTol-I", "MRIDec-I", "MRIHTol-H0321", "MRIDec-H0321", "MRIHTol-H0211", "MRIDec-H0211", "MRIHTol-H211", "MRIDec-H211", "MRIHTol-H312",   "MRIDec-H312"]
     ctrl_zscores = {ctrl: [] for ctrl in controllers} #an empty list to store zscores for all controllers for a particular time scale
     sheetName = f"{mt}"
-    df_sheet = pd.read_excel(fileName, sheet_name=sheetName)
+    df_sheet = sheets[sheetName]
 
     for ctrl in controllers:
         # Filter rows of a worksheet for a particular controller
@@ -26,6 +26,7 @@
 # ---------------------------------------------------------------------------------------------------------------------------------------------------
 
 import pandas as pd
+import table_utilities as tutil
 import numpy as np
 
 # --------------------------------- z-score ----------------------------------------------
@@ -66,7 +67,7 @@ def fixedCtrl_tests(df, params, metric, order, controller, status, zscore_thresh
     return data
 
 #run test
-df = pd.read_excel("rank_stats.xlsx")
+df = tutil.load_table("rank_stats")
 for mt in metric:
     for ord_key, ord_val in order.items():
         for prb_key, prb_val in params.items():
@@ -75,16 +76,15 @@ for mt in metric:
             fileName  = f"{prb_key[0]}_{mt}{ord_key[0]}{ord_key[5:]}.xlsx"
 
             # worksheets in the excel file corresponding to a particular controller 
+            sheets = []
             with pd.ExcelWriter(fileName) as writer:
                 for ctrl in controller:
                     data = fixedCtrl_tests(df, prb_val, mt, ord_val, ctrl, status, zscore_threshold)
                     sheetName = f"{prb_key[0]}_{mt}{ord_key[0]}{ord_key[5:]}_{ctrl}"
                     data.to_excel(writer, sheet_name=sheetName, index=False)
+                    sheets.append(data)
 
             # compute the average z-score of each MRI method across all controllers or across each worksheet
-            xls = pd.ExcelFile(fileName)
-            sheetNames = xls.sheet_names
-
             MRI_methods = {"Order2":["ARKODE_MRI_GARK_ERK22b", "ARKODE_MRI_GARK_IRK21a", "ARKODE_MRI_GARK_RALSTON2", "ARKODE_MRI_GARK_ERK22a", "ARKODE_MERK21", "ARKODE_IMEX_MRI_SR21"],
                            "Order3":["ARKODE_MRI_GARK_ERK33a", "ARKODE_MRI_GARK_ESDIRK34a", "ARKODE_MERK32", "ARKODE_IMEX_MRI_SR32"],
                            "Order4&5":["ARKODE_MRI_GARK_ERK45a", "ARKODE_MERK43", "ARKODE_MERK54", "ARKODE_IMEX_MRI_SR43", "ARKODE_MRI_GARK_ESDIRK46a"]}[ord_key]
@@ -92,8 +92,7 @@ for mt in metric:
             # create empty lists to store the z-scores of each MRI method 
             method_zscores = {method: [] for method in MRI_methods}
 
-            for sheet in sheetNames:
-                df_sheet = pd.read_excel(fileName, sheet_name=sheet)
+            for df_sheet in sheets:
                 for method in MRI_methods:
                     # Filter rows of a worksheet for a particular MRI method 
                     zScore = df_sheet[df_sheet["MRIMethod"] == method]["zScore"].iloc[0] # since the zscore values are the same just pick one
@@ -25,6 +25,8 @@
 
 
 import pandas as pd
+import table_utilities as tutil
+import control_utilities as cutil
 import numpy as np
 
 # --------------------------------- z-score ----------------------------------------------
@@ -36,7 +38,7 @@ zscore_threshold = 1.0
 
 status         = ["best", "worse"] # Classification of Methods / Controllers 
 params         = {"Brusselator":[0.0001, 0.00001], "KPR":[50,500]}
-ctrl_to_remove = ['MRIPI', 'MRIPID', 'MRICC', 'MRILL'] #Remove the H-h controllers
+ctrl_to_remove = cutil.controllers('Hh') #Remove the H-h controllers
 MRIMethod      = {"Order2":["ARKODE_MRI_GARK_ERK22b", "ARKODE_MRI_GARK_IRK21a", "ARKODE_MRI_GARK_RALSTON2", "ARKODE_MRI_GARK_ERK22a", "ARKODE_MERK21", "ARKODE_IMEX_MRI_SR21"],
                   "Order3":["ARKODE_MRI_GARK_ERK33a", "ARKODE_MRI_GARK_ESDIRK34a", "ARKODE_MERK32", "ARKODE_IMEX_MRI_SR32"],
                   "Order4&5":["ARKODE_MRI_GARK_ERK45a", "ARKODE_MERK43", "ARKODE_MERK54", "ARKODE_IMEX_MRI_SR43", "ARKODE_MRI_GARK_ESDIRK46a"]}
@@ -64,7 +66,7 @@ def fixedCtrl_tests(df, params, method_ord, ctrl_to_remove, status, zscore_thres
     return data
 
 #run test
-df = pd.read_excel("rank_stats.xlsx")
+df = tutil.load_table("rank_stats")
 for prb_key, prb_val in params.items():
      for mriM_key, mriM_val in MRIMethod.items():
       
@@ -72,23 +74,21 @@ for prb_key, prb_val in params.items():
         fileName  = f"{prb_key[0]}_{mriM_key[0]}{mriM_key[5:]}_controllers.xlsx"
              
         # worksheets in the excel file corresponding to a particular method 
+        sheets = []
         with pd.ExcelWriter(fileName) as writer:
             for mriM_part in mriM_val:
                 data = fixedCtrl_tests(df, prb_val, mriM_part, ctrl_to_remove, status, zscore_threshold)
                 sheetName = f"{prb_key[0]}_{mriM_key[0]}{mriM_key[5:]}_{mriM_part.split('_')[-1]}"
                 data.to_excel(writer, sheet_name=sheetName, index=False)
+                sheets.append(data)
 
         # compute the average z-score of each controller across the worksheets
-        xls = pd.ExcelFile(fileName)
-        sheetNames = xls.sheet_names
-
         controllers = ["MRIHTol-I", "MRIHTol-H0321", "MRIHTol-H0211", "MRIHTol-H211", "MRIHTol-H312", "MRIDec-I", "MRIDec-H0321", "MRIDec-H0211", "MRIDec-H211", "MRIDec-H312"]
             
         # create empty lists to store the z-scores of each controller  
         ctrl_zscores = {ctrl: [] for ctrl in controllers}
 
-        for sheet in sheetNames:
-            df_sheet = pd.read_excel(fileName, sheet_name=sheet)
+        for df_sheet in sheets:
             for ctrl in controllers:
                 # Filter rows of a worksheet for a particular controller
                 zScore = df_sheet[df_sheet["Controller"] == ctrl]["zScore"].iloc[0] # since the zscore values are the same just pick one
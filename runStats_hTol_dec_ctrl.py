@@ -26,6 +26,7 @@
 
 
 import pandas as pd
+import table_utilities as tutil
 import numpy as np
 
 def ctrl_rename(df):
@@ -38,9 +39,9 @@ def ctrl_rename(df):
     data.loc[df["Controller"].str.startswith("MRILL"), "ctrl_name"]   = "Hh"
     return data
 
-df = pd.read_excel("rank_stats.xlsx")
+df = tutil.load_table("rank_stats")
 final_data_rename = ctrl_rename(df)
-final_data_rename.to_excel("rename_controllers.xlsx", index=False)
+tutil.save_table(final_data_rename, "rename_controllers", excel=True)
 
 
 ctrl_type = ["HTol", "Dec",'Hh']
@@ -65,7 +66,7 @@ def allCtrl_tests(df,ctrl_type):
     return data
 
 # # run test
-df = pd.read_excel("rename_controllers.xlsx")
+df = tutil.load_table("rename_controllers")
 final_data = allCtrl_tests(df,ctrl_type)
 
 # excel file containing the results for all controllers, across all prolems types, methods and metric
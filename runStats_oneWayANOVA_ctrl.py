@@ -22,11 +22,12 @@
 # Import library 
 import numpy as np 
 import pandas as pd 
+import table_utilities as tutil
 from scipy import stats
 
 
 # ------------------------------------------ Load your excel file --------------------------------------------
-df = pd.read_excel("rank_stats.xlsx")
+df = tutil.load_table("rank_stats")
 
 # --------------------------- Contains the list of AvgRank values for each controller ------------------------
 controller_groups = []
@@ -22,10 +22,12 @@
 # Import library 
 import numpy as np 
 import pandas as pd 
+import table_utilities as tutil
+import control_utilities as cutil
 from statsmodels.stats.anova import AnovaRM 
 
 
-ctrl_to_remove = ['MRIPI', 'MRIPID', 'MRICC', 'MRILL'] #Remove the H-h controllers
+ctrl_to_remove = cutil.controllers('Hh') #Remove the H-h controllers
 metric         = {"fast", "slow"}
 order          = {"Order2":[2], "Order3":[3], "Order4&5":[4,5]}
 
@@ -36,7 +38,7 @@ def repeatedM_ANOVA_methods(df, ctrl_to_remove, metric, order):
     return anova_results
 
 #run test
-df = pd.read_excel("rank_stats.xlsx") #Load your excel file 
+df = tutil.load_table("rank_stats") #Load your excel file 
 
 for mt in metric:
     for ord_key, ord_val in order.items():
@@ -8,8 +8,17 @@
 #------------------------------------------------------------
 
 # imports
-import subprocess
-import shlex
+import os
+import run_utilities as rutil
+
+# Flag to reuse results of identical runs from the cache in rutil.CacheDir
+UseCache = True
+
+# Number of threads used by each test executable to run its test cases; since the results
+# do not depend on it, this is passed through the environment (ACCUMERROR_NUM_THREADS), so
+# that it is not part of the command lines used as cache keys
+NThreads = rutil.default_workers()
+env = dict(os.environ, ACCUMERROR_NUM_THREADS=str(NThreads))
 
 #####################
 # Brusselator tests
@@ -33,8 +42,7 @@ Orders = [2, 3, 4, 5, 6, -2, -3, -4, -5, -6]
 with open(fname, "w") as outfile:
     for ord in Orders:
         runcommand = "%s %i %i %i %e %i" % (executable, Npart, ord, method, ep, test)
-        subprocess.run(shlex.split(runcommand), stdout=outfile)
-        outfile.flush()
+        outfile.write(rutil.run_command(runcommand, env=env, usecache=UseCache).stdout.decode())
 
 
 #####################
@@ -59,6 +67,5 @@ Orders = [2, 3, 4, 5, 6, -2, -3, -4, -5, -6]
 with open(fname, "w") as outfile:
     for ord in Orders:
         runcommand = "%s %i %i %i %e %e %e" % (executable, Npart, ord, method, G, e, omega)
-        subprocess.run(shlex.split(runcommand), stdout=outfile)
-        outfile.flush()
+        outfile.write(rutil.run_command(runcommand, env=env, usecache=UseCache).stdout.decode())
 
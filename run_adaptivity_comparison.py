@@ -13,106 +13,124 @@ import subprocess
 import shlex
 import sys
 import pickle
+import shutil
+import tempfile
+import numpy as np
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 sys.path.append('sundials-v7.5.0/tools')
 from suntools import logs as sunlog
+import run_utilities as rutil
+import control_utilities as cutil
+
+# Flag to have the test executables record their step histories directly into
+# binary files (using --step_history), instead of extracting the histories from
+# the SUNDIALS logging output of the "_logging" executables.  Note that the binary
+# histories only hold the accepted steps, while the logging output also includes
+# the failed step attempts, so the two give different step counts and histories.
+UseStepHistory = True
 
 # testing executables
-kpr_exe = './bin/ark_test_kpr_mriadapt_logging'
-kpr_hh_exe = './bin/ark_test_kpr_mriadapt_hh_logging'
-bruss_exe = './bin/ark_test_brusselator_mriadapt_logging'
-bruss_hh_exe = './bin/ark_test_brusselator_mriadapt_hh_logging'
+if (UseStepHistory):
+    kpr_exe = './bin/ark_test_kpr_mriadapt'
+    kpr_hh_exe = './bin/ark_test_kpr_mriadapt_hh'
+    bruss_exe = './bin/ark_test_brusselator_mriadapt'
+    bruss_hh_exe = './bin/ark_test_brusselator_mriadapt_hh'
+else:
+    kpr_exe = './bin/ark_test_kpr_mriadapt_logging'
+    kpr_hh_exe = './bin/ark_test_kpr_mriadapt_hh_logging'
+    bruss_exe = './bin/ark_test_brusselator_mriadapt_logging'
+    bruss_hh_exe = './bin/ark_test_brusselator_mriadapt_hh_logging'
 
 
 #####################
 # utility routines
 
-# controller parameters
-def controller(method):
-    match method:
-        case 'MRICC':
-            txt = ' --scontrol 1 --fcontrol 0 --safety 0.85'
-        case 'MRILL':
-            txt = ' --scontrol 2 --fcontrol 0 --safety 0.85'
-        case 'MRIPI':
-            txt = ' --scontrol 3 --fcontrol 0 --safety 0.85'
-        case 'MRIPID':
-            txt = ' --scontrol 4 --fcontrol 0 --safety 0.85'
-        case 'MRIHTol-I':
-            txt = ' --scontrol 5 --fcontrol 1'
-        case 'MRIDec-I':
-            txt = ' --scontrol 6 --fcontrol 1'
-        case 'MRIHTol-H0211':
-            txt = ' --scontrol 17 --fcontrol 7'
-        case 'MRIDec-H0211':
-            txt = ' --scontrol 18 --fcontrol 7'
-        case 'MRIHTol-H0321':
-            txt = ' --scontrol 19 --fcontrol 8'
-        case 'MRIDec-H0321':
-            txt = ' --scontrol 20 --fcontrol 8'
-        case 'MRIHTol-H211':
-            txt = ' --scontrol 21 --fcontrol 9'
-        case 'MRIDec-H211':
-            txt = ' --scontrol 22 --fcontrol 9'
-        case 'MRIHTol-H312':
-            txt = ' --scontrol 23 --fcontrol 10'
-        case 'MRIDec-H312':
-            txt = ' --scontrol 24 --fcontrol 10'
-        case _:
-            txt = ' '
-    return txt
+# function names (in the sundials-mrihh logging output) whose "end-step" entries
+# describe slow and fast time steps, respectively
+SlowStepFns = {b'mriStep_TakeStepMERK', b'mriStep_TakeStepMRIGARK', b'mriStep_TakeStepMRISR'}
+FastStepFns = {b'erkStep_TakeStep', b'arkStep_TakeStep_Z'}
+
+# translation table that replaces the separators '[],:' in a logging output line with
+# spaces, so that the line may be split into fields with a single split() call
+LogSeparators = bytes.maketrans(b'[],:', b'    ')
+
+# utility routine to process logging output lines (bytes) from the sundials-mrihh branch,
+# returning NumPy arrays with the step times, sizes and error estimates from within a
+# multirate run.  Since lines are processed one at a time, and only those containing
+# "end-step" are split into fields, lines may come from an arbitrarily large file or pipe.
+def parse_mrihh_step_histories(lines):
+    slow = array('d')
+    fast = array('d')
+    for line in lines:
+        if (b'end-step' not in line):
+            continue
+        txt = line.translate(LogSeparators).split()
+        if (b'end-step' not in txt):
+            continue
+        if (not SlowStepFns.isdisjoint(txt)):
+            slow.extend((float(txt[11]), float(txt[14]), float(txt[17])))
+        if (not FastStepFns.isdisjoint(txt)):
+            fast.extend((float(txt[11]), float(txt[14]), float(txt[17])))
+    slow = np.frombuffer(slow, dtype=np.float64).reshape(-1, 3)
+    fast = np.frombuffer(fast, dtype=np.float64).reshape(-1, 3)
+    return slow[:,0], slow[:,1], slow[:,2], fast[:,0], fast[:,1], fast[:,2]
 
 # utility routine to process a logging output file from sundials-mrihh branch to store step size and error estimates from within a multirate run
 def get_mrihh_step_histories(fname):
-    T = []
-    H = []
-    DSM = []
-    t = []
-    h = []
-    dsm = []
-    # open file and process results
-    f = open(fname)
-    separators = '[],:'
-    SSteps = 0
-    FSteps = 0
-    for line in f:
-        for sep in separators:
-            line = line.replace(sep, " ")
-        txt = line.split()
-        if (("mriStep_TakeStepMERK" in txt) and ("end-step" in txt)):
-            T.append(float(txt[11]))
-            H.append(float(txt[14]))
-            DSM.append(float(txt[17]))
-        if (("mriStep_TakeStepMRIGARK" in txt) and ("end-step" in txt)):
-            T.append(float(txt[11]))
-            H.append(float(txt[14]))
-            DSM.append(float(txt[17]))
-        if (("mriStep_TakeStepMRISR" in txt) and ("end-step" in txt)):
-            T.append(float(txt[11]))
-            H.append(float(txt[14]))
-            DSM.append(float(txt[17]))
-        if (("erkStep_TakeStep" in txt) and ("end-step" in txt)):
-            t.append(float(txt[11]))
-            h.append(float(txt[14]))
-            dsm.append(float(txt[17]))
-        if (("arkStep_TakeStep_Z" in txt) and ("end-step" in txt)):
-            t.append(float(txt[11]))
-            h.append(float(txt[14]))
-            dsm.append(float(txt[17]))
-    f.close()
-    return T, H, DSM, t, h, dsm
+    with open(fname, 'rb') as f:
+        return parse_mrihh_step_histories(f)
 
 
-# utility routine to run a kpr test, storing the run options and solver statistics
-def runtest_kpr(exe, es, ef, omega, atol, rtol, mri, order, control, extraargs=None, showcommand=False, removelog=True):
-    stats = {'es': es, 'ef': ef, 'omega': omega, 'atol': atol, 'rtol': rtol, 'mri_method': mri, 'fast_order': order, 'control': control, 'extraargs': extraargs, 'ReturnCode': 1, 'T': [], 'H': [], 't': [], 'h': [], 'Accuracy': []}
-    runcommand = "%s --es %e --ef %e --w %e --atol %e --rtol %e --fast_rtol %e --mri_method %s --fast_order %d" % (exe, es, ef, omega, atol, rtol, rtol, mri, order) + controller(control)
-    if extraargs is not None:
-        runcommand += ' ' + extraargs
-    logfile = 'kpr-log-' + control + '.txt'
+# utility routine to process a logging output file from SUNDIALS v7.5.0, returning the slow and fast step times and sizes
+def get_step_histories(fname):
+    log = sunlog.log_file_to_list(fname)
+    stepidx, times, stepsizes = sunlog.get_history(log, "h", group_by_level=True)
+    return times[0], stepsizes[0], times[1], stepsizes[1]
+
+# utility routine to process a logging output file from sundials-mrihh branch, returning the slow and fast step times and sizes
+def get_hh_step_histories(fname):
+    T, H, DSM, t, h, dsm = get_mrihh_step_histories(fname)
+    return T, H, t, h
+
+# utility routine to run a test command, storing its return code, slow and fast step
+# histories, and accuracy in stats.  The step histories are either written directly by
+# the test executable (UseStepHistory), or sent through a named pipe as SUNDIALS logging
+# output, where they are parsed by parser(pipename) while the test runs.  All files for
+# the run are placed in a private temporary folder, so tests may run concurrently.
+def run_with_histories(stats, runcommand, parser, showcommand=False, removelog=True):
+    tmpdir = tempfile.mkdtemp(prefix='adapt-comparison-')
     env = os.environ.copy()
-    env["SUNLOGGER_INFO_FILENAME"] = logfile
-    env["SUNLOGGER_DEBUG_FILENAME"] = logfile
-    result = subprocess.run(shlex.split(runcommand), stdout=subprocess.PIPE, env=env)
+    if (UseStepHistory):
+        histprefix = os.path.join(tmpdir, 'history')
+        runcommand += ' --step_history ' + histprefix
+        result = subprocess.run(shlex.split(runcommand), stdout=subprocess.PIPE, env=env)
+    else:
+        logpipe = os.path.join(tmpdir, 'log')
+        os.mkfifo(logpipe)
+        env["SUNLOGGER_INFO_FILENAME"] = logpipe
+        env["SUNLOGGER_DEBUG_FILENAME"] = logpipe
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            histories = executor.submit(parser, logpipe)
+            # opening the pipe for writing waits until the parser has opened it for reading;
+            # holding it open until the test finishes ensures that the parser only reaches
+            # end-of-file once all logging output has been written
+            keepopen = os.open(logpipe, os.O_WRONLY)
+            try:
+                proc = subprocess.Popen(shlex.split(runcommand), stdout=subprocess.PIPE, env=env)
+                output = executor.submit(proc.communicate)
+                # if the parser fails, then nothing drains the pipe and the test would block
+                # forever once the pipe is full, so the test is killed instead
+                wait([histories, output], return_when=FIRST_COMPLETED)
+                if (histories.done() and (histories.exception() is not None)):
+                    proc.kill()
+                result = subprocess.CompletedProcess(proc.args, proc.wait(), output.result()[0])
+            finally:
+                os.close(keepopen)
+        if (histories.exception() is not None):
+            print("Run command " + runcommand + " FAILURE: could not parse logging output (" +
+                  repr(histories.exception()) + ")")
+            result.returncode = 1
     stats['ReturnCode'] = result.returncode
     if (result.returncode != 0):
         print("Run command " + runcommand + " FAILURE: " + str(result.returncode))
@@ -120,71 +138,41 @@ def runtest_kpr(exe, es, ef, omega, atol, rtol, mri, order, control, extraargs=N
     else:
         if (showcommand):
             print("Run command " + runcommand + " SUCCESS")
-        if (exe == kpr_exe):
-            log = sunlog.log_file_to_list(logfile)
-            stepidx, times, stepsizes = sunlog.get_history(log, "h", group_by_level=True)
-            stats['T'] = times[0]
-            stats['H'] = stepsizes[0]
-            stats['t'] = times[1]
-            stats['h'] = stepsizes[1]
+        if (UseStepHistory):
+            T, H, DSM, t, h, dsm = rutil.load_step_history(histprefix)
         else:
-            T, H, DSM, t, h, dsm = get_mrihh_step_histories(logfile)
-            stats['T'] = T
-            stats['H'] = H
-            stats['t'] = t
-            stats['h'] = h
+            T, H, t, h = histories.result()
+        stats['T'] = T
+        stats['H'] = H
+        stats['t'] = t
+        stats['h'] = h
         lines = str(result.stdout).split('\\n')
         for line in lines:
             txt = line.split()
             if ("Relative" in txt):
                 stats['Accuracy'] = float(txt[3])
-    if (os.path.isfile(logfile) and removelog):
-        if (showcommand):
-            print("Removing log file")
-        os.remove(logfile)
+    if (removelog):
+        shutil.rmtree(tmpdir)
+    elif (showcommand):
+        print("Keeping step history files in " + tmpdir)
     return stats
 
+# utility routine to run a kpr test, storing the run options and solver statistics
+def runtest_kpr(exe, es, ef, omega, atol, rtol, mri, order, control, extraargs=None, showcommand=False, removelog=True):
+    stats = {'es': es, 'ef': ef, 'omega': omega, 'atol': atol, 'rtol': rtol, 'mri_method': mri, 'fast_order': order, 'control': control, 'extraargs': extraargs, 'ReturnCode': 1, 'T': [], 'H': [], 't': [], 'h': [], 'Accuracy': []}
+    runcommand = "%s --es %e --ef %e --w %e --atol %e --rtol %e --fast_rtol %e --mri_method %s --fast_order %d" % (exe, es, ef, omega, atol, rtol, rtol, mri, order) + cutil.controller_args(control)
+    if extraargs is not None:
+        runcommand += ' ' + extraargs
+    parser = get_step_histories if (exe == kpr_exe) else get_hh_step_histories
+    return run_with_histories(stats, runcommand, parser, showcommand, removelog)
+
 def runtest_brusselator(exe, ep, atol, rtol, mri, order, control, extraargs=None, showcommand=False, removelog=True):
     stats = {'ep': ep, 'atol': atol, 'rtol': rtol, 'mri_method': mri, 'fast_order': order, 'control': control, 'extraargs': extraargs, 'ReturnCode': 1, 'T': [], 'H': [], 't': [], 'h': [], 'Accuracy': []}
-    runcommand = "%s --ep %e --atol %e --rtol %e --fast_rtol %e --mri_method %s --fast_order %d" % (exe, ep, atol, rtol, rtol, mri, order) + controller(control)
+    runcommand = "%s --ep %e --atol %e --rtol %e --fast_rtol %e --mri_method %s --fast_order %d" % (exe, ep, atol, rtol, rtol, mri, order) + cutil.controller_args(control)
     if extraargs is not None:
         runcommand += ' ' + extraargs
-    logfile = 'bruss-log-' + control + '.txt'
-    env = os.environ.copy()
-    env["SUNLOGGER_INFO_FILENAME"] = logfile
-    env["SUNLOGGER_DEBUG_FILENAME"] = logfile
-    result = subprocess.run(shlex.split(runcommand), stdout=subprocess.PIPE, env=env)
-    stats['ReturnCode'] = result.returncode
-    if (result.returncode != 0):
-        print("Run command " + runcommand + " FAILURE: " + str(result.returncode))
-        print(result.stderr)
-    else:
-        if (showcommand):
-            print("Run command " + runcommand + " SUCCESS")
-        if (exe == bruss_exe):
-            log = sunlog.log_file_to_list(logfile)
-            stepidx, times, stepsizes = sunlog.get_history(log, "h", group_by_level=True)
-            stats['T'] = times[0]
-            stats['H'] = stepsizes[0]
-            stats['t'] = times[1]
-            stats['h'] = stepsizes[1]
-        else:
-            T, H, DSM, t, h, dsm = get_mrihh_step_histories(logfile)
-            stats['T'] = T
-            stats['H'] = H
-            stats['t'] = t
-            stats['h'] = h
-        lines = str(result.stdout).split('\\n')
-        for line in lines:
-            txt = line.split()
-            if ("Relative" in txt):
-                stats['Accuracy'] = float(txt[3])
-    if (os.path.isfile(logfile) and removelog):
-        if (showcommand):
-            print("Removing log file")
-        os.remove(logfile)
-    return stats
-
+    parser = get_step_histories if (exe == bruss_exe) else get_hh_step_histories
+    return run_with_histories(stats, runcommand, parser, showcommand, removelog)
 
 # common testing parameters
 rtol = 1.e-4
@@ -197,21 +185,20 @@ ef = 0.5      # kpr slow->fast coupling parameter
 eps = 1.e-4   # bruss parameter
 extraargs = '--htol_maxfac 10.0 --faccum 1'
 
-# empty statistics objects
-KPRStats = []
-BrussStats = []
+# Maximum number of concurrent test runs (None = one per core)
+NWorkers = None
 
 # Run both test problems using a few controllers
 MRIDec = 'MRIDec-H211'
 MRIHTol = 'MRIHTol-H211'
 MRIHh = 'MRICC'
-KPRStats.append(runtest_kpr(kpr_exe, es, ef, omega, atol, rtol, mri_method, fast_order, MRIDec, extraargs))
-KPRStats.append(runtest_kpr(kpr_exe, es, ef, omega, atol, rtol, mri_method, fast_order, MRIHTol, extraargs))
-KPRStats.append(runtest_kpr(kpr_hh_exe, es, ef, omega, atol, rtol, mri_method, fast_order, MRIHh, extraargs))
+KPRStats = rutil.run_sweep([(runtest_kpr, (kpr_exe, es, ef, omega, atol, rtol, mri_method, fast_order, MRIDec, extraargs)),
+                            (runtest_kpr, (kpr_exe, es, ef, omega, atol, rtol, mri_method, fast_order, MRIHTol, extraargs)),
+                            (runtest_kpr, (kpr_hh_exe, es, ef, omega, atol, rtol, mri_method, fast_order, MRIHh, extraargs))], NWorkers)
 
-BrussStats.append(runtest_brusselator(bruss_exe, eps, atol, rtol, mri_method, fast_order, MRIDec, extraargs))
-BrussStats.append(runtest_brusselator(bruss_exe, eps, atol, rtol, mri_method, fast_order, MRIHTol, extraargs))
-BrussStats.append(runtest_brusselator(bruss_hh_exe, eps, atol, rtol, mri_method, fast_order, MRIHh, extraargs))
+BrussStats = rutil.run_sweep([(runtest_brusselator, (bruss_exe, eps, atol, rtol, mri_method, fast_order, MRIDec, extraargs)),
+                              (runtest_brusselator, (bruss_exe, eps, atol, rtol, mri_method, fast_order, MRIHTol, extraargs)),
+                              (runtest_brusselator, (bruss_hh_exe, eps, atol, rtol, mri_method, fast_order, MRIHh, extraargs))], NWorkers)
 
 with open('kpr_adapt_comparison_results.pkl', 'wb') as file:
     pickle.dump(KPRStats, file)
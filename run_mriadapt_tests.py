@@ -8,118 +8,233 @@
 #------------------------------------------------------------
 
 # imports
-import pandas as pd
-import subprocess
+import os
 import shlex
+import argparse
+import numpy as np
+import pandas as pd
+import run_utilities as rutil
+import control_utilities as cutil
+import table_utilities as tutil
 
 #####################
 # utility routines
 
-# controller parameters
-def controller(method):
-    match method:
-        case 'MRICC':
-            txt = ' --scontrol 1 --fcontrol 0 --safety 0.85'
-        case 'MRILL':
-            txt = ' --scontrol 2 --fcontrol 0 --safety 0.85'
-        case 'MRIPI':
-            txt = ' --scontrol 3 --fcontrol 0 --safety 0.85'
-        case 'MRIPID':
-            txt = ' --scontrol 4 --fcontrol 0 --safety 0.85'
-        case 'MRIHTol-I':
-            txt = ' --scontrol 5 --fcontrol 1'
-        case 'MRIDec-I':
-            txt = ' --scontrol 6 --fcontrol 1'
-        case 'MRIHTol-H0211':
-            txt = ' --scontrol 17 --fcontrol 7'
-        case 'MRIDec-H0211':
-            txt = ' --scontrol 18 --fcontrol 7'
-        case 'MRIHTol-H0321':
-            txt = ' --scontrol 19 --fcontrol 8'
-        case 'MRIDec-H0321':
-            txt = ' --scontrol 20 --fcontrol 8'
-        case 'MRIHTol-H211':
-            txt = ' --scontrol 21 --fcontrol 9'
-        case 'MRIDec-H211':
-            txt = ' --scontrol 22 --fcontrol 9'
-        case 'MRIHTol-H312':
-            txt = ' --scontrol 23 --fcontrol 10'
-        case 'MRIDec-H312':
-            txt = ' --scontrol 24 --fcontrol 10'
-        case _:
-            txt = ' '
+# run budget options for the test executables
+def budget_args():
+    txt = ''
+    for opt, value in [('max_slow_steps', MaxSlowSteps), ('max_fast_steps', MaxFastSteps),
+                       ('max_rhs_evals', MaxRhsEvals), ('max_time', MaxTime)]:
+        if value is not None:
+            txt += ' --%s %s' % (opt, value)
     return txt
 
-# utility routine to run a single KPR test, storing the run options and solver statistics
-def runtest_kpr(exe, es, ef, omega, atol, rtol, mri, order, control, extraargs=None, showcommand=False):
-    stats = {'es': es, 'ef': ef, 'omega': omega, 'atol': atol, 'rtol': rtol, 'mri_method': mri, 'fast_order': order, 'control': control, 'extraargs': extraargs, 'ReturnCode': 1, 'SlowSteps': 1e10, 'SlowFails': 1e10, 'FastSteps': 1e10, 'FastFails': 1e10, 'Accuracy': 1e10, 'FfEvals': 1e10, 'FseEvals': 1e10, 'FsiEvals': 1e10}
-    runcommand = "%s --es %e --ef %e --w %e --atol %e --rtol %e --fast_rtol %e --mri_method %s --fast_order %d" % (exe, es, ef, omega, atol, rtol, rtol, mri, order) + controller(control)
+# utility routine to set up a single KPR test, returning its initial statistics and run command
+# (the solver statistics are NaN until they are read from a successful run)
+def setup_kpr(exe, es, ef, omega, atol, rtol, mri, order, control, extraargs=None):
+    stats = {'es': es, 'ef': ef, 'omega': omega, 'atol': atol, 'rtol': rtol, 'mri_method': mri, 'fast_order': order, 'control': control, 'extraargs': extraargs, 'ReturnCode': 1, 'SlowSteps': np.nan, 'SlowFails': np.nan, 'FastSteps': np.nan, 'FastFails': np.nan, 'Accuracy': np.nan, 'FfEvals': np.nan, 'FseEvals': np.nan, 'FsiEvals': np.nan, 'SlowNewtonIters': np.nan, 'Pruned': False, 'WallTime': np.nan, 'UserTime': np.nan, 'SystemTime': np.nan, 'MaxRSS': np.nan, 'EvolveTime': np.nan, 'RefTime': np.nan}
+    runcommand = "%s --es %e --ef %e --w %e --atol %e --rtol %e --fast_rtol %e --mri_method %s --fast_order %d --json_stats 1 --quiet 1" % (exe, es, ef, omega, atol, rtol, rtol, mri, order) + cutil.controller_args(control)
+    if extraargs is not None:
+        runcommand += ' ' + extraargs
+    return stats, runcommand + budget_args()
+
+# utility routine to set up a single Brusselator test, returning its initial statistics and run command
+def setup_brusselator(exe, ep, atol, rtol, mri, order, control, extraargs=None):
+    stats = {'ep': ep, 'atol': atol, 'rtol': rtol, 'mri_method': mri, 'fast_order': order, 'control': control, 'extraargs': extraargs, 'ReturnCode': 1, 'SlowSteps': np.nan, 'SlowFails': np.nan, 'FastSteps': np.nan, 'FastFails': np.nan, 'Accuracy': np.nan, 'FfEvals': np.nan, 'FseEvals': np.nan, 'FsiEvals': np.nan, 'SlowNewtonIters': np.nan, 'Pruned': False, 'WallTime': np.nan, 'UserTime': np.nan, 'SystemTime': np.nan, 'MaxRSS': np.nan, 'EvolveTime': np.nan, 'RefTime': np.nan}
+    runcommand = "%s --ep %e --atol %e --rtol %e --fast_rtol %e --mri_method %s --fast_order %d --json_stats 1 --quiet 1" % (exe, ep, atol, rtol, rtol, mri, order) + cutil.controller_args(control)
     if extraargs is not None:
         runcommand += ' ' + extraargs
-    result = subprocess.run(shlex.split(runcommand), stdout=subprocess.PIPE)
+    return stats, runcommand + budget_args()
+
+# utility routine to store the solver statistics from a completed test run
+def store_stats(stats, runcommand, result, showcommand=False):
     stats['ReturnCode'] = result.returncode
-    if (result.returncode != 0):
+    if (result.returncode == rutil.BudgetExceeded):
+        print("Run command " + runcommand + " BUDGET EXCEEDED")
+        print(result.stderr.decode())
+    elif (result.returncode != 0):
         print("Run command " + runcommand + " FAILURE: " + str(result.returncode))
-        print(result.stderr)
+        print(result.stderr.decode())
     else:
-        if (showcommand):
-            print("Run command " + runcommand + " SUCCESS")
-        lines = str(result.stdout).split('\\n')
-        for line in lines:
-            txt = line.split()
-            if (("Slow" in txt) and ("steps" in txt)):
-                stats['SlowSteps'] = int(txt[3])
-                stats['SlowFails'] = int((txt[9].split(")"))[0])
-            elif (("Fast" in txt) and ("steps" in txt)):
-                stats['FastSteps'] = int(txt[3])
-                stats['FastFails'] = int((txt[9].split(")"))[0])
-            elif ("Relative" in txt):
-                stats['Accuracy'] = float(txt[3])
-            elif ("RHS" in txt):
-                stats['FfEvals'] = int(txt[11])
-                stats['FseEvals'] = int((txt[5].split(","))[0])
-                stats['FsiEvals'] = int((txt[8].split(","))[0])
+        record = rutil.parse_json_stats(result.stdout)
+        if (record is None):
+            stats['ReturnCode'] = 1
+            print("Run command " + runcommand + " FAILURE: unreadable statistics record")
+        else:
+            if (showcommand):
+                print("Run command " + runcommand + " SUCCESS")
+            stats.update({key: record[key] for key in stats if key in record})
+            if ('SlowNewtonIters' not in record):
+                stats['SlowNewtonIters'] = 0   # explicit slow methods do no Newton iterations
+            if (not RecordTimings):
+                stats.update({key: np.nan for key in rutil.TimingFields})
     return stats
 
+# utility routine to run a single KPR test, storing the run options and solver statistics
+def runtest_kpr(exe, es, ef, omega, atol, rtol, mri, order, control, extraargs=None, showcommand=False):
+    stats, runcommand = setup_kpr(exe, es, ef, omega, atol, rtol, mri, order, control, extraargs)
+    result = rutil.run_command(runcommand, usecache=UseCache and not RecordTimings, timeout=RunTimeout)
+    return store_stats(stats, runcommand, result, showcommand)
+
 # utility routine to run a single Brusselator test, storing the run options and solver statistics
 def runtest_brusselator(exe, ep, atol, rtol, mri, order, control, extraargs=None, showcommand=False):
-    stats = {'ep': ep, 'atol': atol, 'rtol': rtol, 'mri_method': mri, 'fast_order': order, 'control': control, 'extraargs': extraargs, 'ReturnCode': 1, 'SlowSteps': 1e10, 'SlowFails': 1e10, 'FastSteps': 1e10, 'FastFails': 1e10, 'Accuracy': 1e10, 'FfEvals': 1e10, 'FseEvals': 1e10, 'FsiEvals': 1e10}
-    runcommand = "%s --ep %e --atol %e --rtol %e --fast_rtol %e --mri_method %s --fast_order %d" % (exe, ep, atol, rtol, rtol, mri, order) + controller(control)
-    if extraargs is not None:
-        runcommand += ' ' + extraargs
-    result = subprocess.run(shlex.split(runcommand), stdout=subprocess.PIPE)
-    stats['ReturnCode'] = result.returncode
-    if (result.returncode != 0):
-        print("Run command " + runcommand + " FAILURE: " + str(result.returncode))
-        print(result.stderr)
-    else:
-        if (showcommand):
-            print("Run command " + runcommand + " SUCCESS")
-        lines = str(result.stdout).split('\\n')
-        for line in lines:
-            txt = line.split()
-            if (("Slow" in txt) and ("steps" in txt)):
-                stats['SlowSteps'] = int(txt[3])
-                stats['SlowFails'] = int((txt[9].split(")"))[0])
-            elif (("Fast" in txt) and ("steps" in txt)):
-                stats['FastSteps'] = int(txt[3])
-                stats['FastFails'] = int((txt[9].split(")"))[0])
-            elif ("Relative" in txt):
-                stats['Accuracy'] = float(txt[3])
-            elif ("RHS" in txt):
-                stats['FfEvals'] = int(txt[11])
-                stats['FseEvals'] = int((txt[5].split(","))[0])
-                stats['FsiEvals'] = int((txt[8].split(","))[0])
+    stats, runcommand = setup_brusselator(exe, ep, atol, rtol, mri, order, control, extraargs)
+    result = rutil.run_command(runcommand, usecache=UseCache and not RecordTimings, timeout=RunTimeout)
+    return store_stats(stats, runcommand, result, showcommand)
+
+# utility routine to run a list of tests [(runtest_kpr, args1), (runtest_brusselator, args2), ...],
+# using one launch of each executable (batch mode) for all of the tests that share it; since
+# the peak memory use reported by an executable covers all of the tests that it ran so far,
+# MaxRSS is not recorded for these tests
+def runtest_batch(tests):
+    setup = {runtest_kpr: setup_kpr, runtest_brusselator: setup_brusselator}
+    runs = [setup[func](*args) for func, args in tests]
+    results = [None] * len(tests)
+    for exe in dict.fromkeys(args[0] for _, args in tests):
+        idx = [i for i, (_, args) in enumerate(tests) if args[0] == exe]
+        batch = rutil.run_batch([runs[i][1] for i in idx], usecache=UseCache and not RecordTimings, timeout=RunTimeout)
+        for i, result in zip(idx, batch):
+            results[i] = store_stats(runs[i][0], runs[i][1], result)
+            results[i]['MaxRSS'] = np.nan
+    return results
+
+# utility routine to return the initial statistics of a test that was pruned from the sweep
+def pruned_stats(test):
+    setup = {runtest_kpr: setup_kpr, runtest_brusselator: setup_brusselator}
+    stats = setup[test[0]](*test[1])[0]
+    stats['Pruned'] = True
     return stats
 
+# utility routine to run a list of tests, journaling the results in the file journal, where
+# the arguments of each test hold rtol in position irtol and identify the method/controller
+# pair in the positions ipair.  If PruneSweep is set, then the tolerances are run from
+# loosest to tightest, and after the first PruneMinRTols of these only the best-ranked
+# pairs (see rutil.prune_curves) continue to each tighter tolerance; the tests of the
+# other pairs are not run, and are recorded with 'Pruned' set instead.  If AdaptiveRTols
+# is set, then the tolerance grid of each remaining pair is then refined (see
+# rutil.refine_rtols) until the efficiency rankings no longer change.  Returns the tests
+# and their statistics, ordered by decreasing rtol if either of these options is set.
+def run_tests(tests, journal, irtol, ipair):
+    keep = lambda s: s['ReturnCode'] >= 0
+    if (not PruneSweep):
+        stats = rutil.run_journaled_sweep(tests, journal, resume, NWorkers, keep, runtest_batch, BatchSize)
+        active = None
+        pruned = []
+    else:
+        alltests = tests
+        tests = []
+        active = None
+        rtols = sorted(set(test[1][irtol] for test in alltests), reverse=True)
+        for ilev, rtol in enumerate(rtols):
+            tests += [test for test in alltests if (test[1][irtol] == rtol) and
+                      ((active is None) or (rutil.curve_key(test[1], irtol) in active))]
+            stats = rutil.run_journaled_sweep(tests, journal, resume or (ilev > 0), NWorkers, keep, runtest_batch, BatchSize)
+            if (ilev+1 >= PruneMinRTols) and (ilev+1 < len(rtols)):
+                current = [i for i, test in enumerate(tests) if (active is None) or (rutil.curve_key(test[1], irtol) in active)]
+                active = rutil.prune_curves([tests[i] for i in current], [stats[i] for i in current], irtol, ipair,
+                                            RefineWorks, PruneKeep, PruneMinPairs)
+                print("Pruning after rtol = %g: %d pairs remain" % (rtol, len(active)))
+        run = set(tests)
+        pruned = [test for test in alltests if test not in run]
+    if (AdaptiveRTols):
+        rankings = None
+        for iref in range(MaxRefinements):
+            current = [i for i, test in enumerate(tests) if (active is None) or (rutil.curve_key(test[1], irtol) in active)]
+            newtests, newrankings = rutil.refine_rtols([tests[i] for i in current], [stats[i] for i in current],
+                                                       irtol, ipair, RefineWorks)
+            if (len(newtests) == 0) or (newrankings == rankings):
+                break
+            print("Refinement %d: adding %d runs" % (iref+1, len(newtests)))
+            tests = tests + newtests
+            rankings = newrankings
+            stats = rutil.run_journaled_sweep(tests, journal, True, NWorkers, keep, runtest_batch, BatchSize)
+    if (not (PruneSweep or AdaptiveRTols)):
+        return tests, stats
+    tests, stats = tests + pruned, stats + [pruned_stats(test) for test in pruned]
+    order = rutil.rtol_order(tests, irtol)
+    return [tests[i] for i in order], [stats[i] for i in order]
+
 
 #####################
 # testing setup
 
+# command-line options
+parser = argparse.ArgumentParser(description='Run MRI adaptivity tests on the KPR and Brusselator problems')
+parser.add_argument('--resume', action='store_true', help='skip runs already recorded in the results journals')
+parser.add_argument('--only', action='append', metavar='NAME=VALUES',
+                    help='only run tests whose parameter NAME (e.g., omega, ep, rtol, mri_method, control, family) has one of the comma-separated VALUES (may be repeated); each filter only applies to the problems that have that parameter, and implies --resume, since the results tables then only hold the selected tests')
+parser.add_argument('--shard', metavar='I/N', help='only run shard I of N (counting from 0) of the tests')
+parser.add_argument('--count', action='store_true', help='report the number of selected tests and their estimated run time, without running them')
+parser.add_argument('--merge', type=int, metavar='N', help='combine the results tables of N shards, without running any tests')
+args = parser.parse_args()
+
+# A filtered run keeps the earlier records in the results journals (as with --resume), so
+# that a later run without --only can rebuild the full results tables from them
+resume = args.resume or (args.only is not None)
+
 # Flags to enable/disable categories of tests
 DoKPR = True
 DoBrusselator = True
 
+# Maximum number of concurrent test runs (None = one per core)
+NWorkers = None
+
+# Flag to reuse results of identical runs from the cache in rutil.CacheDir
+UseCache = True
+
+# Flag to record the run times and peak memory use of each run (the fields in
+# rutil.TimingFields), as used by the time work metrics of the plots and by the cost
+# estimates of --count.  Since these depend on the machine and its load, the runs are then
+# not read from (or stored in) the cache; otherwise these fields are NaN.
+RecordTimings = False
+
+# Flag to also export the final results tables to Excel (plotting scripts read the
+# columnar tables written by tutil.save_table)
+ExportExcel = True
+
+# Number of tests to run within each launch of an executable (1 = separate launches)
+BatchSize = 20
+
+# Budget for each run (None = unlimited): runs whose numbers of slow steps, fast steps or
+# right-hand side evaluations, or whose wall-clock time (seconds), exceed these limits are
+# stopped early by the test executables, and recorded with ReturnCode rutil.BudgetExceeded
+# instead of as failures.  Runs that are still going after RunTimeout seconds (e.g., hung
+# runs) are killed and recorded the same way; in batch mode, this limit applies to each
+# test separately, and the tests after a killed one are run in a new launch.
+MaxSlowSteps = None
+MaxFastSteps = None
+MaxRhsEvals = None
+MaxTime = None
+RunTimeout = None
+
+# Flag to measure errors against a stored reference trajectory (computed once per
+# problem parameter set and maximum step size RefHmax, before the sweep starts)
+# instead of re-solving the reference problem from the current state after every
+# step.  Note that this measures global instead of local errors, so results will
+# differ from the default.
+UseRefTrajectory = False
+RefFolder = 'reference_trajectories'
+RefHmax = 1.e-4
+
+# Flag to refine the tolerance grid adaptively: starting from RTols, tolerances are
+# added for each method/controller pair wherever its work-precision curve is poorly
+# resolved or where the efficiency rankings of the pairs change, until the rankings
+# (by each of the work measures in RefineWorks) no longer change, or MaxRefinements
+# rounds of runs have been added
+AdaptiveRTols = False
+MaxRefinements = 4
+RefineWorks = [lambda s: s['SlowSteps'] + s['SlowFails'], lambda s: s['FastSteps'] + s['FastFails']]
+
+# Flag to prune dominated method/controller pairs during the sweep (successive halving):
+# all pairs are run at the loosest PruneMinRTols tolerances, after which only the best
+# fraction PruneKeep of the remaining pairs for each problem (ranked by their average
+# efficiency rank over the work measures in RefineWorks), but at least PruneMinPairs of
+# them, are run at each tighter tolerance
+PruneSweep = False
+PruneMinRTols = 2
+PruneKeep = 0.5
+PruneMinPairs = 15
+
 # Lists of MRI methods/orders, controllers, and tolerances
 MRIMethods = [["ARKODE_MRI_GARK_RALSTON2", 2], ["ARKODE_MRI_GARK_ERK22a", 2], ["ARKODE_MRI_GARK_ERK22b", 2],
               ["ARKODE_MERK21", 2], ["ARKODE_MRI_GARK_IRK21a", 2], ["ARKODE_IMEX_MRI_SR21", 2],
@@ -127,9 +242,7 @@ MRIMethods = [["ARKODE_MRI_GARK_RALSTON2", 2], ["ARKODE_MRI_GARK_ERK22a", 2], ["
               ["ARKODE_IMEX_MRI_SR32", 3],
               ["ARKODE_MRI_GARK_ERK45a", 4], ["ARKODE_MERK43", 4], ["ARKODE_MRI_GARK_ESDIRK46a", 4],
               ["ARKODE_IMEX_MRI_SR43", 4], ["ARKODE_MERK54", 5]]
-DControls = ['MRIDec-I', 'MRIDec-H0211', 'MRIDec-H0321', 'MRIDec-H211', 'MRIDec-H312']
-HTControls = ['MRIHTol-I', 'MRIHTol-H0211', 'MRIHTol-H0321', 'MRIHTol-H211', 'MRIHTol-H312']
-HhControls = ['MRICC', 'MRILL', 'MRIPI', 'MRIPID']
+Controls = cutil.controllers(['Dec', 'HTol', 'Hh'])
 RTols = [1.e-3, 1.e-4, 1.e-5, 1.e-6, 1.e-7]
 atol = 1.e-11
 
@@ -140,60 +253,140 @@ ef = 0.5                 # KPR slow->fast coupling parameter
 Eps = [1.e-4, 1.e-5]     # Brusselator
 extraargs = '--htol_maxfac 10.0 --faccum 1'
 
+# Executable selection rule: the MRI-CC, MRI-LL, MRI-PI and MRI-PID controllers are only
+# available in the executables built against the sundials-mrihh branch
+def executable(run):
+    return run['hh_executable'] if (run['family'] == 'Hh') else run['executable']
+
+# Sweep specifications (see rutil.expand_sweep): the parameters, swept axes, and the
+# rules that derive the controller family, executable and extra arguments of each run
+KPRSweep = {'params': {'executable': "./bin/ark_test_kpr_mriadapt",
+                       'hh_executable': "./bin/ark_test_kpr_mriadapt_hh",
+                       'es': es, 'ef': ef, 'atol': atol},
+            'axes': [('omega', Omegas), ('rtol', RTols), (('mri_method', 'fast_order'), MRIMethods),
+                     ('control', Controls)],
+            'rules': [('family', lambda run: cutil.family(run['control'])),
+                      ('exe', executable),
+                      ('extraargs', lambda run: extraargs if (not UseRefTrajectory) else extraargs +
+                       ' --ref_file %s/kpr_es%g_ef%g_w%g_h%g.bin --ref_hmax %e' % (RefFolder, run['es'], run['ef'], run['omega'], RefHmax, RefHmax))]}
+BrusselatorSweep = {'params': {'executable': "./bin/ark_test_brusselator_mriadapt",
+                               'hh_executable': "./bin/ark_test_brusselator_mriadapt_hh",
+                               'atol': atol},
+                    'axes': [('ep', Eps), ('rtol', RTols), (('mri_method', 'fast_order'), MRIMethods),
+                             ('control', Controls)],
+                    'rules': [('family', lambda run: cutil.family(run['control'])),
+                              ('exe', executable),
+                              ('extraargs', lambda run: extraargs if (not UseRefTrajectory) else extraargs +
+                               ' --ref_file %s/brusselator_ep%g_h%g.bin --ref_hmax %e' % (RefFolder, run['ep'], RefHmax, RefHmax))]}
+
+# Pruning and tolerance refinement rank each method/controller pair against all of the
+# others for the same problem, so they cannot be split across shards
+if (args.shard is not None) and (PruneSweep or AdaptiveRTols):
+    parser.error('--shard cannot be used with PruneSweep or AdaptiveRTols')
+
+# Every --only filter must name a parameter of the runs of at least one of the sweeps
+for name in rutil.parse_filters(args.only):
+    if all(name not in next(rutil.expand_sweep(spec)) for spec in [KPRSweep, BrusselatorSweep]):
+        parser.error("--only: '%s' is not a run parameter" % name)
+
+# utility routine to return the selected runs of a sweep specification (see --only and --shard),
+# applying only the filters on parameters of its runs
+def select(spec, shardby):
+    shard = None
+    if (args.shard is not None):
+        index, count = args.shard.split('/')
+        shard = (int(index), int(count))
+    names = next(rutil.expand_sweep(spec))
+    filters = {name: values for name, values in rutil.parse_filters(args.only).items() if name in names}
+    return rutil.select_runs(rutil.expand_sweep(spec), filters, shard, shardby)
+
+# utility routine to return the name of the results table (and journal) for this shard
+def shard_name(fname, ishard=None, nshards=None):
+    if (ishard is None) and (args.shard is not None):
+        ishard, nshards = [int(n) for n in args.shard.split('/')]
+    return fname if (ishard is None) else '%s_shard%dof%d' % (fname, ishard, nshards)
+
+# utility routine to compute the stored reference trajectories before a sweep: the first
+# test that uses each reference file that does not exist yet is run on its own, so that the
+# concurrent runs of the sweep read these files instead of each recomputing them (with
+# UseCache, the sweep then reuses the results of these runs)
+def make_references(tests):
+    first = {}
+    for test in tests:
+        opts = shlex.split(test[1][-1] or '')
+        if ('--ref_file' in opts):
+            ref = opts[opts.index('--ref_file') + 1]
+            if (not os.path.isfile(ref)):
+                first.setdefault(ref, test)
+    if (len(first) > 0):
+        print("Computing %d reference trajectories" % len(first))
+        rutil.run_sweep(list(first.values()), NWorkers)
+
+# utility routine to run the tests of a problem (or just report their number and estimated
+# cost with --count), and save the results table; problems without any selected tests are
+# skipped, leaving their journal and results table untouched
+def run_problem(name, tests, fname, irtol, ipair):
+    if (len(tests) == 0):
+        print("%s: no runs selected" % name)
+        return
+    journal = shard_name(fname) + '.journal'
+    if (args.count):
+        cost, nrecorded = rutil.estimate_cost(tests, journal, lambda s: s['WallTime'] if ((s['ReturnCode'] == 0) and np.isfinite(s['WallTime'])) else None,
+                                              lambda test: tuple(test[1][i] for i in ipair))
+        print("%s: %d runs (%d already recorded in %s)" % (name, len(tests), nrecorded, journal))
+        if (cost is not None):
+            print("  estimated total run time: %.1f core-hours" % (cost / 3600.0))
+        return
+    if (UseRefTrajectory):
+        os.makedirs(RefFolder, exist_ok=True)
+        make_references(tests)
+    tests, stats = run_tests(tests, journal, irtol, ipair)
+
+    df = pd.DataFrame.from_records(stats)
+    print(name + "Df object:")
+    print(df)
+    print("Saving results table")
+    tutil.save_table(df, shard_name(fname), ExportExcel)
+
+# utility routine to combine the results tables of all nshards shards of a problem, in the
+# order of the runs of its sweep specification spec (as for an unsharded sweep)
+def merge_shards(fname, nshards, spec):
+    df = pd.concat([tutil.load_table(shard_name(fname, i, nshards)) for i in range(nshards)], ignore_index=True)
+    names = [name for axis, _ in spec['axes'] for name in (axis if isinstance(axis, tuple) else (axis,))]
+    position = {tuple(run[name] for name in names): i for i, run in enumerate(rutil.expand_sweep(spec))}
+    order = np.argsort([position.get(key, len(position)) for key in zip(*(df[name] for name in names))], kind='stable')
+    df = df.iloc[order].reset_index(drop=True)
+    print("Saving merged results table %s (%d runs)" % (fname, len(df)))
+    tutil.save_table(df, fname, ExportExcel)
+
 #####################
 # KPR tests
 if (DoKPR):
 
-    # set executable name
-    Executable = "./bin/ark_test_kpr_mriadapt"
-    HhExecutable = "./bin/ark_test_kpr_mriadapt_hh"
-
     # filename to hold run statistics
     fname = "kpr_mriadapt_results"
 
-    # run first set of tests and collect results
-    KPRStats = []
-    for omega in Omegas:
-        for rtol in RTols:
-            for method in MRIMethods:
-                for control in DControls:
-                    KPRStats.append(runtest_kpr(Executable, es, ef, omega, atol, rtol, method[0], method[1], control, extraargs))
-                for control in HTControls:
-                    KPRStats.append(runtest_kpr(Executable, es, ef, omega, atol, rtol, method[0], method[1], control, extraargs))
-                for control in HhControls:
-                    KPRStats.append(runtest_kpr(HhExecutable, es, ef, omega, atol, rtol, method[0], method[1], control, extraargs))
-
-    KPRDf = pd.DataFrame.from_records(KPRStats)
-    print("KPRDf object:")
-    print(KPRDf)
-    print("Saving as Excel")
-    KPRDf.to_excel(fname + '.xlsx', index=False)
+    # set up the selected tests, then run them and collect results
+    if (args.merge is not None):
+        merge_shards(fname, args.merge, KPRSweep)
+    else:
+        KPRTests = [(runtest_kpr, (run['exe'], run['es'], run['ef'], run['omega'], run['atol'], run['rtol'],
+                                   run['mri_method'], run['fast_order'], run['control'], run['extraargs']))
+                    for run in select(KPRSweep, ['omega', 'mri_method', 'control'])]
+        run_problem('KPR', KPRTests, fname, 5, [0, 6, 7, 8])
 
 #####################
 # Brusselator tests
 if (DoBrusselator):
 
-    # set executable name
-    Executable = "./bin/ark_test_brusselator_mriadapt"
-    HhExecutable = "./bin/ark_test_brusselator_mriadapt_hh"
-
     # filename to hold run statistics
     fname = "brusselator_mriadapt_results"
 
-    # run first set of tests and collect results
-    BrusselatorStats = []
-    for ep in Eps:
-        for rtol in RTols:
-            for method in MRIMethods:
-                for control in DControls:
-                    BrusselatorStats.append(runtest_brusselator(Executable, ep, atol, rtol, method[0], method[1], control, extraargs))
-                for control in HTControls:
-                    BrusselatorStats.append(runtest_brusselator(Executable, ep, atol, rtol, method[0], method[1], control, extraargs))
-                for control in HhControls:
-                    BrusselatorStats.append(runtest_brusselator(HhExecutable, ep, atol, rtol, method[0], method[1], control, extraargs))
-
-    BrusselatorDf = pd.DataFrame.from_records(BrusselatorStats)
-    print("BrusselatorDf object:")
-    print(BrusselatorDf)
-    print("Saving as Excel")
-    BrusselatorDf.to_excel(fname + '.xlsx', index=False)
+    # set up the selected tests, then run them and collect results
+    if (args.merge is not None):
+        merge_shards(fname, args.merge, BrusselatorSweep)
+    else:
+        BrusselatorTests = [(runtest_brusselator, (run['exe'], run['ep'], run['atol'], run['rtol'],
+                                                   run['mri_method'], run['fast_order'], run['control'], run['extraargs']))
+                            for run in select(BrusselatorSweep, ['ep', 'mri_method', 'control'])]
+        run_problem('Brusselator', BrusselatorTests, fname, 3, [0, 4, 5, 6])
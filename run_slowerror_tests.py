@@ -8,8 +8,13 @@
 #------------------------------------------------------------
 
 # imports
-import subprocess
-import shlex
+import run_utilities as rutil
+
+# Flag to reuse results of identical runs from the cache in rutil.CacheDir
+UseCache = True
+
+# Maximum number of concurrent test runs (None = one per core)
+NWorkers = None
 
 # MRI methods to test
 MethodsLo = ["ARKODE_MRI_GARK_RALSTON2", "ARKODE_MRI_GARK_ERK22a", "ARKODE_MRI_GARK_ERK22b",
@@ -19,6 +24,14 @@ MethodsHi = ["ARKODE_MRI_GARK_ERK33a", "ARKODE_MERK32", "ARKODE_MRI_GARK_ESDIRK3
              "ARKODE_MRI_GARK_ESDIRK46a", "ARKODE_IMEX_MRI_SR43", "ARKODE_MERK54"]
 
 
+# utility routine to run a single test and return its output
+def runtest(runcommand):
+    return rutil.run_command(runcommand, usecache=UseCache).stdout.decode()
+
+# all runs are collected here, as (output filename, list of commands for that file)
+RunFiles = []
+
+
 #####################
 # Brusselator tests
 
@@ -34,19 +47,9 @@ test = 2
 Npart = 20
 ep = 0.0004
 
-# open results file for low order methods, and run each test (appending results to fname_lo)
-with open(fname_lo, "w") as outfile:
-    for method in MethodsLo:
-        runcommand = "%s %s %i %e %i" % (executable, method, Npart, ep, test)
-        subprocess.run(shlex.split(runcommand), stdout=outfile)
-        outfile.flush()
-
-# open results file for high order methods, and run each test (appending results to fname_hi)
-with open(fname_hi, "w") as outfile:
-    for method in MethodsHi:
-        runcommand = "%s %s %i %e %i" % (executable, method, Npart, ep, test)
-        subprocess.run(shlex.split(runcommand), stdout=outfile)
-        outfile.flush()
+# one test per method, for the low and high order methods
+RunFiles.append((fname_lo, ["%s %s %i %e %i" % (executable, method, Npart, ep, test) for method in MethodsLo]))
+RunFiles.append((fname_hi, ["%s %s %i %e %i" % (executable, method, Npart, ep, test) for method in MethodsHi]))
 
 
 #####################
@@ -65,18 +68,16 @@ G = -10.0
 e = 0.1
 omega = 5.0
 
-# open results file for low order methods, and run each test (appending results to fname_lo)
-with open(fname_lo, "w") as outfile:
-    for method in MethodsLo:
-        runcommand = "%s %s %i %e %e %e" % (executable, method, Npart, G, e, omega)
-        subprocess.run(shlex.split(runcommand), stdout=outfile)
-        outfile.flush()
+# one test per method, for the low and high order methods
+RunFiles.append((fname_lo, ["%s %s %i %e %e %e" % (executable, method, Npart, G, e, omega) for method in MethodsLo]))
+RunFiles.append((fname_hi, ["%s %s %i %e %e %e" % (executable, method, Npart, G, e, omega) for method in MethodsHi]))
 
-# open results file for high order methods, and run each test (appending results to fname_hi)
-with open(fname_hi, "w") as outfile:
-    for method in MethodsHi:
-        runcommand = "%s %s %i %e %e %e" % (executable, method, Npart, G, e, omega)
-        subprocess.run(shlex.split(runcommand), stdout=outfile)
-        outfile.flush()
 
+#####################
+# Run all tests concurrently, and write the output of each results file in method order
 
+Outputs = iter(rutil.run_sweep([(runtest, (runcommand,)) for fname, runcommands in RunFiles for runcommand in runcommands], NWorkers))
+for fname, runcommands in RunFiles:
+    with open(fname, "w") as outfile:
+        for runcommand in runcommands:
+            outfile.write(next(Outputs))
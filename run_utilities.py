@@ -0,0 +1,710 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------
+# Programmer(s):  Daniel R. Reynolds @ SMU
+#------------------------------------------------------------
+# Copyright (c) 2025, Southern Methodist University.
+# All rights reserved.
+# For details, see the LICENSE file.
+#------------------------------------------------------------
+
+# imports
+import os
+import json
+import time
+import queue
+import shlex
+import shutil
+import hashlib
+import threading
+import subprocess
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# folder holding the on-disk cache of solver runs
+CacheDir = '.runcache'
+
+# return code of runs that were stopped early for exceeding their run budget (this
+# matches BUDGET_EXCEEDED in test_utilities.hpp), or that were killed for exceeding
+# their timeout
+BudgetExceeded = 2
+
+# fields of the statistics records that hold the run times and peak memory use measured by
+# the test executables; since these depend on the machine (and its load) that ran a test,
+# they are only meaningful for runs that were not read from the cache
+TimingFields = ['WallTime', 'UserTime', 'SystemTime', 'MaxRSS', 'EvolveTime', 'RefTime']
+
+# hashes of executables, keyed on (path, size, modification time)
+_exe_hashes = {}
+_exe_lock = threading.Lock()
+
+# utility functions
+def exe_hash(exe):
+    """
+    Returns the SHA-256 hash of the executable file exe.  Hashes are stored in memory,
+    so each binary is only read again if its size or modification time changes.
+    """
+    path = shutil.which(exe) or exe
+    st = os.stat(path)
+    key = (os.path.realpath(path), st.st_size, st.st_mtime_ns)
+    with _exe_lock:
+        if key in _exe_hashes:
+            return _exe_hashes[key]
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    with _exe_lock:
+        _exe_hashes[key] = h.hexdigest()
+    return _exe_hashes[key]
+
+def cache_key(runcommand):
+    """
+    Returns the cache key for the command string runcommand: a hash of the full command
+    line together with the hash of the executable that it runs.  Returns None if the
+    executable cannot be found (in which case the run cannot be cached).
+    """
+    args = shlex.split(runcommand)
+    try:
+        binhash = exe_hash(args[0])
+    except OSError:
+        return None
+    return hashlib.sha256((binhash + '\n' + ' '.join(args)).encode()).hexdigest()
+
+def run_command(runcommand, env=None, usecache=True, timeout=None):
+    """
+    Runs the command string runcommand, capturing both stdout and stderr, and returns
+    the resulting subprocess.CompletedProcess object.  If timeout is given, then runs
+    taking longer than timeout seconds are killed, and given the return code
+    BudgetExceeded.
+
+    If usecache is True, the run is first looked up in the on-disk cache in CacheDir,
+    keyed on the full command line and a hash of the executable.  On a hit the stored
+    result is returned without running anything; on a miss the command is run and its
+    result is stored, unless it is not cacheable (see cacheable).  Since the key does
+    not include env, runs whose results depend on the environment (or that write files
+    other than stdout/stderr) should use usecache=False.
+    """
+    key = cache_key(runcommand) if (usecache and CacheDir is not None) else None
+    if (key is not None):
+        result = load_result(key, runcommand)
+        if (result is not None):
+            return result
+
+    try:
+        result = subprocess.run(shlex.split(runcommand), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                env=env, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        return timeout_result(shlex.split(runcommand), e)
+
+    if ((key is not None) and cacheable(runcommand, result)):
+        store_result(key, runcommand, result)
+    return result
+
+def cacheable(runcommand, result):
+    """
+    Returns whether the subprocess.CompletedProcess object result for the command string
+    runcommand may be stored in the cache: runs that were terminated by a signal are not,
+    and neither are runs that exceeded their budget when it includes a wall-clock time
+    limit (--max_time), since whether such a run is stopped depends on the speed of the
+    machine.
+    """
+    if (result.returncode < 0):
+        return False
+    return not ((result.returncode == BudgetExceeded) and ('--max_time' in shlex.split(runcommand)))
+
+def timeout_result(args, e, stdout=None):
+    """
+    Given the arguments args of a run and the subprocess.TimeoutExpired exception e
+    raised when it was killed, returns the subprocess.CompletedProcess object for the
+    run (with its captured stdout, unless stdout is given), with return code
+    BudgetExceeded.  These results are never cached, since they depend on the speed of
+    the machine.
+    """
+    stderr = (e.stderr or b'') + ('Run timed out after %g seconds\n' % e.timeout).encode()
+    if (stdout is None):
+        stdout = e.stdout or b''
+    return subprocess.CompletedProcess(args, BudgetExceeded, stdout, stderr)
+
+def load_result(key, runcommand):
+    """
+    Returns the subprocess.CompletedProcess object stored in the on-disk cache under
+    the cache key key for the command string runcommand, or None if there is none.
+    """
+    fname = os.path.join(CacheDir, key[:2], key + '.json')
+    if not os.path.isfile(fname):
+        return None
+    with open(fname) as f:
+        cached = json.load(f)
+    return subprocess.CompletedProcess(shlex.split(runcommand), cached['returncode'],
+                                       cached['stdout'].encode('latin-1'),
+                                       cached['stderr'].encode('latin-1'))
+
+def store_result(key, runcommand, result):
+    """
+    Stores the subprocess.CompletedProcess object result for the command string
+    runcommand in the on-disk cache, under the cache key key.
+    """
+    fname = os.path.join(CacheDir, key[:2], key + '.json')
+    os.makedirs(os.path.dirname(fname), exist_ok=True)
+    tmpname = fname + '.' + str(os.getpid()) + '.' + str(threading.get_ident())
+    with open(tmpname, 'w') as f:
+        json.dump({'command': runcommand, 'returncode': result.returncode,
+                   'stdout': result.stdout.decode('latin-1'),
+                   'stderr': result.stderr.decode('latin-1')}, f)
+    os.replace(tmpname, fname)
+
+def run_batch(runcommands, usecache=True, timeout=None):
+    """
+    Given a list of command strings that all run the same executable, this runs them
+    through a single launch of that executable in batch mode (i.e., with "--batch -",
+    reading the options for one test per line from stdin), and returns a list with one
+    subprocess.CompletedProcess object per command, matching what run_command would
+    return for each individual run.
+
+    The stdout and stderr of the executable are split at the marker line that it prints
+    to both after each case, so each case gets its own output.  If usecache is True,
+    commands that are already in the on-disk cache are not rerun, and each completed case
+    is stored in the cache under its own command line.  If the executable terminates
+    before completing every case, the remaining cases are given its return code and the
+    stderr written after the last completed case.
+
+    If timeout is given, then each case may take timeout seconds: if the executable
+    spends longer than that on any one case, it is killed, that case is given the return
+    code BudgetExceeded, and the remaining cases are run in a new batch.
+    """
+    commands = [shlex.split(runcommand) for runcommand in runcommands]
+    results = [None] * len(commands)
+    keys = [None] * len(commands)
+    if (usecache and CacheDir is not None):
+        for i, runcommand in enumerate(runcommands):
+            keys[i] = cache_key(runcommand)
+            if (keys[i] is not None):
+                results[i] = load_result(keys[i], runcommand)
+    pending = [i for i in range(len(commands)) if results[i] is None]
+    if (len(pending) == 0):
+        return results
+
+    # run all pending cases through one launch of the executable, reading its output as
+    # it is written, so that the time spent on each case can be limited separately
+    batchinput = ''.join(shlex.join(commands[i][1:]) + '\n' for i in pending)
+    proc = subprocess.Popen([commands[pending[0]][0], '--batch', '-'], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    lines = queue.Queue()
+    def write_input():
+        try:
+            proc.stdin.write(batchinput.encode())
+            proc.stdin.close()
+        except OSError:
+            pass
+    def read_output():
+        for line in proc.stdout:
+            lines.put(line)
+        lines.put(None)
+    expired = False
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        executor.submit(write_input)
+        executor.submit(read_output)
+        stderr = executor.submit(proc.stderr.read)
+
+        # split the output at the marker printed after each case
+        icase = 0
+        caseout = []
+        completed = []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                line = lines.get(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                proc.kill()
+                expired = True
+                break
+            if (line is None):
+                break
+            if line.startswith(b'-- batch case return code ') and (icase < len(pending)):
+                completed.append((int(line.split()[-1]), b''.join(caseout)))
+                icase += 1
+                caseout = []
+                deadline = None if timeout is None else time.monotonic() + timeout
+            else:
+                caseout.append(line)
+        proc.wait()
+    caseerr = []
+    errlines = []
+    for line in stderr.result().splitlines(keepends=True):
+        if line.startswith(b'-- batch case return code '):
+            caseerr.append(b''.join(errlines))
+            errlines = []
+        else:
+            errlines.append(line)
+    for icase, (returncode, stdout) in enumerate(completed):
+        i = pending[icase]
+        results[i] = subprocess.CompletedProcess(commands[i], returncode, stdout,
+                                                 caseerr[icase] if icase < len(caseerr) else b'')
+        if ((keys[i] is not None) and cacheable(runcommands[i], results[i])):
+            store_result(keys[i], runcommands[i], results[i])
+    icase = len(completed)
+    proc = subprocess.CompletedProcess(proc.args, proc.returncode, b'', b''.join(errlines))
+    if expired and (icase < len(pending)):
+        e = subprocess.TimeoutExpired(proc.args, timeout, stderr=proc.stderr)
+        results[pending[icase]] = timeout_result(commands[pending[icase]], e, b''.join(caseout))
+        rest = pending[icase+1:]
+        if (len(rest) > 0):
+            for i, result in zip(rest, run_batch([runcommands[i] for i in rest], usecache, timeout)):
+                results[i] = result
+        return results
+    for i in pending[icase:]:
+        results[i] = subprocess.CompletedProcess(commands[i], proc.returncode if proc.returncode != 0 else 1,
+                                                 b''.join(caseout) if i == pending[icase] else b'', proc.stderr)
+    return results
+
+def parse_json_stats(stdout):
+    """
+    Given the captured stdout (bytes) from a test executable that was run with
+    "--json_stats 1", this returns the dictionary of final solver statistics stored in
+    its last line, or None if that line is not a valid record.  Non-finite values
+    (which the executables print as null) are returned as NaN.
+    """
+    lines = stdout.rstrip().rsplit(b'\n', 1)
+    try:
+        record = json.loads(lines[-1])
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    return {key: (np.nan if value is None else value) for key, value in record.items()}
+
+def load_step_history(prefix, remove=False):
+    """
+    Given the file prefix passed to a test executable with "--step_history", this loads
+    the binary slow and fast step histories that it wrote, and returns the NumPy arrays
+       T, H, DSM, t, h, dsm
+    holding the start time, step size and local error estimate of each accepted slow
+    step (uppercase) and fast step (lowercase); failed step attempts are not recorded.
+    If remove is True, the files are deleted once they have been read.
+    """
+    histories = []
+    for scale in ['slow', 'fast']:
+        fname = prefix + '_' + scale + '.bin'
+        data = np.fromfile(fname, dtype=np.float64).reshape(-1, 3)
+        histories += [data[:,0], data[:,1], data[:,2]]
+        if (remove):
+            os.remove(fname)
+    return tuple(histories)
+
+def default_workers():
+    """
+    Returns the default number of concurrent runs for a sweep (one per core).
+    """
+    return max(1, os.cpu_count() or 1)
+
+def run_sweep(tasks, nworkers=None, callback=None):
+    """
+    Given a list of tasks:
+       tasks = [(func1, args1), (func2, args2), ...]
+    this executes each func(*args) using a pool of at most nworkers concurrent runs
+    (default: one per core), and returns the list of results in the same order as
+    tasks, i.e., identical to what would be produced by a serial run.
+
+    Since each task just launches a solver executable and waits for it to finish,
+    the pool uses threads; the actual computation runs in the child processes.
+
+    If callback is supplied, then callback(index, result) is called (from the calling
+    thread) as soon as each task finishes, allowing results to be streamed to a table
+    or to disk in the order that they complete.
+    """
+    if (nworkers is None):
+        nworkers = default_workers()
+    if (nworkers < 1):
+        raise ValueError("nworkers must be at least 1")
+
+    results = [None] * len(tasks)
+
+    # run serially if only one worker is requested
+    if (nworkers == 1):
+        for i, (func, args) in enumerate(tasks):
+            results[i] = func(*args)
+            if (callback is not None):
+                callback(i, results[i])
+        return results
+
+    with ThreadPoolExecutor(max_workers=min(nworkers, max(1, len(tasks)))) as executor:
+        futures = {executor.submit(func, *args): i for i, (func, args) in enumerate(tasks)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            if (callback is not None):
+                callback(i, results[i])
+    return results
+
+def task_key(task):
+    """
+    Given a task (func, args), returns a string that uniquely identifies it within a
+    sweep journal.
+    """
+    func, args = task
+    return json.dumps([func.__name__] + list(args))
+
+def read_journal(journal):
+    """
+    Returns a dictionary mapping task keys to results for all records stored in the
+    JSON-lines file journal.  A truncated final record (e.g., from a run that was
+    killed while writing) is ignored.
+    """
+    done = {}
+    if not os.path.isfile(journal):
+        return done
+    with open(journal) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[record['key']] = record['result']
+    return done
+
+def run_journaled_sweep(tasks, journal, resume=False, nworkers=None, keep=None,
+                        batchfunc=None, batchsize=1):
+    """
+    Given a list of tasks (as in run_sweep), this runs them while appending each
+    completed result to the JSON-lines file journal, so that no finished work is lost
+    if the sweep is interrupted.  The returned list of results is assembled from the
+    journal, in the same order as tasks.
+
+    If resume is False, any existing journal is discarded first.  If resume is True,
+    tasks that already have a record in the journal are skipped, allowing a long sweep
+    to be split across several wall-clock-limited jobs.
+
+    If keep is supplied, then only results for which keep(result) is True are written
+    to the journal; this may be used to avoid recording runs that were killed (and
+    should therefore be rerun on resume).
+
+    If batchfunc is supplied and batchsize > 1, then the remaining tasks are split into
+    groups of (at most) batchsize consecutive tasks, and each group is run with a single
+    call batchfunc(group), which must return the list of results for the tasks in group.
+    """
+    if (not resume) and os.path.isfile(journal):
+        os.remove(journal)
+    done = read_journal(journal)
+    keys = [task_key(task) for task in tasks]
+    pending = [i for i, key in enumerate(keys) if key not in done]
+    if (resume):
+        print("Resuming %s: %d of %d runs already complete" % (journal, len(tasks)-len(pending), len(tasks)))
+
+    def record(i, result):
+        done[keys[i]] = result
+        if (keep is not None) and (not keep(result)):
+            return
+        with open(journal, 'a') as f:
+            f.write(json.dumps({'key': keys[i], 'result': result}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    if (batchfunc is not None) and (batchsize > 1):
+        groups = [pending[j:j+batchsize] for j in range(0, len(pending), batchsize)]
+        def record_group(j, results):
+            for i, result in zip(groups[j], results):
+                record(i, result)
+        run_sweep([(batchfunc, ([tasks[i] for i in group],)) for group in groups], nworkers, callback=record_group)
+    else:
+        run_sweep([tasks[i] for i in pending], nworkers, callback=lambda j, result: record(pending[j], result))
+    return [done[key] for key in keys]
+
+def expand_sweep(spec):
+    """
+    Given a declarative sweep specification, i.e., a dictionary
+       spec = {'params': {name1: value1, ...},           # fixed parameters
+               'axes':   [(name1, values1), ...],         # swept parameters, outermost first
+               'rules':  [(name1, func1), ...]}           # derived parameters
+    this returns a generator over the run descriptors of the sweep: one dictionary
+    holding the value of every parameter for each combination of the axis values, in
+    the same order as nested loops over the axes.  An axis name may also be a tuple of
+    names, in which case each of its values is a tuple holding the values of these
+    parameters (e.g., a method name and its order).  The rules are then applied in
+    order, setting run[name] = func(run), and may be used to derive parameters (e.g.,
+    the executable) from the others.  Since the runs are generated lazily, a sweep may
+    be counted, filtered or sharded (see select_runs) without being built in full.
+    """
+    def expand(run, axes):
+        if (len(axes) == 0):
+            run = dict(run)
+            for name, func in spec.get('rules', []):
+                run[name] = func(run)
+            yield run
+            return
+        name, values = axes[0]
+        for value in values:
+            if isinstance(name, tuple):
+                run.update(zip(name, value))
+            else:
+                run[name] = value
+            yield from expand(run, axes[1:])
+    return expand(dict(spec.get('params', {})), list(spec.get('axes', [])))
+
+def parse_filters(filters):
+    """
+    Given a list of strings of the form 'name=value1,value2,...' (e.g., from the
+    command line), returns the dictionary of filters {name: [value1, value2, ...]} for
+    select_runs.
+    """
+    parsed = {}
+    for txt in filters or []:
+        name, sep, values = txt.partition('=')
+        if (not sep) or (not name):
+            raise ValueError("filter '%s' is not of the form name=value1,value2,..." % txt)
+        parsed.setdefault(name, []).extend(values.split(','))
+    return parsed
+
+def match_value(value, allowed):
+    """
+    Returns True if the parameter value matches one of the strings in allowed; numeric
+    values are compared numerically (so that, e.g., '1e-5' matches 1.e-5).
+    """
+    for txt in allowed:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            try:
+                if (float(txt) == value):
+                    return True
+            except ValueError:
+                pass
+        elif (str(value) == txt):
+            return True
+    return False
+
+def select_runs(runs, filters=None, shard=None, shardby=None):
+    """
+    Given an iterable of run descriptors (e.g., from expand_sweep), returns a generator
+    over the runs that match every filter in filters (a dictionary {name: [values]},
+    see parse_filters), and that belong to shard = (index, count), i.e., shard index of
+    count (counting from 0).  Runs are assigned to shards round-robin by the values of
+    the parameters in shardby (default: each run separately), so that, e.g., all of the
+    tolerances for a method/controller pair may be kept together on one shard.
+    """
+    if (shard is not None) and not (0 <= shard[0] < shard[1]):
+        raise ValueError("shard index %d is not in [0, %d)" % shard)
+    groups = {}
+    for run in runs:
+        if (filters is not None) and not all((name in run) and match_value(run[name], values)
+                                             for name, values in filters.items()):
+            continue
+        if (shard is not None):
+            group = tuple(run[name] for name in shardby) if (shardby is not None) else len(groups)
+            igroup = groups.setdefault(group, len(groups))
+            if (igroup % shard[1] != shard[0]):
+                continue
+        yield run
+
+def estimate_cost(tasks, journal, cost, group=None):
+    """
+    Given a list of tasks (as in run_sweep) and the JSON-lines journal of a previous
+    sweep, this estimates the total cost of running tasks, where cost(result) returns
+    the cost of a recorded result (or None if it is unknown, e.g., for a failed run).
+    Tasks that are recorded in journal use their recorded cost, while the others use
+    the average cost of the recorded tasks with the same group(task) (if group is
+    supplied), or of all recorded tasks.  Returns the estimated total cost and the
+    number of tasks already recorded in journal, or None for the cost if journal holds
+    no usable records.
+    """
+    done = read_journal(journal)
+    known = {}
+    for task in tasks:
+        key = task_key(task)
+        if key in done:
+            known[key] = cost(done[key])
+    samples = []
+    groupsamples = {}
+    for task in tasks:
+        c = known.get(task_key(task))
+        if (c is not None):
+            samples.append(c)
+            if (group is not None):
+                groupsamples.setdefault(group(task), []).append(c)
+    if (len(samples) == 0):
+        return None, len(known)
+    total = 0.0
+    for task in tasks:
+        c = known.get(task_key(task))
+        if (c is None):
+            g = group(task) if (group is not None) else None
+            c = np.mean(groupsamples.get(g, samples))
+        total += float(c)
+    return total, len(known)
+
+def work_at_errors(errors, works, targets):
+    """
+    Given arrays holding the errors and works of the runs on one work-precision curve,
+    this returns the work needed to attain each of the target errors in targets,
+    interpolated in log-log space.  Targets below the smallest error attained on the
+    curve are assigned infinite work.
+    """
+    order = np.argsort(errors)
+    logwork = np.interp(np.log10(targets), np.log10(errors[order]), np.log10(works[order]))
+    return np.where(np.less(targets, np.min(errors)), np.inf, 10**logwork)
+
+def average_ranks(curves, errorwindow=[1e-6,1e-2], nerr=20):
+    """
+    Given a list of work-precision curves [(errors1, works1), (errors2, works2), ...],
+    this ranks the curves (1 = least work, with ties sharing the lowest rank) at each of
+    nerr logarithmically-spaced target errors spanning errorwindow, as is done by
+    compare_efficiency in plot_utilities_paper.py.  Curves without any runs rank last.
+    Returns the target errors, the (curves x targets) array of ranks, and the array of
+    average ranks.
+    """
+    targets = np.logspace(np.log10(errorwindow[0]), np.log10(errorwindow[1]), nerr)
+    work = np.full((len(curves), nerr), np.inf)
+    for i, (errors, works) in enumerate(curves):
+        if (len(errors) > 0):
+            work[i,:] = work_at_errors(errors, works, targets)
+    ranks = 1 + np.sum(work[np.newaxis,:,:] < work[:,np.newaxis,:], axis=1)
+    return targets, ranks, np.mean(ranks, axis=1)
+
+def curve_key(args, irtol):
+    """
+    Given the arguments of a task that hold a relative tolerance in position irtol,
+    returns the key of its work-precision curve (all arguments except rtol).
+    """
+    return tuple(arg for i, arg in enumerate(args) if i != irtol)
+
+def collect_curves(tasks, results, irtol, ipair):
+    """
+    Given the lists of tasks (as in run_sweep) and results of a work-precision sweep,
+    where each task's arguments hold its relative tolerance in position irtol and
+    identify its method/controller pair in the positions ipair, this returns the
+    dictionary holding the runs [(rtol, task, result), ...] of each curve (keyed on
+    curve_key), ordered by decreasing rtol, and the dictionary holding the list of
+    curves in each group of curves that share the same problem parameters.
+    """
+    curves = {}
+    groups = {}
+    for task, result in zip(tasks, results):
+        args = task[1]
+        curve = curve_key(args, irtol)
+        group = tuple(arg for i, arg in enumerate(args) if (i != irtol) and (i not in ipair))
+        curves.setdefault(curve, []).append((args[irtol], task, result))
+        groups.setdefault(group, [])
+        if curve not in groups[group]:
+            groups[group].append(curve)
+    for runs in curves.values():
+        runs.sort(key=lambda run: -run[0])
+    return curves, groups
+
+def run_passed(result):
+    """
+    Returns True if the run with statistics result completed successfully.
+    """
+    return result['ReturnCode'] == 0
+
+def run_error(run):
+    """
+    Given a run (rtol, task, result) from collect_curves, returns its error Accuracy*rtol.
+    """
+    return run[2]['Accuracy'] * run[0]
+
+def curve_data(curves, members, work):
+    """
+    Given the curves from collect_curves, a list of curve keys members, and a function
+    work that returns the work of a result, this returns the list of work-precision
+    curves [(errors1, works1), ...] (as in average_ranks) of the successful runs of
+    each member.
+    """
+    data = []
+    for curve in members:
+        runs = [run for run in curves[curve] if run_passed(run[2])]
+        data.append((np.array([run_error(run) for run in runs]),
+                     np.array([work(run[2]) for run in runs], dtype=float)))
+    return data
+
+def refine_rtols(tasks, results, irtol, ipair, works, errorwindow=[1e-6,1e-2], nerr=20,
+                 toprank=15, maxgap=1.0, minratio=10**0.25):
+    """
+    Given the lists of tasks (as in run_sweep) and results (dictionaries holding
+    'ReturnCode' and 'Accuracy') of a work-precision sweep, where each task's arguments
+    hold its relative tolerance in position irtol, this proposes new tolerances for
+    each curve, i.e., for each set of tasks that differ only in rtol.  Curves are
+    compared against others with the same problem parameters (all arguments except
+    rtol and those in positions ipair, which identify the method/controller pair).
+
+    The errors (Accuracy*rtol) of each curve are compared against each of the work
+    measures in works, a list of functions that return the work of a result.  An
+    interval between two consecutive tolerances of a curve is bisected (in log space)
+    if exactly one of its two runs failed, if the error or any work measure changes by
+    more than maxgap decades across it, or if it holds an error where the curve's rank
+    (see average_ranks) changes while the curve is among the toprank best; intervals
+    are never split into pieces narrower than a factor of minratio.
+
+    Returns the list of new tasks, along with the ordering of the curves in each group
+    by average rank for each work measure (if this does not change between calls, then
+    the rankings have converged).
+    """
+    curves, groups = collect_curves(tasks, results, irtol, ipair)
+
+    # flag intervals that bracket a failure or that span too large a gap
+    refine = {curve: set() for curve in curves}
+    for curve, runs in curves.items():
+        for i in range(len(runs)-1):
+            a, b = runs[i], runs[i+1]
+            if (run_passed(a[2]) != run_passed(b[2])):
+                refine[curve].add(i)
+            elif run_passed(a[2]):
+                gaps = [abs(np.log10(run_error(a)) - np.log10(run_error(b)))]
+                gaps += [abs(np.log10(work(b[2])) - np.log10(work(a[2]))) for work in works]
+                if (max(gaps) > maxgap):
+                    refine[curve].add(i)
+
+    # flag intervals where the rankings of the best curves in each group change
+    rankings = {}
+    for group, members in groups.items():
+        for iwork, work in enumerate(works):
+            data = curve_data(curves, members, work)
+            targets, ranks, avgranks = average_ranks(data, errorwindow, nerr)
+            rankings[(group, iwork)] = tuple(members[i] for i in np.argsort(avgranks, kind='stable'))
+            for k, curve in enumerate(members):
+                changes = np.nonzero((ranks[k,1:] != ranks[k,:-1]) &
+                                     (np.minimum(ranks[k,1:], ranks[k,:-1]) <= toprank))[0]
+                runs = curves[curve]
+                for j in changes:
+                    for i in range(len(runs)-1):
+                        if run_passed(runs[i][2]) and run_passed(runs[i+1][2]):
+                            lo, hi = sorted([run_error(runs[i]), run_error(runs[i+1])])
+                            if (lo <= targets[j+1]) and (targets[j] <= hi):
+                                refine[curve].add(i)
+
+    # create tasks for the midpoints of all flagged intervals that may still be split
+    newtasks = []
+    for curve, runs in curves.items():
+        for i in sorted(refine[curve]):
+            if (runs[i][0] / runs[i+1][0] >= minratio**2):
+                rtol = float('%.3g' % np.sqrt(runs[i][0] * runs[i+1][0]))
+                func, args = runs[i][1]
+                newtasks.append((func, args[:irtol] + (rtol,) + args[irtol+1:]))
+    return newtasks, rankings
+
+def prune_curves(tasks, results, irtol, ipair, works, keep=0.5, minkeep=1, nerr=20):
+    """
+    Given the lists of tasks and results of a work-precision sweep (as in refine_rtols),
+    this ranks the curves in each group by their average rank (see average_ranks) over
+    the errors spanned by the successful runs of the group, averaged over each of the
+    work measures in works.  The best ceil(keep*N) of the N curves in each group, but at
+    least minkeep of them, are retained.  Returns the set of keys of the retained curves.
+    """
+    curves, groups = collect_curves(tasks, results, irtol, ipair)
+    retained = set()
+    for members in groups.values():
+        nkeep = min(len(members), max(minkeep, int(np.ceil(keep*len(members)))))
+        errors = [run_error(run) for curve in members for run in curves[curve] if run_passed(run[2])]
+        if (len(errors) == 0) or (nkeep == len(members)):
+            retained.update(members)
+            continue
+        avgrank = np.zeros(len(members))
+        for work in works:
+            data = curve_data(curves, members, work)
+            avgrank += average_ranks(data, [min(errors), max(errors)], nerr)[2] / len(works)
+        retained.update(members[i] for i in np.argsort(avgrank, kind='stable')[:nkeep])
+    return retained
+
+def rtol_order(tasks, irtol):
+    """
+    Given a list of tasks whose arguments hold a relative tolerance in position irtol,
+    returns the indices of the tasks sorted by decreasing rtol, keeping the original
+    order of tasks with equal rtol.
+    """
+    return sorted(range(len(tasks)), key=lambda i: -tasks[i][1][irtol])
@@ -96,6 +96,34 @@
  *     MRIHTol controllers: use htol_relch, htol_minfac, htol_maxfac.
  *     all controllers (fast and slow) use bias.
  *     ** if any one of a relevant set are "-1" then the defaults are used
+ * - print final statistics as a single-line JSON record:  json_stats
+ *      [default 0]
+ * - only print the final statistics (no problem description or
+ *   solution table):  quiet [default 0]
+ * - stored reference trajectory:  ref_file [default none]
+ *      If supplied, errors are measured against a dense reference
+ *      trajectory read from this file (it is computed and written first
+ *      if the file does not exist), instead of resetting the reference
+ *      solver to the current solution after every step.  Note that the
+ *      stored trajectory measures global, not local, errors.
+ * - maximum reference step size when computing ref_file:  ref_hmax
+ *      [default 0, i.e., unlimited]
+ * - record step histories:  step_history [default none]
+ *      If supplied, the time, step size and local error estimate of
+ *      every slow and fast step are written to the binary files
+ *      <step_history>_slow.bin and <step_history>_fast.bin (see
+ *      step_history.hpp).
+ * - run budget:  max_slow_steps, max_fast_steps, max_rhs_evals, max_time
+ *      [default 0, i.e., unlimited]
+ *      Tests that exceed any of these limits on the numbers of slow and
+ *      fast steps, total RHS evaluations, or wall-clock seconds are
+ *      stopped early, returning the flag BUDGET_EXCEEDED (2).
+ *
+ * Alternatively, a sequence of tests may be run within a single process
+ * with the option "--batch <file>", where each line of <file> ("-" for
+ * stdin) holds the options for one test.  After each test, the line
+ * "-- batch case return code <flag>" is printed to both stdout and
+ * stderr.
  *
  * Outputs and solution error values are printed at equal intervals
  * of 0.5 and run statistics are printed at the end.
@@ -121,6 +149,8 @@
 #include <sunlinsol/sunlinsol_dense.h> // dense linear solver
 #include <sunmatrix/sunmatrix_dense.h> // dense matrix type, fcts., macros
 #include <sundials/sundials_logger.h>
+#include <reference_trajectory.hpp>    // stored reference solution
+#include <step_history.hpp>            // step history recording
 #include <test_utilities.hpp>          // common utility functions
 
 #if defined(SUNDIALS_EXTENDED_PRECISION)
@@ -176,6 +206,24 @@ struct Options
   sunrealtype htol_minfac = SUN_RCONST(-1.0);
   sunrealtype htol_maxfac = SUN_RCONST(-1.0);
   sunrealtype slow_safety = SUN_RCONST(-1.0);
+
+  // Output options
+  int json_stats = 0;
+  int quiet      = 0;
+
+  // Reference solution options
+  std::string ref_file = "";
+  sunrealtype ref_hmax = SUN_RCONST(0.0);
+
+  // Step history options
+  std::string step_history  = "";
+  StepHistory* slow_history = NULL; // set up in RunTest
+  StepHistory* fast_history = NULL; // set up in RunTest
+
+  // Run budget
+  RunBudget budget;
+  void* slow_mem = NULL; // set up in RunTest
+  void* fast_mem = NULL; // set up in RunTest
 };
 
 // User-supplied functions called by the solver
@@ -191,8 +239,12 @@ static int Jsi(sunrealtype t, N_Vector y, N_Vector fy, SUNMatrix J,
                void* user_data, N_Vector tmp1, N_Vector tmp2, N_Vector tmp3);
 static int Jn(sunrealtype t, N_Vector y, N_Vector fy, SUNMatrix J,
               void* user_data, N_Vector tmp1, N_Vector tmp2, N_Vector tmp3);
+static int RecordSlowStep(sunrealtype t, N_Vector y, void* user_data);
+static int RecordFastStep(sunrealtype t, N_Vector y, void* user_data);
+static int CheckBudget(Options* opts, bool& exceeded);
 
 // Utility functions
+static int RunTest(std::vector<std::string>& args);
 static void InputHelp();
 static int ReadInputs(std::vector<std::string>& args, Options& opts,
                       SUNContext ctx);
@@ -209,13 +261,91 @@ static int Ytrue(sunrealtype t, N_Vector y, Options* opts);
 // Main Program
 int main(int argc, char* argv[])
 {
+  std::vector<std::string> args(argv + 1, argv + argc);
+
+  // Run a single test, or a batch of tests if a batch file is supplied
+  std::string batch_file = "";
+  find_arg(args, "--batch", batch_file);
+  if (batch_file.empty()) { return RunTest(args); }
+  return RunBatch(batch_file, RunTest);
+}
+
+// Memory allocated by a single test.  RunTest holds this in one object, so that
+// it is freed on every return (including failed runs and runs that exceed their
+// budget), since batch and library runs execute many tests in one process.
+struct TestMemory
+{
+  SUNLogger logger                  = NULL;
+  N_Vector y                        = NULL;
+  N_Vector yref                     = NULL;
+  void* arkode_ref                  = NULL;
+  SUNAdaptController fcontrol       = NULL;
+  void* inner_arkode_mem            = NULL;
+  MRIStepInnerStepper inner_stepper = NULL;
+  SUNAdaptController scontrol       = NULL;
+  SUNAdaptController scontrol_H     = NULL;
+  SUNAdaptController scontrol_Tol   = NULL;
+  void* arkode_mem                  = NULL;
+  MRIStepCoupling C                 = NULL;
+  SUNMatrix As                      = NULL;
+  SUNLinearSolver LSs               = NULL;
+  StepHistory fast_history;
+  StepHistory slow_history;
+
+  ~TestMemory()
+  {
+    if (y) { N_VDestroy(y); }
+    StepHistoryFree(slow_history);
+    StepHistoryFree(fast_history);
+    if (yref) { N_VDestroy(yref); }
+    if (C) { MRIStepCoupling_Free(C); }
+    if (As) { SUNMatDestroy(As); }
+    if (LSs) { SUNLinSolFree(LSs); }
+    if (scontrol) { SUNAdaptController_Destroy(scontrol); }
+    if (scontrol_H) { SUNAdaptController_Destroy(scontrol_H); }
+    if (scontrol_Tol) { SUNAdaptController_Destroy(scontrol_Tol); }
+    if (fcontrol) { SUNAdaptController_Destroy(fcontrol); }
+    ARKodeFree(&inner_arkode_mem);            // Free fast integrator memory
+    MRIStepInnerStepper_Free(&inner_stepper); // Free inner stepper structure
+    ARKodeFree(&arkode_mem);                  // Free slow integrator memory
+    ARKodeFree(&arkode_ref);                  // Free reference solver memory
+    if (logger) { SUNLogger_Destroy(&logger); }
+  }
+};
+
+// Run a single test with the given command-line options
+static int RunTest(std::vector<std::string>& args)
+{
+  // Resource usage at the start of the test, and timers for the integrator
+  // and the reference solution
+  RunUsage run_start = GetRunUsage();
+  WallTimer evolve_timer, ref_timer;
+
   // SUNDIALS context objects
   sundials::Context sunctx;  // main solver
   sundials::Context refctx;  // reference solver
 
+  // Memory allocated by the test (freed when mem goes out of scope)
+  TestMemory mem;
+  SUNLogger& logger                  = mem.logger;
+  N_Vector& y                        = mem.y;
+  N_Vector& yref                     = mem.yref;
+  void*& arkode_ref                  = mem.arkode_ref;
+  SUNAdaptController& fcontrol       = mem.fcontrol;
+  void*& inner_arkode_mem            = mem.inner_arkode_mem;
+  StepHistory& fast_history          = mem.fast_history;
+  MRIStepInnerStepper& inner_stepper = mem.inner_stepper;
+  SUNAdaptController& scontrol       = mem.scontrol;
+  SUNAdaptController& scontrol_H     = mem.scontrol_H;
+  SUNAdaptController& scontrol_Tol   = mem.scontrol_Tol;
+  void*& arkode_mem                  = mem.arkode_mem;
+  MRIStepCoupling& C                 = mem.C;
+  SUNMatrix& As                      = mem.As;
+  SUNLinearSolver& LSs               = mem.LSs;
+  StepHistory& slow_history          = mem.slow_history;
+
   // Read input options
   Options opts;
-  std::vector<std::string> args(argv + 1, argv + argc);
   int flag = ReadInputs(args, opts, sunctx);
   if (check_flag(flag, "ReadInputs")) return 1;
 
@@ -255,24 +385,26 @@ int main(int argc, char* argv[])
     f_si         = (opts.fast_order == 0) ? fn : fsi;
     J_s          = (opts.fast_order == 0) ? Jn : Jsi;
   }
-  std::cout << "\nAdaptive multirate nonlinear Kvaerno-Prothero-Robinson test "
-               "problem:\n";
-  std::cout << "    time domain:  (" << T0 << "," << Tf << "]\n";
-  std::cout << "    G = " << opts.G << std::endl;
-  std::cout << "    w = " << opts.w << std::endl;
-  std::cout << "    es = " << opts.es << std::endl;
-  std::cout << "    ef = " << opts.ef << std::endl;
-  std::cout << "\n  Slow integrator: " << opts.mri_method;
-  if (slowimex) { std::cout << " (ImEx)" << std::endl; }
-  else if (slowimplicit) { std::cout << " (implicit)" << std::endl; }
-  else { std::cout << " (explicit)" << std::endl; }
-  PrintSlowAdaptivity(opts);
-  if (opts.fast_order == 0) { std::cout << "\n  Fast integrator disabled"; }
-  else { std::cout << "\n  Fast order " << opts.fast_order << std::endl; }
-  PrintFastAdaptivity(opts);
+  if (!opts.quiet)
+  {
+    std::cout << "\nAdaptive multirate nonlinear Kvaerno-Prothero-Robinson "
+                 "test problem:\n";
+    std::cout << "    time domain:  (" << T0 << "," << Tf << "]\n";
+    std::cout << "    G = " << opts.G << std::endl;
+    std::cout << "    w = " << opts.w << std::endl;
+    std::cout << "    es = " << opts.es << std::endl;
+    std::cout << "    ef = " << opts.ef << std::endl;
+    std::cout << "\n  Slow integrator: " << opts.mri_method;
+    if (slowimex) { std::cout << " (ImEx)" << std::endl; }
+    else if (slowimplicit) { std::cout << " (implicit)" << std::endl; }
+    else { std::cout << " (explicit)" << std::endl; }
+    PrintSlowAdaptivity(opts);
+    if (opts.fast_order == 0) { std::cout << "\n  Fast integrator disabled"; }
+    else { std::cout << "\n  Fast order " << opts.fast_order << std::endl; }
+    PrintFastAdaptivity(opts);
+  }
 
   // If SUNLogger is enabled, manually disable it for the reference solver
-  SUNLogger logger = NULL;
   retval = SUNLogger_Create(SUN_COMM_NULL, 0, &logger);
   retval = SUNContext_SetLogger(refctx, logger);
   retval = SUNLogger_SetErrorFilename(logger, "/dev/null");
@@ -281,9 +413,9 @@ int main(int argc, char* argv[])
   retval = SUNLogger_SetDebugFilename(logger, "/dev/null");
 
   // Create and initialize serial vectors for the solution and reference
-  N_Vector y = N_VNew_Serial(NEQ, sunctx);
+  y = N_VNew_Serial(NEQ, sunctx);
   if (check_ptr((void*)y, "N_VNew_Serial")) return 1;
-  N_Vector yref = N_VNew_Serial(NEQ, refctx);
+  yref = N_VNew_Serial(NEQ, refctx);
   if (check_ptr((void*)yref, "N_VNew_Serial")) return 1;
 
   // Set initial conditions
@@ -292,19 +424,44 @@ int main(int argc, char* argv[])
   N_VScale(ONE, y, yref);
 
   // Create and configure reference solver object
-  void* arkode_ref = ERKStepCreate(fn, T0, yref, refctx);
+  const sunrealtype ref_rtol = SUN_RCONST(1.e-10);
+  const sunrealtype ref_atol = SUN_RCONST(1.e-12);
+  arkode_ref = ERKStepCreate(fn, T0, yref, refctx);
   if (check_ptr((void*)arkode_ref, "ERKStepCreate")) return 1;
   retval = ARKodeSetUserData(arkode_ref, (void*)&opts);
   if (check_flag(retval, "ARKodeSetUserData")) return 1;
   retval = ARKodeSetOrder(arkode_ref, 5);
   if (check_flag(retval, "ARKodeSetOrder")) return 1;
-  retval = ARKodeSStolerances(arkode_ref, SUN_RCONST(1.e-10), SUN_RCONST(1.e-12));
+  retval = ARKodeSStolerances(arkode_ref, ref_rtol, ref_atol);
   if (check_flag(retval, "ARKodeSStolerances")) return 1;
   retval = ARKodeSetMaxNumSteps(arkode_ref, 10000000);
   if (check_flag(retval, "ARKodeSetMaxNumSteps")) return (1);
 
+  // Read (or compute and store) the reference trajectory, if requested
+  RefTrajectory reftraj;
+  reftraj.hmax = opts.ref_hmax;
+  reftraj.rtol = ref_rtol;
+  reftraj.atol = ref_atol;
+  if (!opts.ref_file.empty() && (RefRead(reftraj, opts.ref_file) != 0))
+  {
+    if (opts.ref_hmax > ZERO)
+    {
+      retval = ARKodeSetMaxStep(arkode_ref, opts.ref_hmax);
+      if (check_flag(retval, "ARKodeSetMaxStep")) return 1;
+    }
+    N_Vector ftmp = N_VClone(yref);
+    if (check_ptr((void*)ftmp, "N_VClone")) return 1;
+    TimerStart(ref_timer);
+    retval = RefCompute(reftraj, arkode_ref, fn, (void*)&opts, T0, Tf, yref,
+                        ftmp);
+    TimerStop(ref_timer);
+    N_VDestroy(ftmp);
+    if (check_flag(retval, "RefCompute")) return 1;
+    retval = RefWrite(reftraj, opts.ref_file);
+    if (check_flag(retval, "RefWrite")) return 1;
+  }
+
   // Create and configure fast controller object
-  SUNAdaptController fcontrol = NULL;
   switch (opts.fcontrol)
   {
   case (1):
@@ -365,8 +522,7 @@ int main(int argc, char* argv[])
   }
 
   // Create ERKStep (fast) integrator
-  void* inner_arkode_mem = NULL; // ARKode memory structure
-  inner_arkode_mem       = ERKStepCreate(f_f, T0, y, sunctx);
+  inner_arkode_mem = ERKStepCreate(f_f, T0, y, sunctx);
   if (check_ptr((void*)inner_arkode_mem, "ERKStepCreate")) return 1;
   retval = ARKodeSetOrder(inner_arkode_mem, opts.fast_order);
   if (check_flag(retval, "ARKodeSetOrder")) return 1;
@@ -398,16 +554,23 @@ int main(int argc, char* argv[])
   if (check_flag(retval, "ARKodeSetMaxNumSteps")) return 1;
   retval = ARKodeSetUserData(inner_arkode_mem, (void*)&opts);
   if (check_flag(retval, "ARKodeSetUserData")) return 1;
+  if (!opts.step_history.empty())
+  {
+    retval = StepHistoryInit(fast_history, inner_arkode_mem, y);
+    if (check_flag(retval, "StepHistoryInit")) return 1;
+    opts.fast_history = &fast_history;
+  }
+  if (!opts.step_history.empty() || BudgetActive(opts.budget))
+  {
+    retval = ARKodeSetPostprocessStepFn(inner_arkode_mem, RecordFastStep);
+    if (check_flag(retval, "ARKodeSetPostprocessStepFn")) return 1;
+  }
 
   // Create inner stepper
-  MRIStepInnerStepper inner_stepper = NULL; // inner stepper
   retval = ERKStepCreateMRIStepInnerStepper(inner_arkode_mem, &inner_stepper);
   if (check_flag(retval, "ERKStepCreateMRIStepInnerStepper")) return 1;
 
   // Create slow controller object, and select orders of accuracy as relevant
-  SUNAdaptController scontrol     = NULL;
-  SUNAdaptController scontrol_H   = NULL;
-  SUNAdaptController scontrol_Tol = NULL;
   switch (opts.scontrol)
   {
   case (1):
@@ -667,15 +830,12 @@ int main(int argc, char* argv[])
   }
 
   // Create MRI (slow) integrator
-  void* arkode_mem = NULL; // ARKode memory structure
-  arkode_mem       = MRIStepCreate(f_se, f_si, T0, y, inner_stepper, sunctx);
+  arkode_mem = MRIStepCreate(f_se, f_si, T0, y, inner_stepper, sunctx);
   if (check_ptr((void*)arkode_mem, "MRIStepCreate")) return 1;
-  MRIStepCoupling C = MRIStepCoupling_LoadTableByName((opts.mri_method).c_str());
+  C = MRIStepCoupling_LoadTableByName((opts.mri_method).c_str());
   if (check_ptr((void*)C, "MRIStepCoupling_LoadTableByName")) return 1;
   retval = MRIStepSetCoupling(arkode_mem, C);
   if (check_flag(retval, "MRIStepSetCoupling")) return 1;
-  SUNMatrix As        = NULL; // matrix for slow solver
-  SUNLinearSolver LSs = NULL; // slow linear solver object
   if (slowimplicit)
   {
     As = SUNDenseMatrix(NEQ, NEQ, sunctx);
@@ -693,6 +853,14 @@ int main(int argc, char* argv[])
   if (check_flag(retval, "ARKodeSetMaxNumSteps")) return 1;
   retval = ARKodeSetUserData(arkode_mem, (void*)&opts);
   if (check_flag(retval, "ARKodeSetUserData")) return 1;
+  if (!opts.step_history.empty())
+  {
+    retval = StepHistoryInit(slow_history, arkode_mem, y);
+    if (check_flag(retval, "StepHistoryInit")) return 1;
+    opts.slow_history = &slow_history;
+    retval = ARKodeSetPostprocessStepFn(arkode_mem, RecordSlowStep);
+    if (check_flag(retval, "ARKodeSetPostprocessStepFn")) return 1;
+  }
   if (opts.scontrol != 0)
   {
     retval = MRIStepSetAdaptController(arkode_mem, scontrol);
@@ -723,6 +891,11 @@ int main(int argc, char* argv[])
   // Integrate ODE
   //
 
+  // Start the run budget
+  opts.slow_mem = arkode_mem;
+  opts.fast_mem = inner_arkode_mem;
+  BudgetStart(opts.budget);
+
   // Main time-stepping loop: calls ARKodeEvolve to perform the
   // integration, then prints results. Stops when the final time
   // has been reached
@@ -732,36 +905,58 @@ int main(int argc, char* argv[])
   sunrealtype tout  = T0 + dTout;
   sunrealtype u, v, uerr, verr, uerrtot, verrtot, errtot, accuracy;
   uerr = verr = uerrtot = verrtot = errtot = accuracy = ZERO;
-  printf("        t           u           v       uerr      verr\n");
-  printf("   ------------------------------------------------------\n");
-  printf("  %10.6" FSYM "  %10.6" FSYM "  %10.6" FSYM "  %.2" ESYM "  %.2" ESYM
-         "\n",
-         t, NV_Ith_S(y, 0), NV_Ith_S(y, 1), uerr, verr);
+  if (!opts.quiet)
+  {
+    printf("        t           u           v       uerr      verr\n");
+    printf("   ------------------------------------------------------\n");
+    printf("  %10.6" FSYM "  %10.6" FSYM "  %10.6" FSYM "  %.2" ESYM
+           "  %.2" ESYM "\n",
+           t, NV_Ith_S(y, 0), NV_Ith_S(y, 1), uerr, verr);
+  }
   int Nout = 0;
   while (Tf - t > 1.0e-8)
   {
     // reset reference solver so that it begins with identical state
-    retval = ARKodeReset(arkode_ref, t, y);
+    TimerStart(ref_timer);
+    if (opts.ref_file.empty()) { retval = ARKodeReset(arkode_ref, t, y); }
+    TimerStop(ref_timer);
 
     // evolve solution in one-step mode
     retval = ARKodeSetStopTime(arkode_mem, tout);
     if (check_flag(retval, "ARKodeSetStopTime")) return 1;
+    TimerStart(evolve_timer);
     retval = ARKodeEvolve(arkode_mem, tout, y, &t, ARK_ONE_STEP);
+    TimerStop(evolve_timer);
     if (retval < 0)
     {
+      if (opts.budget.exceeded) return BUDGET_EXCEEDED;
       printf("ARKodeEvolve error (%i)\n", retval);
       return 1;
     }
-
-    // evolve reference solver to same time in "normal" mode
-    retval = ARKodeSetStopTime(arkode_ref, t);
-    if (check_flag(retval, "ARKodeSetStopTime")) return 1;
-    retval = ARKodeEvolve(arkode_ref, t, yref, &t2, ARK_NORMAL);
-    if (retval < 0)
+    bool exceeded;
+    if (CheckBudget(&opts, exceeded)) return 1;
+    if (exceeded) return BUDGET_EXCEEDED;
+
+    // evolve reference solver to same time in "normal" mode, or evaluate
+    // the stored reference trajectory there
+    TimerStart(ref_timer);
+    if (opts.ref_file.empty())
     {
-      printf("ARKodeEvolve reference solution error (%i)\n", retval);
-      return 1;
+      retval = ARKodeSetStopTime(arkode_ref, t);
+      if (check_flag(retval, "ARKodeSetStopTime")) return 1;
+      retval = ARKodeEvolve(arkode_ref, t, yref, &t2, ARK_NORMAL);
+      if (retval < 0)
+      {
+        printf("ARKodeEvolve reference solution error (%i)\n", retval);
+        return 1;
+      }
+    }
+    else
+    {
+      retval = RefEvaluate(reftraj, t, yref);
+      if (check_flag(retval, "RefEvaluate")) return 1;
     }
+    TimerStop(ref_timer);
 
     // access/print solution and error
     u    = NV_Ith_S(y, 0);
@@ -782,15 +977,30 @@ int main(int argc, char* argv[])
     {
       tout += dTout;
       tout = (tout > Tf) ? Tf : tout;
-      printf("  %10.6" FSYM "  %10.6" FSYM "  %10.6" FSYM "  %.2" ESYM
-             "  %.2" ESYM "\n",
-             t, u, v, uerr, verr);
+      if (!opts.quiet)
+      {
+        printf("  %10.6" FSYM "  %10.6" FSYM "  %10.6" FSYM "  %.2" ESYM
+               "  %.2" ESYM "\n",
+               t, u, v, uerr, verr);
+      }
     }
   }
   uerrtot = SUNRsqrt(uerrtot / Nt);
   verrtot = SUNRsqrt(verrtot / Nt);
   errtot  = SUNRsqrt(errtot / Nt / 2);
-  printf("   ------------------------------------------------------\n");
+  if (!opts.quiet)
+  {
+    printf("   ------------------------------------------------------\n");
+  }
+
+  // Write step histories
+  if (!opts.step_history.empty())
+  {
+    retval = StepHistoryWrite(slow_history, opts.step_history + "_slow.bin");
+    if (check_flag(retval, "StepHistoryWrite")) return 1;
+    retval = StepHistoryWrite(fast_history, opts.step_history + "_fast.bin");
+    if (check_flag(retval, "StepHistoryWrite")) return 1;
+  }
 
   //
   // Finalize
@@ -819,16 +1029,40 @@ int main(int argc, char* argv[])
   check_flag(retval, "ERKStepGetNumRhsEvals");
 
   // Print some final statistics
-  std::cout << "\nFinal Solver Statistics:\n";
-  std::cout << "   Slow steps = " << nsts << "  (attempts = " << natts
-            << ",  fails = " << netfs << ")\n";
-  std::cout << "   Fast steps = " << nstf << "  (attempts = " << nattf
-            << ",  fails = " << netff << ")\n";
-  std::cout << "   u error = " << uerrtot << ", v error = " << verrtot
-            << ", total error = " << errtot << std::endl;
-  std::cout << "   Relative accuracy = " << accuracy << std::endl;
-  std::cout << "   Total RHS evals:  Fse = " << nfse << ", Fsi = " << nfsi
-            << ", Ff = " << nff << std::endl;
+
+  // The JSON record is printed at full precision, restoring the format of
+  // std::cout afterwards (since a batch prints further tests to it)
+  std::ios cout_format(NULL);
+  cout_format.copyfmt(std::cout);
+  if (opts.json_stats)
+  {
+    // single-line record, for parsing by the Python test scripts
+    std::cout << std::setprecision(16) << "{\"SlowSteps\": " << nsts
+              << ", \"SlowAttempts\": " << natts << ", \"SlowFails\": " << netfs
+              << ", \"FastSteps\": " << nstf << ", \"FastAttempts\": " << nattf
+              << ", \"FastFails\": " << netff
+              << ", \"UError\": " << JsonReal{uerrtot}
+              << ", \"VError\": " << JsonReal{verrtot}
+              << ", \"TotalError\": " << JsonReal{errtot}
+              << ", \"Accuracy\": " << JsonReal{accuracy}
+              << ", \"FseEvals\": " << nfse << ", \"FsiEvals\": " << nfsi
+              << ", \"FfEvals\": " << nff;
+  }
+  else
+  {
+    std::cout << "\nFinal Solver Statistics:\n";
+    std::cout << "   Slow steps = " << nsts << "  (attempts = " << natts
+              << ",  fails = " << netfs << ")\n";
+    std::cout << "   Fast steps = " << nstf << "  (attempts = " << nattf
+              << ",  fails = " << netff << ")\n";
+    std::cout << "   u error = " << uerrtot << ", v error = " << verrtot
+              << ", total error = " << errtot << std::endl;
+    std::cout << "   Relative accuracy = " << accuracy << std::endl;
+    std::cout << "   Total RHS evals:  Fse = " << nfse << ", Fsi = " << nfsi
+              << ", Ff = " << nff << std::endl;
+  }
+
+  PrintTimings(run_start, evolve_timer, ref_timer, opts.json_stats);
 
   // Get/print slow integrator decoupled implicit solver statistics
   if (slowimplicit)
@@ -838,26 +1072,26 @@ int main(int argc, char* argv[])
     check_flag(retval, "ARKodeGetNonlinSolvStats");
     retval = ARKodeGetNumJacEvals(arkode_mem, &njes);
     check_flag(retval, "ARKodeGetNumJacEvals");
-    std::cout << "   Slow Newton iters = " << nnis << std::endl;
-    std::cout << "   Slow Newton conv fails = " << nncs << std::endl;
-    std::cout << "   Slow Jacobian evals = " << njes << std::endl;
+    if (opts.json_stats)
+    {
+      std::cout << ", \"SlowNewtonIters\": " << nnis
+                << ", \"SlowNewtonConvFails\": " << nncs
+                << ", \"SlowJacEvals\": " << njes;
+    }
+    else
+    {
+      std::cout << "   Slow Newton iters = " << nnis << std::endl;
+      std::cout << "   Slow Newton conv fails = " << nncs << std::endl;
+      std::cout << "   Slow Jacobian evals = " << njes << std::endl;
+    }
+  }
+  if (opts.json_stats)
+  {
+    std::cout << "}" << std::endl;
+    std::cout.copyfmt(cout_format);
   }
 
-  // Clean up and return
-  N_VDestroy(y);
-  MRIStepCoupling_Free(C);
-  if (As) { SUNMatDestroy(As); }
-  if (LSs) { SUNLinSolFree(LSs); }
-  if (scontrol) { SUNAdaptController_Destroy(scontrol); }
-  if (scontrol_H) { SUNAdaptController_Destroy(scontrol_H); }
-  if (scontrol_Tol) { SUNAdaptController_Destroy(scontrol_Tol); }
-  if (fcontrol) { SUNAdaptController_Destroy(fcontrol); }
-  ARKodeFree(&inner_arkode_mem);            // Free fast integrator memory
-  MRIStepInnerStepper_Free(&inner_stepper); // Free inner stepper structure
-  ARKodeFree(&arkode_mem);                  // Free slow integrator memory
-  ARKodeFree(&arkode_ref);                  // Free reference solver memory
-  SUNLogger_Destroy(&logger);               // Free logger
-
+  // Return (mem frees all of the test's memory)
   return 0;
 }
 
@@ -1032,6 +1266,44 @@ static int Jn(sunrealtype t, N_Vector y, N_Vector fy, SUNMatrix J,
   return 0;
 }
 
+// Step postprocessing routines to record the slow and fast step histories
+// (the fast routine also checks the run budget, failing the step once it has
+// been exceeded)
+static int RecordSlowStep(sunrealtype t, N_Vector y, void* user_data)
+{
+  Options* opts = (Options*)user_data;
+  return StepHistoryRecord(*opts->slow_history, t);
+}
+
+static int RecordFastStep(sunrealtype t, N_Vector y, void* user_data)
+{
+  Options* opts = (Options*)user_data;
+  bool exceeded;
+  if (CheckBudget(opts, exceeded) || exceeded) return 1;
+  if (opts->fast_history == NULL) return 0;
+  return StepHistoryRecord(*opts->fast_history, t);
+}
+
+// Check the work done so far against the run budget, setting exceeded to
+// whether it has been exceeded.  Returns a nonzero flag if the solver
+// statistics could not be retrieved.
+static int CheckBudget(Options* opts, bool& exceeded)
+{
+  exceeded = false;
+  if (!BudgetActive(opts->budget)) return 0;
+  long int nsts, nstf, nfse, nfsi, nff;
+  int retval = ARKodeGetNumSteps(opts->slow_mem, &nsts);
+  if (check_flag(retval, "ARKodeGetNumSteps")) return 1;
+  retval = ARKodeGetNumSteps(opts->fast_mem, &nstf);
+  if (check_flag(retval, "ARKodeGetNumSteps")) return 1;
+  retval = MRIStepGetNumRhsEvals(opts->slow_mem, &nfse, &nfsi);
+  if (check_flag(retval, "MRIStepGetNumRhsEvals")) return 1;
+  retval = ERKStepGetNumRhsEvals(opts->fast_mem, &nff);
+  if (check_flag(retval, "ERKStepGetNumRhsEvals")) return 1;
+  exceeded = BudgetCheck(opts->budget, nsts, nstf, nfse + nfsi + nff);
+  return 0;
+}
+
 // ------------------------------
 // Private helper functions
 // -----------------------------
@@ -1080,6 +1352,8 @@ void InputHelp()
   std::cout << std::endl;
   std::cout << "Command line options:" << std::endl;
   std::cout << "  --help         : print options and exit\n";
+  std::cout << "  --batch        : file of options for a batch of tests "
+               "(\"-\" for stdin)\n";
   std::cout << "  --es           : fast->slow coupling strength\n";
   std::cout << "  --ef           : slow->fast coupling strength\n";
   std::cout << "  --G            : stiffness at slow time scale\n";
@@ -1111,6 +1385,16 @@ void InputHelp()
     << "  --htol_minfac : HTol controller minimum relative tolerance factor\n";
   std::cout
     << "  --htol_maxfac : HTol controller maximum relative tolerance factor\n";
+  std::cout << "  --json_stats   : print final statistics as a JSON record\n";
+  std::cout << "  --quiet        : only print the final statistics\n";
+  std::cout << "  --ref_file     : stored reference trajectory file "
+               "(computed if missing)\n";
+  std::cout << "  --ref_hmax     : maximum step size when computing "
+               "ref_file\n";
+  std::cout << "  --step_history : file prefix for binary slow/fast step "
+               "histories\n";
+  std::cout << "  --max_slow_steps, --max_fast_steps, --max_rhs_evals, "
+               "--max_time : run budget\n";
 }
 
 // Read input options
@@ -1154,6 +1438,15 @@ int ReadInputs(std::vector<std::string>& args, Options& opts, SUNContext ctx)
   find_arg(args, "--htol_relch", opts.htol_relch);
   find_arg(args, "--htol_minfac", opts.htol_minfac);
   find_arg(args, "--htol_maxfac", opts.htol_maxfac);
+  find_arg(args, "--json_stats", opts.json_stats);
+  find_arg(args, "--quiet", opts.quiet);
+  find_arg(args, "--ref_file", opts.ref_file);
+  find_arg(args, "--ref_hmax", opts.ref_hmax);
+  find_arg(args, "--step_history", opts.step_history);
+  find_arg(args, "--max_slow_steps", opts.budget.max_slow_steps);
+  find_arg(args, "--max_fast_steps", opts.budget.max_fast_steps);
+  find_arg(args, "--max_rhs_evals", opts.budget.max_rhs_evals);
+  find_arg(args, "--max_time", opts.budget.max_time);
 
   // Check inputs for validity
   //   0 < rtol < 1
@@ -0,0 +1,184 @@
+/* -----------------------------------------------------------------------------
+ * Programmer(s): Daniel R. Reynolds @ SMU
+ * -----------------------------------------------------------------------------
+ * Copyright (c) 2025, Southern Methodist University.
+ * All rights reserved.
+ * For details, see the LICENSE file.
+ * -----------------------------------------------------------------------------
+ * Utility functions for computing a dense reference trajectory once, storing it
+ * on disk, and evaluating it at arbitrary times with cubic Hermite
+ * interpolation.
+ * ---------------------------------------------------------------------------*/
+
+#include <algorithm>
+#include <arkode/arkode.h>
+#include <cmath>
+#include <cstdio>
+#include <iostream>
+#include <nvector/nvector_serial.h>
+#include <string>
+#include <unistd.h>
+#include <vector>
+
+// Identifier stored at the start of reference trajectory files (files written
+// in an older format are recomputed)
+#define REF_FILE_ID 20250002L
+
+// Dense reference trajectory: the solution and right-hand side at each
+// internal step of the reference solver, along with the settings of that
+// solver (which must be set before calling RefRead or RefWrite)
+struct RefTrajectory
+{
+  long int neq     = 0;
+  sunrealtype hmax = SUN_RCONST(0.0); // maximum step size (0 = unlimited)
+  sunrealtype rtol = SUN_RCONST(0.0); // relative tolerance
+  sunrealtype atol = SUN_RCONST(0.0); // absolute tolerance
+  std::vector<sunrealtype> t; // step times
+  std::vector<sunrealtype> y; // solution values (neq per step)
+  std::vector<sunrealtype> f; // right-hand side values (neq per step)
+};
+
+// Append the values (t, y, f) to a reference trajectory
+inline void RefAppend(RefTrajectory& ref, sunrealtype t, N_Vector y, N_Vector f)
+{
+  sunrealtype* ydata = N_VGetArrayPointer(y);
+  sunrealtype* fdata = N_VGetArrayPointer(f);
+  ref.t.push_back(t);
+  ref.y.insert(ref.y.end(), ydata, ydata + ref.neq);
+  ref.f.insert(ref.f.end(), fdata, fdata + ref.neq);
+}
+
+// Compute a reference trajectory by evolving the (already initialized)
+// reference solver arkode_ref from T0 to Tf in one-step mode, storing every
+// internal step.  On input y holds the initial condition; ftmp is workspace.
+inline int RefCompute(RefTrajectory& ref, void* arkode_ref, ARKRhsFn f,
+                      void* user_data, sunrealtype T0, sunrealtype Tf,
+                      N_Vector y, N_Vector ftmp)
+{
+  ref.neq = N_VGetLength(y);
+  ref.t.clear();
+  ref.y.clear();
+  ref.f.clear();
+  sunrealtype t = T0;
+  int retval    = f(t, y, ftmp, user_data);
+  if (retval != 0) return retval;
+  RefAppend(ref, t, y, ftmp);
+  retval = ARKodeSetStopTime(arkode_ref, Tf);
+  if (retval != 0) return retval;
+  while (t < Tf)
+  {
+    retval = ARKodeEvolve(arkode_ref, Tf, y, &t, ARK_ONE_STEP);
+    if (retval < 0) return retval;
+    retval = f(t, y, ftmp, user_data);
+    if (retval != 0) return retval;
+    RefAppend(ref, t, y, ftmp);
+  }
+  return 0;
+}
+
+// Write a reference trajectory to a binary file; returns nonzero if the file
+// could not be written completely.  The data is first written to a temporary
+// file that is then renamed, so that concurrent runs sharing the same file
+// never read a partially-written trajectory, and a failed write never leaves a
+// truncated file behind.
+inline int RefWrite(const RefTrajectory& ref, const std::string& fname)
+{
+  const std::string tmpname = fname + "." + std::to_string(getpid());
+  FILE* fid                 = fopen(tmpname.c_str(), "wb");
+  if (fid == NULL) return 1;
+  long int id = REF_FILE_ID;
+  long int n  = ref.t.size();
+  size_t nwrite = fwrite(&id, sizeof(long int), 1, fid);
+  nwrite += fwrite(&ref.neq, sizeof(long int), 1, fid);
+  nwrite += fwrite(&n, sizeof(long int), 1, fid);
+  nwrite += fwrite(&ref.hmax, sizeof(sunrealtype), 1, fid);
+  nwrite += fwrite(&ref.rtol, sizeof(sunrealtype), 1, fid);
+  nwrite += fwrite(&ref.atol, sizeof(sunrealtype), 1, fid);
+  nwrite += fwrite(ref.t.data(), sizeof(sunrealtype), n, fid);
+  nwrite += fwrite(ref.y.data(), sizeof(sunrealtype), n * ref.neq, fid);
+  nwrite += fwrite(ref.f.data(), sizeof(sunrealtype), n * ref.neq, fid);
+  if ((fclose(fid) != 0) || (nwrite != (size_t)(6 + n * (1 + 2 * ref.neq))))
+  {
+    std::remove(tmpname.c_str());
+    return 1;
+  }
+  if (std::rename(tmpname.c_str(), fname.c_str()) != 0)
+  {
+    std::remove(tmpname.c_str());
+    return 1;
+  }
+  return 0;
+}
+
+// Read a reference trajectory from a binary file; returns nonzero if the file
+// does not exist, is invalid, or was computed with reference solver settings
+// (hmax, rtol, atol) that differ from those already set in ref
+inline int RefRead(RefTrajectory& ref, const std::string& fname)
+{
+  FILE* fid = fopen(fname.c_str(), "rb");
+  if (fid == NULL) return 1;
+  long int id = 0;
+  long int n  = 0;
+  sunrealtype hmax, rtol, atol;
+  if ((fread(&id, sizeof(long int), 1, fid) != 1) || (id != REF_FILE_ID) ||
+      (fread(&ref.neq, sizeof(long int), 1, fid) != 1) ||
+      (fread(&n, sizeof(long int), 1, fid) != 1) || (n < 2) ||
+      (fread(&hmax, sizeof(sunrealtype), 1, fid) != 1) ||
+      (fread(&rtol, sizeof(sunrealtype), 1, fid) != 1) ||
+      (fread(&atol, sizeof(sunrealtype), 1, fid) != 1))
+  {
+    fclose(fid);
+    return 1;
+  }
+  if ((hmax != ref.hmax) || (rtol != ref.rtol) || (atol != ref.atol))
+  {
+    std::cerr << "Reference trajectory " << fname
+              << " was computed with different settings; recomputing"
+              << std::endl;
+    fclose(fid);
+    return 1;
+  }
+  ref.t.resize(n);
+  ref.y.resize(n * ref.neq);
+  ref.f.resize(n * ref.neq);
+  size_t nread = fread(ref.t.data(), sizeof(sunrealtype), n, fid);
+  nread += fread(ref.y.data(), sizeof(sunrealtype), n * ref.neq, fid);
+  nread += fread(ref.f.data(), sizeof(sunrealtype), n * ref.neq, fid);
+  fclose(fid);
+  return (nread == (size_t)(n * (1 + 2 * ref.neq))) ? 0 : 1;
+}
+
+// Evaluate the reference trajectory at time t (which must lie within the
+// stored time interval), storing the result in y
+inline int RefEvaluate(const RefTrajectory& ref, sunrealtype t, N_Vector y)
+{
+  const long int n = ref.t.size();
+  if ((n < 2) || (N_VGetLength(y) != ref.neq)) return 1;
+  const sunrealtype ttol = SUN_RCONST(1.0e-12) *
+                           std::max(SUN_RCONST(1.0), std::abs(ref.t[n - 1]));
+  if ((t < ref.t[0] - ttol) || (t > ref.t[n - 1] + ttol)) return 1;
+
+  // find the interval [t_i, t_{i+1}] containing t
+  long int i = std::upper_bound(ref.t.begin(), ref.t.end(), t) - ref.t.begin();
+  i          = std::min(std::max(i - 1, 0L), n - 2);
+
+  // cubic Hermite basis functions
+  const sunrealtype h   = ref.t[i + 1] - ref.t[i];
+  const sunrealtype s   = (t - ref.t[i]) / h;
+  const sunrealtype h00 = (SUN_RCONST(1.0) + SUN_RCONST(2.0) * s) *
+                          (SUN_RCONST(1.0) - s) * (SUN_RCONST(1.0) - s);
+  const sunrealtype h10 = s * (SUN_RCONST(1.0) - s) * (SUN_RCONST(1.0) - s);
+  const sunrealtype h01 = s * s * (SUN_RCONST(3.0) - SUN_RCONST(2.0) * s);
+  const sunrealtype h11 = s * s * (s - SUN_RCONST(1.0));
+
+  const sunrealtype* y0 = ref.y.data() + i * ref.neq;
+  const sunrealtype* y1 = y0 + ref.neq;
+  const sunrealtype* f0 = ref.f.data() + i * ref.neq;
+  const sunrealtype* f1 = f0 + ref.neq;
+  sunrealtype* ydata    = N_VGetArrayPointer(y);
+  for (long int j = 0; j < ref.neq; j++)
+  {
+    ydata[j] = h00 * y0[j] + h10 * h * f0[j] + h01 * y1[j] + h11 * h * f1[j];
+  }
+  return 0;
+}
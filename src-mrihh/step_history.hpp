@@ -0,0 +1,75 @@
+/* -----------------------------------------------------------------------------
+ * Programmer(s): Daniel R. Reynolds @ SMU
+ * -----------------------------------------------------------------------------
+ * Copyright (c) 2025, Southern Methodist University.
+ * All rights reserved.
+ * For details, see the LICENSE file.
+ * -----------------------------------------------------------------------------
+ * Utility functions for recording the step history of an ARKODE integrator
+ * (from its step postprocessing function) and writing it to a binary file.
+ * ---------------------------------------------------------------------------*/
+
+#include <arkode/arkode.h>
+#include <cstdio>
+#include <string>
+#include <vector>
+
+// Step history: for each successful step, the time at the start of the step,
+// the step size, and the WRMS norm of the estimated local error (dsm).  Since
+// the step postprocessing function is only called for accepted steps, failed
+// step attempts are not recorded (unlike the step histories extracted from the
+// SUNDIALS logging output, which include them).
+struct StepHistory
+{
+  void* arkode_mem = NULL;       // integrator being recorded
+  N_Vector ele     = NULL;       // estimated local errors (workspace)
+  N_Vector ewt     = NULL;       // error weights (workspace)
+  std::vector<sunrealtype> data; // (t, h, dsm) for each step
+};
+
+// Prepare to record the steps of arkode_mem; y is a template vector
+inline int StepHistoryInit(StepHistory& hist, void* arkode_mem, N_Vector y)
+{
+  hist.arkode_mem = arkode_mem;
+  hist.ele        = N_VClone(y);
+  hist.ewt        = N_VClone(y);
+  hist.data.clear();
+  return ((hist.ele == NULL) || (hist.ewt == NULL)) ? 1 : 0;
+}
+
+// Record the step that has just completed at time t (to be called from the
+// integrator's step postprocessing function)
+inline int StepHistoryRecord(StepHistory& hist, sunrealtype t)
+{
+  sunrealtype h;
+  int retval = ARKodeGetLastStep(hist.arkode_mem, &h);
+  if (retval != 0) return retval;
+  retval = ARKodeGetEstLocalErrors(hist.arkode_mem, hist.ele);
+  if (retval != 0) return retval;
+  retval = ARKodeGetErrWeights(hist.arkode_mem, hist.ewt);
+  if (retval != 0) return retval;
+  hist.data.push_back(t - h);
+  hist.data.push_back(h);
+  hist.data.push_back(N_VWrmsNorm(hist.ele, hist.ewt));
+  return 0;
+}
+
+// Write a step history to a binary file, as consecutive (t, h, dsm) triples
+// of sunrealtype values (e.g., readable with NumPy's fromfile)
+inline int StepHistoryWrite(const StepHistory& hist, const std::string& fname)
+{
+  FILE* fid = fopen(fname.c_str(), "wb");
+  if (fid == NULL) return 1;
+  size_t nwrite = fwrite(hist.data.data(), sizeof(sunrealtype),
+                         hist.data.size(), fid);
+  if (fclose(fid) != 0) return 1;
+  return (nwrite == hist.data.size()) ? 0 : 1;
+}
+
+// Free the workspace vectors of a step history
+inline void StepHistoryFree(StepHistory& hist)
+{
+  if (hist.ele) { N_VDestroy(hist.ele); }
+  if (hist.ewt) { N_VDestroy(hist.ewt); }
+  hist.ele = hist.ewt = NULL;
+}
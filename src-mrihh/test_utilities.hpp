@@ -16,8 +16,16 @@
  * ---------------------------------------------------------------------------*/
 
 #include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <cstdio>
+#include <fstream>
 #include <iostream>
+#include <iterator>
+#include <sstream>
 #include <string>
+#include <sys/resource.h>
+#include <unistd.h>
 #include <vector>
 
 // Check function return flag
@@ -108,3 +116,264 @@ inline void find_arg(std::vector<std::string>& args, const std::string key,
     args.erase(it, it + 2);
   }
 }
+
+// Run a sequence of tests within a single process, reading one set of
+// command-line options per line from the file fname ("-" for stdin).  Blank
+// lines and lines starting with "#" are skipped.  After each test, a line
+// "-- batch case return code <flag>" is printed to both the standard output and
+// error, where flag is the value returned by RunTest, so that the output of each
+// test may be separated from that of the others.
+inline int RunBatch(const std::string& fname,
+                    int (*RunTest)(std::vector<std::string>&))
+{
+  std::ifstream fin;
+  if (fname != "-")
+  {
+    fin.open(fname);
+    if (!fin)
+    {
+      std::cerr << "ERROR: unable to open batch file " << fname << std::endl;
+      return 1;
+    }
+  }
+  std::istream& in = (fname == "-") ? std::cin : fin;
+  std::string line;
+  while (std::getline(in, line))
+  {
+    std::istringstream iss(line);
+    std::vector<std::string> args{std::istream_iterator<std::string>(iss),
+                                  std::istream_iterator<std::string>()};
+    if (args.empty() || (args[0][0] == '#')) { continue; }
+    int flag = RunTest(args);
+    std::cerr << "-- batch case return code " << flag << std::endl;
+    std::cout << "-- batch case return code " << flag << std::endl;
+  }
+  return 0;
+}
+
+// Output captured from the standard output (fd = 1) or standard error (fd = 2)
+// of the last test run by RunCaptured
+inline std::string& CapturedOutput(int fd)
+{
+  static std::string output[3];
+  return output[(fd == 2) ? 2 : 1];
+}
+
+// Redirect the file descriptor fd to a new temporary file, returning the file
+// (or NULL on failure) and storing a duplicate of the original descriptor in
+// saved
+inline FILE* CaptureStart(int fd, int& saved)
+{
+  FILE* tmp = tmpfile();
+  saved     = (tmp == NULL) ? -1 : dup(fd);
+  if ((saved < 0) || (dup2(fileno(tmp), fd) < 0))
+  {
+    if (saved >= 0) { close(saved); }
+    if (tmp != NULL) { fclose(tmp); }
+    return NULL;
+  }
+  return tmp;
+}
+
+// Restore the file descriptor fd redirected by CaptureStart, returning the
+// contents written to the temporary file tmp
+inline std::string CaptureStop(int fd, FILE* tmp, int saved)
+{
+  dup2(saved, fd);
+  close(saved);
+  std::string output;
+  char chunk[4096];
+  size_t n;
+  rewind(tmp);
+  while ((n = fread(chunk, 1, sizeof(chunk), tmp)) > 0)
+  {
+    output.append(chunk, n);
+  }
+  fclose(tmp);
+  return output;
+}
+
+// Run a single test inside a library call (e.g., from Python via ctypes).  The
+// test options are given in argv (without a program name).  Everything that
+// the test writes to its standard output and error (through either the C++
+// streams or printf) is stored in CapturedOutput.  Since this redirects the
+// standard output and error of the whole process, calls must not overlap.
+inline int RunCaptured(int (*RunTest)(std::vector<std::string>&), int argc,
+                       const char* argv[])
+{
+  std::vector<std::string> args(argv, argv + argc);
+  std::cout.flush();
+  std::cerr.flush();
+  fflush(stdout);
+  fflush(stderr);
+  int saved_out, saved_err;
+  FILE* out = CaptureStart(STDOUT_FILENO, saved_out);
+  if (out == NULL) return 1;
+  FILE* err = CaptureStart(STDERR_FILENO, saved_err);
+  if (err == NULL)
+  {
+    CaptureStop(STDOUT_FILENO, out, saved_out);
+    return 1;
+  }
+  int flag = RunTest(args);
+  std::cout.flush();
+  std::cerr.flush();
+  fflush(stdout);
+  fflush(stderr);
+  CapturedOutput(1) = CaptureStop(STDOUT_FILENO, out, saved_out);
+  CapturedOutput(2) = CaptureStop(STDERR_FILENO, err, saved_err);
+  return flag;
+}
+
+// Wall-clock timer, accumulating the time spent between each TimerStart and
+// TimerStop call
+struct WallTimer
+{
+  std::chrono::steady_clock::time_point start;
+  double total = 0.0; // accumulated time (seconds)
+};
+
+inline void TimerStart(WallTimer& timer)
+{
+  timer.start = std::chrono::steady_clock::now();
+}
+
+inline void TimerStop(WallTimer& timer)
+{
+  std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() -
+                                          timer.start;
+  timer.total += elapsed.count();
+}
+
+// Resource usage of the current process: wall-clock time, user and system CPU
+// time (seconds), and peak resident set size (MiB)
+struct RunUsage
+{
+  double wall   = 0.0;
+  double user   = 0.0;
+  double system = 0.0;
+  double maxrss = 0.0;
+};
+
+inline RunUsage GetRunUsage()
+{
+  RunUsage usage;
+  std::chrono::duration<double> now =
+    std::chrono::steady_clock::now().time_since_epoch();
+  usage.wall = now.count();
+  struct rusage ru;
+  if (getrusage(RUSAGE_SELF, &ru) == 0)
+  {
+    usage.user   = ru.ru_utime.tv_sec + 1.0e-6 * ru.ru_utime.tv_usec;
+    usage.system = ru.ru_stime.tv_sec + 1.0e-6 * ru.ru_stime.tv_usec;
+#if defined(__APPLE__)
+    usage.maxrss = ru.ru_maxrss / 1048576.0; // reported in bytes
+#else
+    usage.maxrss = ru.ru_maxrss / 1024.0; // reported in kilobytes
+#endif
+  }
+  return usage;
+}
+
+// Wrapper for printing a real value as a member of a JSON record: JSON has no
+// representation of inf or nan, so non-finite values are printed as null
+struct JsonReal
+{
+  sunrealtype value;
+};
+
+inline std::ostream& operator<<(std::ostream& os, const JsonReal& x)
+{
+  if (std::isfinite(x.value)) { return os << x.value; }
+  return os << "null";
+}
+
+// Print the timings of a test that started with resource usage start, where
+// evolve and ref hold the time spent in the integrator and in the reference
+// solution: either as members of the JSON statistics record (json != 0), or as
+// lines of the final statistics.  Since the peak resident set size is that of
+// the whole process, for a batch of tests it covers all tests run so far.
+inline void PrintTimings(const RunUsage& start, const WallTimer& evolve,
+                         const WallTimer& ref, int json)
+{
+  RunUsage usage = GetRunUsage();
+  if (json)
+  {
+    std::cout << ", \"WallTime\": " << usage.wall - start.wall
+              << ", \"UserTime\": " << usage.user - start.user
+              << ", \"SystemTime\": " << usage.system - start.system
+              << ", \"MaxRSS\": " << usage.maxrss
+              << ", \"EvolveTime\": " << evolve.total
+              << ", \"RefTime\": " << ref.total;
+  }
+  else
+  {
+    std::cout << "   Run time = " << usage.wall - start.wall
+              << " s  (user = " << usage.user - start.user
+              << " s,  system = " << usage.system - start.system
+              << " s,  peak RSS = " << usage.maxrss << " MiB)\n";
+    std::cout << "   Evolve time = " << evolve.total
+              << " s,  reference time = " << ref.total << " s" << std::endl;
+  }
+}
+
+// Return flag of a test that was stopped early because it exceeded its run
+// budget (see RunBudget)
+#define BUDGET_EXCEEDED 2
+
+// Limits on the work of a single test (0 = unlimited): the numbers of slow and
+// fast steps, the total number of right-hand side evaluations, and the
+// wall-clock time (seconds) since BudgetStart
+struct RunBudget
+{
+  long int max_slow_steps = 0;
+  long int max_fast_steps = 0;
+  long int max_rhs_evals  = 0;
+  sunrealtype max_time    = SUN_RCONST(0.0);
+  std::chrono::steady_clock::time_point start;
+  bool exceeded = false;
+};
+
+inline bool BudgetActive(const RunBudget& budget)
+{
+  return (budget.max_slow_steps > 0) || (budget.max_fast_steps > 0) ||
+         (budget.max_rhs_evals > 0) || (budget.max_time > SUN_RCONST(0.0));
+}
+
+inline void BudgetStart(RunBudget& budget)
+{
+  budget.start    = std::chrono::steady_clock::now();
+  budget.exceeded = false;
+}
+
+// Check the work done so far against the budget, printing a message the first
+// time that it is exceeded.  Returns 1 if the budget has been exceeded, and 0
+// otherwise.
+inline int BudgetCheck(RunBudget& budget, long int slow_steps,
+                       long int fast_steps, long int rhs_evals)
+{
+  if (budget.exceeded) return 1;
+  std::string limit;
+  if ((budget.max_slow_steps > 0) && (slow_steps > budget.max_slow_steps))
+  {
+    limit = "slow steps";
+  }
+  else if ((budget.max_fast_steps > 0) && (fast_steps > budget.max_fast_steps))
+  {
+    limit = "fast steps";
+  }
+  else if ((budget.max_rhs_evals > 0) && (rhs_evals > budget.max_rhs_evals))
+  {
+    limit = "RHS evaluations";
+  }
+  else if (budget.max_time > SUN_RCONST(0.0))
+  {
+    std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() -
+                                            budget.start;
+    if (elapsed.count() > budget.max_time) { limit = "wall-clock time"; }
+  }
+  if (limit.empty()) return 0;
+  budget.exceeded = true;
+  std::cerr << "Run budget exceeded (" << limit << ")" << std::endl;
+  return 1;
+}
@@ -16,8 +16,13 @@
  * ---------------------------------------------------------------------------*/
 
 #include <algorithm>
+#include <cstdio>
+#include <fstream>
 #include <iostream>
+#include <iterator>
+#include <sstream>
 #include <string>
+#include <unistd.h>
 #include <vector>
 
 // Check function return flag
@@ -108,3 +113,111 @@ inline void find_arg(std::vector<std::string>& args, const std::string key,
     args.erase(it, it + 2);
   }
 }
+
+// Run a sequence of tests within a single process, reading one set of
+// command-line options per line from the file fname ("-" for stdin).  Blank
+// lines and lines starting with "#" are skipped.  After each test, a line
+// "-- batch case return code <flag>" is printed to both the standard output and
+// error, where flag is the value returned by RunTest, so that the output of each
+// test may be separated from that of the others.
+inline int RunBatch(const std::string& fname,
+                    int (*RunTest)(std::vector<std::string>&))
+{
+  std::ifstream fin;
+  if (fname != "-")
+  {
+    fin.open(fname);
+    if (!fin)
+    {
+      std::cerr << "ERROR: unable to open batch file " << fname << std::endl;
+      return 1;
+    }
+  }
+  std::istream& in = (fname == "-") ? std::cin : fin;
+  std::string line;
+  while (std::getline(in, line))
+  {
+    std::istringstream iss(line);
+    std::vector<std::string> args{std::istream_iterator<std::string>(iss),
+                                  std::istream_iterator<std::string>()};
+    if (args.empty() || (args[0][0] == '#')) { continue; }
+    int flag = RunTest(args);
+    std::cerr << "-- batch case return code " << flag << std::endl;
+    std::cout << "-- batch case return code " << flag << std::endl;
+  }
+  return 0;
+}
+
+// Output captured from the standard output (fd = 1) or standard error (fd = 2)
+// of the last test run by RunCaptured
+inline std::string& CapturedOutput(int fd)
+{
+  static std::string output[3];
+  return output[(fd == 2) ? 2 : 1];
+}
+
+// Redirect the file descriptor fd to a new temporary file, returning the file
+// (or NULL on failure) and storing a duplicate of the original descriptor in
+// saved
+inline FILE* CaptureStart(int fd, int& saved)
+{
+  FILE* tmp = tmpfile();
+  saved     = (tmp == NULL) ? -1 : dup(fd);
+  if ((saved < 0) || (dup2(fileno(tmp), fd) < 0))
+  {
+    if (saved >= 0) { close(saved); }
+    if (tmp != NULL) { fclose(tmp); }
+    return NULL;
+  }
+  return tmp;
+}
+
+// Restore the file descriptor fd redirected by CaptureStart, returning the
+// contents written to the temporary file tmp
+inline std::string CaptureStop(int fd, FILE* tmp, int saved)
+{
+  dup2(saved, fd);
+  close(saved);
+  std::string output;
+  char chunk[4096];
+  size_t n;
+  rewind(tmp);
+  while ((n = fread(chunk, 1, sizeof(chunk), tmp)) > 0)
+  {
+    output.append(chunk, n);
+  }
+  fclose(tmp);
+  return output;
+}
+
+// Run a single test inside a library call (e.g., from Python via ctypes).  The
+// test options are given in argv (without a program name).  Everything that
+// the test writes to its standard output and error (through either the C++
+// streams or printf) is stored in CapturedOutput.  Since this redirects the
+// standard output and error of the whole process, calls must not overlap.
+inline int RunCaptured(int (*RunTest)(std::vector<std::string>&), int argc,
+                       const char* argv[])
+{
+  std::vector<std::string> args(argv, argv + argc);
+  std::cout.flush();
+  std::cerr.flush();
+  fflush(stdout);
+  fflush(stderr);
+  int saved_out, saved_err;
+  FILE* out = CaptureStart(STDOUT_FILENO, saved_out);
+  if (out == NULL) return 1;
+  FILE* err = CaptureStart(STDERR_FILENO, saved_err);
+  if (err == NULL)
+  {
+    CaptureStop(STDOUT_FILENO, out, saved_out);
+    return 1;
+  }
+  int flag = RunTest(args);
+  std::cout.flush();
+  std::cerr.flush();
+  fflush(stdout);
+  fflush(stderr);
+  CapturedOutput(1) = CaptureStop(STDOUT_FILENO, out, saved_out);
+  CapturedOutput(2) = CaptureStop(STDERR_FILENO, err, saved_err);
+  return flag;
+}
@@ -115,6 +115,8 @@
  *     as appropriate.  MRIHTol controllers: use htol_relch, htol_minfac,
  *     htol_maxfac.  all controllers use bias.
  *     ** if any one of a relevant set are "-1" then the defaults are used
+ * - print final statistics as a single-line JSON record:  json_stats
+ *      [default 0]
  *
  * Outputs and solution error values are printed at equal intervals
  * of 0.5 and run statistics are printed at the end.
@@ -191,6 +193,9 @@ struct Options
   sunrealtype htol_minfac = NAN;
   sunrealtype htol_maxfac = NAN;
   sunrealtype slow_safety = NAN;
+
+  // Output options
+  int json_stats = 0;
 };
 
 // User-supplied functions called by the solver
@@ -231,6 +236,11 @@ static int Ytrue(sunrealtype t, N_Vector y, const Options& opts);
 // Main Program
 int main(int argc, char* argv[])
 {
+  // Resource usage at the start of the test, and timers for the integrator
+  // and the reference solution
+  RunUsage run_start = GetRunUsage();
+  WallTimer evolve_timer, ref_timer;
+
   // SUNDIALS context object for this simulation
   sundials::Context sunctx;
 
@@ -797,12 +807,16 @@ int main(int argc, char* argv[])
   while (Tf - t > SUN_RCONST(1.0e-8))
   {
     // reset reference solver so that it begins with identical state
+    TimerStart(ref_timer);
     retval = ARKodeReset(arkode_ref, t, y);
+    TimerStop(ref_timer);
 
     // evolve solution in one-step mode
     retval = ARKodeSetStopTime(arkode_mem, tout);
     if (check_flag(retval, "ARKodeSetStopTime")) return 1;
+    TimerStart(evolve_timer);
     retval = ARKodeEvolve(arkode_mem, tout, y, &t, ARK_ONE_STEP);
+    TimerStop(evolve_timer);
     if (retval < 0)
     {
       printf("ARKodeEvolve error (%i)\n", retval);
@@ -810,9 +824,11 @@ int main(int argc, char* argv[])
     }
 
     // evolve reference solver to same time in "normal" mode
+    TimerStart(ref_timer);
     retval = ARKodeSetStopTime(arkode_ref, t);
     if (check_flag(retval, "ARKodeSetStopTime")) return 1;
     retval = ARKodeEvolve(arkode_ref, t, yref, &t2, ARK_NORMAL);
+    TimerStop(ref_timer);
     if (retval < 0)
     {
       printf("ARKodeEvolve reference solution error (%i)\n", retval);
@@ -901,19 +917,41 @@ int main(int argc, char* argv[])
   verrtot = std::sqrt(verrtot / (sunrealtype)nsts);
   werrtot = std::sqrt(werrtot / (sunrealtype)nsts);
   errtot  = std::sqrt(errtot / SUN_RCONST(3.0) / (sunrealtype)nsts);
-  std::cout << "\nFinal Solver Statistics:\n";
-  std::cout << "   Slow steps = " << nsts << "  (attempts = " << natts
-            << ",  fails = " << netfs << ",  innerfails = " << nifs << ")\n";
-  std::cout << "   Intermediate steps = " << nstm << "  (attempts = " << nattm
-            << ",  fails = " << netfm << ",  innerfails = " << nifm << ")\n";
-  std::cout << "   Fast steps = " << nstf << "  (attempts = " << nattf
-            << ",  fails = " << netff << ")\n";
-  std::cout << "   u error = " << uerrtot << ", v error = " << verrtot
-            << ", total error = " << errtot << std::endl;
-  std::cout << "   Relative accuracy = " << accuracy << std::endl;
-  std::cout << "   Total RHS evals:  Fse = " << nfse << ", Fsi = " << nfsi
-            << ", Fme = " << nfme << ", Fmi = " << nfmi << ", Ff = " << nff
-            << std::endl;
+  if (opts.json_stats)
+  {
+    // single-line record, for parsing by the Python test scripts
+    std::cout << std::setprecision(16) << "{\"SlowSteps\": " << nsts
+              << ", \"SlowAttempts\": " << natts << ", \"SlowFails\": " << netfs
+              << ", \"SlowInnerFails\": " << nifs << ", \"MedSteps\": " << nstm
+              << ", \"MedAttempts\": " << nattm << ", \"MedFails\": " << netfm
+              << ", \"MedInnerFails\": " << nifm << ", \"FastSteps\": " << nstf
+              << ", \"FastAttempts\": " << nattf << ", \"FastFails\": " << netff
+              << ", \"UError\": " << JsonReal{uerrtot}
+              << ", \"VError\": " << JsonReal{verrtot}
+              << ", \"TotalError\": " << JsonReal{errtot}
+              << ", \"Accuracy\": " << JsonReal{accuracy}
+              << ", \"FseEvals\": " << nfse << ", \"FsiEvals\": " << nfsi
+              << ", \"FmeEvals\": " << nfme << ", \"FmiEvals\": " << nfmi
+              << ", \"FfEvals\": " << nff;
+  }
+  else
+  {
+    std::cout << "\nFinal Solver Statistics:\n";
+    std::cout << "   Slow steps = " << nsts << "  (attempts = " << natts
+              << ",  fails = " << netfs << ",  innerfails = " << nifs << ")\n";
+    std::cout << "   Intermediate steps = " << nstm << "  (attempts = " << nattm
+              << ",  fails = " << netfm << ",  innerfails = " << nifm << ")\n";
+    std::cout << "   Fast steps = " << nstf << "  (attempts = " << nattf
+              << ",  fails = " << netff << ")\n";
+    std::cout << "   u error = " << uerrtot << ", v error = " << verrtot
+              << ", total error = " << errtot << std::endl;
+    std::cout << "   Relative accuracy = " << accuracy << std::endl;
+    std::cout << "   Total RHS evals:  Fse = " << nfse << ", Fsi = " << nfsi
+              << ", Fme = " << nfme << ", Fmi = " << nfmi << ", Ff = " << nff
+              << std::endl;
+  }
+
+  PrintTimings(run_start, evolve_timer, ref_timer, opts.json_stats);
 
   // Get/print slow integrator implicit solver statistics
   if (slowimplicit)
@@ -923,13 +961,22 @@ int main(int argc, char* argv[])
     check_flag(retval, "ARKodeGetNonlinSolvStats");
     retval = ARKodeGetNumJacEvals(arkode_mem, &njes);
     check_flag(retval, "ARKodeGetNumJacEvals");
-    std::cout << "   Slow Newton iters = " << nnis << std::endl;
-    std::cout << "   Slow Newton iters/attempt = "
-              << (sunrealtype)nnis / (sunrealtype)natts << std::endl;
-    std::cout << "   Slow Newton conv fails = " << nncs << std::endl;
-    std::cout << "   Slow Jacobian evals = " << njes << std::endl;
-    std::cout << "   Slow Jacobian evals/Newton = "
-              << (sunrealtype)njes / (sunrealtype)nnis << std::endl;
+    if (opts.json_stats)
+    {
+      std::cout << ", \"SlowNewtonIters\": " << nnis
+                << ", \"SlowNewtonConvFails\": " << nncs
+                << ", \"SlowJacEvals\": " << njes;
+    }
+    else
+    {
+      std::cout << "   Slow Newton iters = " << nnis << std::endl;
+      std::cout << "   Slow Newton iters/attempt = "
+                << (sunrealtype)nnis / (sunrealtype)natts << std::endl;
+      std::cout << "   Slow Newton conv fails = " << nncs << std::endl;
+      std::cout << "   Slow Jacobian evals = " << njes << std::endl;
+      std::cout << "   Slow Jacobian evals/Newton = "
+                << (sunrealtype)njes / (sunrealtype)nnis << std::endl;
+    }
   }
 
   // Get/print intermediate integrator implicit solver statistics
@@ -940,14 +987,24 @@ int main(int argc, char* argv[])
     check_flag(retval, "ARKodeGetNonlinSolvStats");
     retval = ARKodeGetNumJacEvals(mid_arkode_mem, &njem);
     check_flag(retval, "ARKodeGetNumJacEvals");
-    std::cout << "   Intermediate Newton iters = " << nnim << std::endl;
-    std::cout << "   Intermediate Newton iters/attempt = "
-              << (sunrealtype)nnim / (sunrealtype)nattm << std::endl;
-    std::cout << "   Intermediate Newton conv fails = " << nncm << std::endl;
-    std::cout << "   Intermediate Jacobian evals = " << njem << std::endl;
-    std::cout << "   Intermediate Jacobian evals/Newton = "
-              << (sunrealtype)njem / (sunrealtype)nnim << std::endl;
+    if (opts.json_stats)
+    {
+      std::cout << ", \"MedNewtonIters\": " << nnim
+                << ", \"MedNewtonConvFails\": " << nncm
+                << ", \"MedJacEvals\": " << njem;
+    }
+    else
+    {
+      std::cout << "   Intermediate Newton iters = " << nnim << std::endl;
+      std::cout << "   Intermediate Newton iters/attempt = "
+                << (sunrealtype)nnim / (sunrealtype)nattm << std::endl;
+      std::cout << "   Intermediate Newton conv fails = " << nncm << std::endl;
+      std::cout << "   Intermediate Jacobian evals = " << njem << std::endl;
+      std::cout << "   Intermediate Jacobian evals/Newton = "
+                << (sunrealtype)njem / (sunrealtype)nnim << std::endl;
+    }
   }
+  if (opts.json_stats) { std::cout << "}" << std::endl; }
 
   // Clean up and return
   N_VDestroy(y);
@@ -1428,6 +1485,7 @@ void InputHelp()
     << "  --htol_minfac : HTol controller minimum relative tolerance factor\n";
   std::cout
     << "  --htol_maxfac : HTol controller maximum relative tolerance factor\n";
+  std::cout << "  --json_stats   : print final statistics as a JSON record\n";
 }
 
 // Read input options
@@ -1471,6 +1529,7 @@ int ReadInputs(std::vector<std::string>& args, Options& opts, SUNContext ctx)
   find_arg(args, "--htol_relch", opts.htol_relch);
   find_arg(args, "--htol_minfac", opts.htol_minfac);
   find_arg(args, "--htol_maxfac", opts.htol_maxfac);
+  find_arg(args, "--json_stats", opts.json_stats);
 
   // Check inputs for validity
   //   0 < rtol < 1
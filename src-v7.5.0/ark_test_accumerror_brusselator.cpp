@@ -79,18 +79,29 @@
  * the error at the end of each partition (computed via a reference
  * solution) against the integrator-reported accumulated error
  * estimate.
+ *
+ * The tests for each tolerance/step size and accumulation type are
+ * independent, and are distributed over nthreads threads, each
+ * with its own SUNDIALS context and integrator.  Since the results
+ * do not depend on nthreads (they are always output in the same
+ * order as a serial run), it is not a command-line argument, but
+ * is read from the ACCUMERROR_NUM_THREADS environment variable
+ * (default 1), which must be positive.
  *-----------------------------------------------------------------*/
 
 // Header files
 #include <arkode/arkode_arkstep.h>
 #include <cmath>
 #include <iostream>
+#include <map>
 #include <nvector/nvector_serial.h>
+#include <sstream>
 #include <stdio.h>
 #include <string.h>
 #include <sundials/sundials_core.hpp>
 #include <sunlinsol/sunlinsol_dense.h>
 #include <sunmatrix/sunmatrix_dense.h>
+#include <thread>
 #include <vector>
 
 #define ZERO SUN_RCONST(0.0)
@@ -113,12 +124,24 @@ static int fn(sunrealtype t, N_Vector y, N_Vector ydot, void* user_data);
 static int Jac(sunrealtype t, N_Vector y, N_Vector fy, SUNMatrix J,
                void* user_data, N_Vector tmp1, N_Vector tmp2, N_Vector tmp3);
 
+// Output from each test case (as printed in a serial run), indexed by case
+typedef map<size_t, ostringstream> CaseOutput;
+
 // Private utility functions
+static int create_integrator(SUNContext ctx, sunrealtype T0, int rk_type,
+                             int order, N_Vector y0, UserData& udata,
+                             void** arkode_mem, N_Vector* y, SUNMatrix* A,
+                             SUNLinearSolver* LS);
+static int run_tests(sunrealtype T0, sunrealtype Tf, int rk_type, int order,
+                     sunbooleantype adaptive, int nthreads, N_Vector* yref,
+                     UserData& udata);
 static int adaptive_run(void* arkode_mem, N_Vector y, sunrealtype T0,
                         sunrealtype Tf, int rk_type, int order, N_Vector* yref,
-                        UserData& udata);
+                        UserData& udata, int ithread, int nthreads,
+                        CaseOutput& out);
 static int fixed_run(void* arkode_mem, N_Vector y, sunrealtype T0, sunrealtype Tf,
-                     int rk_type, int order, N_Vector* yref, UserData& udata);
+                     int rk_type, int order, N_Vector* yref, UserData& udata,
+                     int ithread, int nthreads, CaseOutput& out);
 static int computeErrorWeights(N_Vector ycur, N_Vector weight, sunrealtype rtol,
                                sunrealtype atol, N_Vector vtemp);
 static int check_retval(void* returnvalue, const char* funcname, int opt);
@@ -134,17 +157,15 @@ int main(int argc, char* argv[])
   int order               = 4;       // order of accuracy for RK method
   int test                = 2;       // test problem to run
   sunbooleantype adaptive = SUNTRUE; // adaptive run vs convergence order
+  int nthreads            = 1;       // number of threads for running tests
   sunrealtype u0, v0, w0;            // parameters
 
   // general problem variables
   int retval;              // reusable error-checking flag
   N_Vector y       = NULL; // empty vector for storing solution
   N_Vector* yref   = NULL; // empty vectors for storing reference solution
-  void* arkode_mem = NULL; // empty ARKStep memory structure
   void* arkode_ref = NULL; // empty ARKStep memory structure for reference solution
-  SUNMatrix A        = NULL; // empty matrix for solver
-  SUNLinearSolver LS = NULL; // empty linear solver object
-  UserData udata;            // user-data structure
+  UserData udata;          // user-data structure
   sunrealtype* ydata = NULL;
   udata.ep           = SUN_RCONST(0.0004); // stiffness parameter
   udata.Npart        = 20;                 // partition size
@@ -160,11 +181,16 @@ int main(int argc, char* argv[])
   if (argc > 4) udata.ep = SUNStrToReal(argv[4]);
   if (argc > 5) test = atoi(argv[5]);
 
+  // Retrieve the number of threads from the environment
+  const char* nthreads_env = getenv("ACCUMERROR_NUM_THREADS");
+  if (nthreads_env != NULL) nthreads = atoi(nthreads_env);
+
   // Check arguments for validity
   //    method = {0, 1}
   //    test = {1, 2, 3}
   //    ep > 0
   //    Npart > 0
+  //    nthreads > 0
   if ((rk_type < 0) || (rk_type > 1))
   {
     cerr << "ERROR: RK type be an integer in {0,1} \n";
@@ -185,6 +211,11 @@ int main(int argc, char* argv[])
     cerr << "ERROR: Npart must be a positive integer\n";
     return (-1);
   }
+  if (nthreads < 1)
+  {
+    cerr << "ERROR: ACCUMERROR_NUM_THREADS must be a positive integer\n";
+    return (-1);
+  }
 
   // Handle adaptive run vs order-of-convergence run
   if (order < 0)
@@ -277,59 +308,13 @@ int main(int argc, char* argv[])
   }
   ARKodeFree(&arkode_ref);
 
-  // Set up ARKStep integrator
-  ydata[0] = u0;
-  ydata[1] = v0;
-  ydata[2] = w0;
-  if (rk_type == 0)
-  { // DIRK method
-    arkode_mem = ARKStepCreate(NULL, fn, T0, y, ctx);
-  }
-  else
-  { // ERK method
-    arkode_mem = ARKStepCreate(fn, NULL, T0, y, ctx);
-  }
-  if (check_retval((void*)arkode_mem, "ARKStepCreate", 0)) return 1;
-  retval = ARKodeSetUserData(arkode_mem, (void*)&udata);
-  if (check_retval(&retval, "ARKodeSetUserData", 1)) return 1;
-  retval = ARKodeSetOrder(arkode_mem, order);
-  if (check_retval(&retval, "ARKodeSetOrder", 1)) return 1;
-  retval = ARKodeSStolerances(arkode_mem, SUN_RCONST(1.e-4), SUN_RCONST(1.e-9));
-  if (check_retval(&retval, "ARKodeSStolerances", 1)) return 1;
-  if (rk_type == 0)
-  { // DIRK method
-    A = SUNDenseMatrix(NEQ, NEQ, ctx);
-    if (check_retval((void*)A, "SUNDenseMatrix", 0)) return 1;
-    LS = SUNLinSol_Dense(y, A, ctx);
-    if (check_retval((void*)LS, "SUNLinSol_Dense", 0)) return 1;
-    retval = ARKodeSetLinearSolver(arkode_mem, LS, A);
-    if (check_retval(&retval, "ARKodeSetLinearSolver", 1)) return 1;
-    retval = ARKodeSetJacFn(arkode_mem, Jac);
-    if (check_retval(&retval, "ARKodeSetJacFn", 1)) return 1;
-  }
-  else
-  { // ERK method
-    retval = ARKodeSetMaxNumSteps(arkode_mem, 1000000);
-    if (check_retval(&retval, "ARKodeSetMaxNumSteps", 1)) return (1);
-  }
-
-  // Integrate ODE, based on run type
-  if (adaptive)
-  {
-    retval = adaptive_run(arkode_mem, y, T0, Tf, rk_type, order, yref, udata);
-    if (check_retval(&retval, "adaptive_run", 1)) return 1;
-  }
-  else
-  {
-    retval = fixed_run(arkode_mem, y, T0, Tf, rk_type, order, yref, udata);
-    if (check_retval(&retval, "fixed_run", 1)) return 1;
-  }
+  // Integrate ODE, based on run type (the reference solution is only read
+  // by the tests, so it is shared by all threads)
+  retval = run_tests(T0, Tf, rk_type, order, adaptive, nthreads, yref, udata);
+  if (check_retval(&retval, "run_tests", 1)) return 1;
 
   // Clean up and return
-  ARKodeFree(&arkode_mem);
-  if (LS) { SUNLinSolFree(LS); } // free system linear solver
-  if (A) { SUNMatDestroy(A); }   // free system matrix
-  N_VDestroy(y);                 // Free y and yref vectors
+  N_VDestroy(y); // Free y and yref vectors
   N_VDestroyVectorArray(yref, udata.Npart + 1);
   return 0;
 }
@@ -390,9 +375,133 @@ static int Jac(sunrealtype t, N_Vector y, N_Vector fy, SUNMatrix J,
 // Private helper functions
 //------------------------------
 
+// Create an ARKStep (DIRK or ERK) integrator for this problem in the SUNDIALS
+// context ctx, along with its solution vector (initialized from y0) and (for
+// DIRK) its system matrix and linear solver
+static int create_integrator(SUNContext ctx, sunrealtype T0, int rk_type,
+                             int order, N_Vector y0, UserData& udata,
+                             void** arkode_mem, N_Vector* y, SUNMatrix* A,
+                             SUNLinearSolver* LS)
+{
+  int retval;
+  sunindextype NEQ = 3; // number of dependent vars.
+
+  // Create serial vector for the solution
+  *y = N_VNew_Serial(NEQ, ctx);
+  if (check_retval((void*)*y, "N_VNew_Serial", 0)) return 1;
+  N_VScale(ONE, y0, *y);
+
+  // Set up ARKStep integrator
+  if (rk_type == 0)
+  { // DIRK method
+    *arkode_mem = ARKStepCreate(NULL, fn, T0, *y, ctx);
+  }
+  else
+  { // ERK method
+    *arkode_mem = ARKStepCreate(fn, NULL, T0, *y, ctx);
+  }
+  if (check_retval((void*)*arkode_mem, "ARKStepCreate", 0)) return 1;
+  retval = ARKodeSetUserData(*arkode_mem, (void*)&udata);
+  if (check_retval(&retval, "ARKodeSetUserData", 1)) return 1;
+  retval = ARKodeSetOrder(*arkode_mem, order);
+  if (check_retval(&retval, "ARKodeSetOrder", 1)) return 1;
+  retval = ARKodeSStolerances(*arkode_mem, SUN_RCONST(1.e-4),
+                              SUN_RCONST(1.e-9));
+  if (check_retval(&retval, "ARKodeSStolerances", 1)) return 1;
+  if (rk_type == 0)
+  { // DIRK method
+    *A = SUNDenseMatrix(NEQ, NEQ, ctx);
+    if (check_retval((void*)*A, "SUNDenseMatrix", 0)) return 1;
+    *LS = SUNLinSol_Dense(*y, *A, ctx);
+    if (check_retval((void*)*LS, "SUNLinSol_Dense", 0)) return 1;
+    retval = ARKodeSetLinearSolver(*arkode_mem, *LS, *A);
+    if (check_retval(&retval, "ARKodeSetLinearSolver", 1)) return 1;
+    retval = ARKodeSetJacFn(*arkode_mem, Jac);
+    if (check_retval(&retval, "ARKodeSetJacFn", 1)) return 1;
+  }
+  else
+  { // ERK method
+    retval = ARKodeSetMaxNumSteps(*arkode_mem, 1000000);
+    if (check_retval(&retval, "ARKodeSetMaxNumSteps", 1)) return (1);
+  }
+  return 0;
+}
+
+// Run the adaptive or fixed-step tests, distributing the test cases over
+// nthreads threads (each with its own SUNDIALS context and integrator), and
+// print the results of all cases in the same order as a serial run
+static int run_tests(sunrealtype T0, sunrealtype Tf, int rk_type, int order,
+                     sunbooleantype adaptive, int nthreads, N_Vector* yref,
+                     UserData& udata)
+{
+  vector<CaseOutput> output(nthreads);
+  vector<int> flags(nthreads, 0);
+
+  auto worker = [&](int ithread)
+  {
+    sundials::Context ctx;
+    N_Vector y         = NULL; // empty vector for storing solution
+    void* arkode_mem   = NULL; // empty ARKStep memory structure
+    SUNMatrix A        = NULL; // empty matrix for solver
+    SUNLinearSolver LS = NULL; // empty linear solver object
+
+    flags[ithread] = create_integrator(ctx, T0, rk_type, order, yref[0], udata,
+                                       &arkode_mem, &y, &A, &LS);
+    if (flags[ithread] == 0)
+    {
+      if (adaptive)
+      {
+        flags[ithread] = adaptive_run(arkode_mem, y, T0, Tf, rk_type, order,
+                                      yref, udata, ithread, nthreads,
+                                      output[ithread]);
+      }
+      else
+      {
+        flags[ithread] = fixed_run(arkode_mem, y, T0, Tf, rk_type, order, yref,
+                                   udata, ithread, nthreads, output[ithread]);
+      }
+    }
+
+    // Clean up
+    ARKodeFree(&arkode_mem);
+    if (LS) { SUNLinSolFree(LS); } // free system linear solver
+    if (A) { SUNMatDestroy(A); }   // free system matrix
+    if (y) { N_VDestroy(y); }      // Free y vector
+  };
+
+  if (nthreads == 1) { worker(0); }
+  else
+  {
+    vector<thread> threads;
+    for (int ithread = 0; ithread < nthreads; ithread++)
+    {
+      threads.emplace_back(worker, ithread);
+    }
+    for (auto& th : threads) { th.join(); }
+  }
+
+  // Print the output from all test cases, in order
+  map<size_t, string> results;
+  for (auto& out : output)
+  {
+    for (auto& result : out) { results[result.first] = result.second.str(); }
+  }
+  if (adaptive) { cout << "\nAdaptive-step runs:\n"; }
+  else { cout << "\nFixed-step runs:\n"; }
+  for (auto& result : results) { cout << result.second; }
+  cout << flush;
+
+  for (int flag : flags)
+  {
+    if (flag != 0) return flag;
+  }
+  return 0;
+}
+
 static int adaptive_run(void* arkode_mem, N_Vector y, sunrealtype T0,
                         sunrealtype Tf, int rk_type, int order, N_Vector* yref,
-                        UserData& udata)
+                        UserData& udata, int ithread, int nthreads,
+                        CaseOutput& out)
 {
   // Reused variables
   int retval;
@@ -409,12 +518,15 @@ static int adaptive_run(void* arkode_mem, N_Vector y, sunrealtype T0,
   vector<long int> Nsteps(udata.Npart);
 
   // Loop over tolerances
-  cout << "\nAdaptive-step runs:\n";
   for (size_t irtol = 0; irtol < rtols.size(); irtol++)
   {
     // Loop over accumulation types
     for (size_t iaccum = 0; iaccum < accum_types.size(); iaccum++)
     {
+      // Skip test cases that are assigned to other threads
+      size_t icase = irtol * accum_types.size() + iaccum;
+      if (icase % nthreads != (size_t)ithread) continue;
+
       // Loop over partition
       for (int ipart = 0; ipart < udata.Npart; ipart++)
       {
@@ -459,10 +571,10 @@ static int adaptive_run(void* arkode_mem, N_Vector y, sunrealtype T0,
         dsm[ipart] =
           rtols[irtol] *
           sqrt((udsm * udsm + vdsm * vdsm + wdsm * wdsm) / SUN_RCONST(3.0));
-        cout << "  rtol " << rtols[irtol] << "  rk_type " << rk_type
-             << "  order " << order << "  acc " << accum_types[iaccum] << "  t "
-             << t << "  dsm " << dsm[ipart] << "  dsm_est " << dsm_est[ipart]
-             << "  nsteps " << Nsteps[ipart] << endl;
+        out[icase] << "  rtol " << rtols[irtol] << "  rk_type " << rk_type
+                   << "  order " << order << "  acc " << accum_types[iaccum]
+                   << "  t " << t << "  dsm " << dsm[ipart] << "  dsm_est "
+                   << dsm_est[ipart] << "  nsteps " << Nsteps[ipart] << endl;
       }
     }
   }
@@ -471,7 +583,8 @@ static int adaptive_run(void* arkode_mem, N_Vector y, sunrealtype T0,
 }
 
 static int fixed_run(void* arkode_mem, N_Vector y, sunrealtype T0, sunrealtype Tf,
-                     int rk_type, int order, N_Vector* yref, UserData& udata)
+                     int rk_type, int order, N_Vector* yref, UserData& udata,
+                     int ithread, int nthreads, CaseOutput& out)
 {
   // Reused variables
   int retval;
@@ -495,13 +608,18 @@ static int fixed_run(void* arkode_mem, N_Vector y, sunrealtype T0, sunrealtype T
   vector<sunrealtype> dsm_est(udata.Npart);
   vector<long int> Nsteps(udata.Npart);
 
-  // Loop over step sizes
-  cout << "\nFixed-step runs:\n";
+  // Loop over step sizes (each has a test case for every built-in accumulation
+  // type, and another for the double-step error estimator)
+  size_t ncases = accum_types.size() + 1;
   for (size_t ih = 0; ih < hvals.size(); ih++)
   {
     // Loop over built-in accumulation types
     for (size_t iaccum = 0; iaccum < accum_types.size(); iaccum++)
     {
+      // Skip test cases that are assigned to other threads
+      size_t icase = ih * ncases + iaccum;
+      if (icase % nthreads != (size_t)ithread) continue;
+
       // Loop over partition
       for (int ipart = 0; ipart < udata.Npart; ipart++)
       {
@@ -556,14 +674,16 @@ static int fixed_run(void* arkode_mem, N_Vector y, sunrealtype T0, sunrealtype T
                                  (abstol + reltol * abs(yrefdata[2]));
         dsm[ipart] = reltol * sqrt((udsm * udsm + vdsm * vdsm + wdsm * wdsm) /
                                    SUN_RCONST(3.0));
-        cout << "  h " << hvals[ih] << "  rk_type " << rk_type << "  order "
-             << order << "  acc " << accum_types[iaccum] << "  t " << t
-             << "  dsm " << dsm[ipart] << "  dsm_est " << dsm_est[ipart]
-             << "  nsteps " << Nsteps[ipart] << endl;
+        out[icase] << "  h " << hvals[ih] << "  rk_type " << rk_type
+                   << "  order " << order << "  acc " << accum_types[iaccum]
+                   << "  t " << t << "  dsm " << dsm[ipart] << "  dsm_est "
+                   << dsm_est[ipart] << "  nsteps " << Nsteps[ipart] << endl;
       }
     }
 
-    // Test double-step error estimator
+    // Test double-step error estimator (unless assigned to another thread)
+    size_t icase = ih * ncases + accum_types.size();
+    if (icase % nthreads != (size_t)ithread) continue;
 
     // Loop over partition
     for (int ipart = 0; ipart < udata.Npart; ipart++)
@@ -639,10 +759,10 @@ static int fixed_run(void* arkode_mem, N_Vector y, sunrealtype T0, sunrealtype T
                                (abstol + reltol * abs(yrefdata[2]));
       dsm[ipart] = reltol * sqrt((udsm * udsm + vdsm * vdsm + wdsm * wdsm) /
                                  SUN_RCONST(3.0));
-      cout << "  h " << hvals[ih] << "  rk_type " << rk_type << "  order "
-           << order << "  acc " << 4 << "  t " << t << "  dsm " << dsm[ipart]
-           << "  dsm_est " << dsm_est[ipart] << "  nsteps " << Nsteps[ipart]
-           << endl;
+      out[icase] << "  h " << hvals[ih] << "  rk_type " << rk_type
+                 << "  order " << order << "  acc " << 4 << "  t " << t
+                 << "  dsm " << dsm[ipart] << "  dsm_est " << dsm_est[ipart]
+                 << "  nsteps " << Nsteps[ipart] << endl;
     }
   }
 
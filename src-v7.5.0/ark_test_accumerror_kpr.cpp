@@ -65,6 +65,14 @@
  * runs, we test a variety of tolerances/step sizes, and compare
  * the true error at the end of each partition against the
  * integrator-reported accumulated error estimate.
+ *
+ * The tests for each tolerance/step size and accumulation type are
+ * independent, and are distributed over nthreads threads, each
+ * with its own SUNDIALS context and integrator.  Since the results
+ * do not depend on nthreads (they are always output in the same
+ * order as a serial run), it is not a command-line argument, but
+ * is read from the ACCUMERROR_NUM_THREADS environment variable
+ * (default 1), which must be positive.
  * ----------------------------------------------------------------*/
 
 // Header files
@@ -72,13 +80,16 @@
 #include <arkode/arkode_erkstep.h>
 #include <cmath>
 #include <iostream>
+#include <map>
 #include <nvector/nvector_serial.h>
+#include <sstream>
 #include <stdio.h>
 #include <string.h>
 #include <sundials/sundials_core.hpp>
 #include <sunlinsol/sunlinsol_dense.h>
 #include <sunmatrix/sunmatrix_dense.h>
 #include <sunnonlinsol/sunnonlinsol_newton.h>
+#include <thread>
 #include <vector>
 
 #define ZERO SUN_RCONST(0.0)
@@ -101,11 +112,21 @@ static int fn(sunrealtype t, N_Vector y, N_Vector ydot, void* user_data);
 static int Jn(sunrealtype t, N_Vector y, N_Vector fy, SUNMatrix J,
               void* user_data, N_Vector tmp1, N_Vector tmp2, N_Vector tmp3);
 
+// Output from each test case (as printed in a serial run), indexed by case
+typedef map<size_t, ostringstream> CaseOutput;
+
 // Private utility functions
+static int create_integrator(SUNContext ctx, sunrealtype T0, int rk_type,
+                             int order, UserData& udata, void** arkode_mem,
+                             N_Vector* y, SUNMatrix* A, SUNLinearSolver* LS);
+static int run_tests(sunrealtype T0, sunrealtype Tf, int rk_type, int order,
+                     sunbooleantype adaptive, int nthreads, UserData& udata);
 static int adaptive_run(void* arkode_mem, N_Vector y, sunrealtype T0,
-                        sunrealtype Tf, int rk_type, int order, UserData& udata);
+                        sunrealtype Tf, int rk_type, int order, UserData& udata,
+                        int ithread, int nthreads, CaseOutput& out);
 static int fixed_run(void* arkode_mem, N_Vector y, sunrealtype T0,
-                     sunrealtype Tf, int rk_type, int order, UserData& udata);
+                     sunrealtype Tf, int rk_type, int order, UserData& udata,
+                     int ithread, int nthreads, CaseOutput& out);
 static sunrealtype p(sunrealtype t);
 static sunrealtype q(sunrealtype t, UserData& udata);
 static sunrealtype pdot(sunrealtype t);
@@ -123,17 +144,13 @@ int main(int argc, char* argv[])
   // general problem parameters
   sunrealtype T0          = SUN_RCONST(0.0); // initial time
   sunrealtype Tf          = SUN_RCONST(5.0); // final time
-  sunindextype NEQ        = 2;               // number of dependent vars.
   int rk_type             = 1;       // type of RK method [DIRK=0, ERK=1]
   int order               = 4;       // order of accuracy for RK method
   sunbooleantype adaptive = SUNTRUE; // adaptive vs fixed-step run
+  int nthreads            = 1;       // number of threads for running tests
 
   // general problem variables
   int retval;                      // reusable error-checking flag
-  N_Vector y         = NULL;       // empty vector for the computed solution
-  void* arkode_mem   = NULL;       // empty ARKODE memory structure
-  SUNMatrix A        = NULL;       // empty system matrix
-  SUNLinearSolver LS = NULL;       // empty system linear solver object
   UserData udata;                  // user-data structure
   udata.G     = SUN_RCONST(-10.0); // stiffness parameter
   udata.e     = SUN_RCONST(0.1);   // coupling strength
@@ -152,11 +169,16 @@ int main(int argc, char* argv[])
   if (argc > 5) udata.e = SUNStrToReal(argv[5]);
   if (argc > 6) udata.omega = SUNStrToReal(argv[6]);
 
+  // Retrieve the number of threads from the environment
+  const char* nthreads_env = getenv("ACCUMERROR_NUM_THREADS");
+  if (nthreads_env != NULL) nthreads = atoi(nthreads_env);
+
   // Check arguments for validity
   //   0 <= rk_type <= 1
   //   G < 0.0
   //   omega > 0.0
   //   Npart > 0
+  //   nthreads > 0
   if ((rk_type < 0) || (rk_type > 1))
   {
     cerr << "ERROR: RK type be an integer in {0,1} \n";
@@ -177,6 +199,11 @@ int main(int argc, char* argv[])
     cerr << "ERROR: Npart must be a positive integer\n";
     return (-1);
   }
+  if (nthreads < 1)
+  {
+    cerr << "ERROR: ACCUMERROR_NUM_THREADS must be a positive integer\n";
+    return (-1);
+  }
 
   // Handle adaptive run vs order-of-convergence run
   if (order < 0)
@@ -200,80 +227,9 @@ int main(int argc, char* argv[])
     cout << "    ERK solver, order = " << order << endl;
   }
 
-  //
-  // Problem Setup
-  //
-
-  // Create SUNDIALS context
-  sundials::Context ctx;
-
-  // Create and initialize serial vector for the solution
-  y = N_VNew_Serial(NEQ, ctx);
-  if (check_retval((void*)y, "N_VNew_Serial", 0)) return 1;
-  retval = Ytrue(T0, y, udata);
-  if (check_retval(&retval, "Ytrue", 1)) return 1;
-
-  // Initialize ARKStep or ERKStep.
-  if (rk_type == 0)
-  { // DIRK method
-
-    arkode_mem = ARKStepCreate(NULL, fn, T0, y, ctx);
-    if (check_retval((void*)arkode_mem, "ARKStepCreate", 0)) return 1;
-
-    // Initialize/attach linear solvers (if required)
-    A = SUNDenseMatrix(NEQ, NEQ, ctx);
-    if (check_retval((void*)A, "SUNDenseMatrix", 0)) return 1;
-    LS = SUNLinSol_Dense(y, A, ctx);
-    if (check_retval((void*)LS, "SUNLinSol_Dense", 0)) return 1;
-    retval = ARKodeSetLinearSolver(arkode_mem, LS, A);
-    if (check_retval(&retval, "ARKodeSetLinearSolver", 1)) return (1);
-    retval = ARKodeSetJacFn(arkode_mem, Jn);
-    if (check_retval(&retval, "ARKodeSetJacFn", 1)) return 1;
-
-    // Set desired solver order
-    retval = ARKodeSetOrder(arkode_mem, order);
-    if (check_retval(&retval, "ARKodeSetOrder", 1)) return 1;
-
-    // Set the user data pointer
-    retval = ARKodeSetUserData(arkode_mem, (void*)&udata);
-    if (check_retval(&retval, "ARKodeSetUserData", 1)) return 1;
-  }
-  else
-  { // ERK method
-
-    arkode_mem = ERKStepCreate(fn, T0, y, ctx);
-    if (check_retval((void*)arkode_mem, "ERKStepCreate", 0)) return 1;
-
-    // Set maximum stepsize for ERK run
-    retval = ARKodeSetMaxStep(arkode_mem, ONE / abs(udata.G));
-    if (check_retval(&retval, "ARKodeSetMaxStep", 1)) return (1);
-
-    // Set desired solver order
-    retval = ARKodeSetOrder(arkode_mem, order);
-    if (check_retval(&retval, "ARKodeSetOrder", 1)) return 1;
-
-    // Set the user data pointer
-    retval = ARKodeSetUserData(arkode_mem, (void*)&udata);
-    if (check_retval(&retval, "ARKodeSetUserData", 1)) return 1;
-  }
-
   // Integrate ODE, based on run type
-  if (adaptive)
-  {
-    retval = adaptive_run(arkode_mem, y, T0, Tf, rk_type, order, udata);
-    if (check_retval(&retval, "adaptive_run", 1)) return 1;
-  }
-  else
-  {
-    retval = fixed_run(arkode_mem, y, T0, Tf, rk_type, order, udata);
-    if (check_retval(&retval, "fixed_run", 1)) return 1;
-  }
-
-  // Clean up and return
-  ARKodeFree(&arkode_mem);
-  if (LS != NULL) SUNLinSolFree(LS); // free system linear solver
-  if (A != NULL) SUNMatDestroy(A);   // free system matrix
-  N_VDestroy(y);                     // Free y vector
+  retval = run_tests(T0, Tf, rk_type, order, adaptive, nthreads, udata);
+  if (check_retval(&retval, "run_tests", 1)) return 1;
   return 0;
 }
 
@@ -329,8 +285,141 @@ static int Jn(sunrealtype t, N_Vector y, N_Vector fy, SUNMatrix J,
 // Private helper functions
 //------------------------------
 
+// Create an ARKStep (DIRK) or ERKStep integrator for this problem in the
+// SUNDIALS context ctx, along with its solution vector and (for DIRK) its
+// system matrix and linear solver
+static int create_integrator(SUNContext ctx, sunrealtype T0, int rk_type,
+                             int order, UserData& udata, void** arkode_mem,
+                             N_Vector* y, SUNMatrix* A, SUNLinearSolver* LS)
+{
+  int retval;
+  sunindextype NEQ = 2; // number of dependent vars.
+
+  // Create and initialize serial vector for the solution
+  *y = N_VNew_Serial(NEQ, ctx);
+  if (check_retval((void*)*y, "N_VNew_Serial", 0)) return 1;
+  retval = Ytrue(T0, *y, udata);
+  if (check_retval(&retval, "Ytrue", 1)) return 1;
+
+  // Initialize ARKStep or ERKStep.
+  if (rk_type == 0)
+  { // DIRK method
+
+    *arkode_mem = ARKStepCreate(NULL, fn, T0, *y, ctx);
+    if (check_retval((void*)*arkode_mem, "ARKStepCreate", 0)) return 1;
+
+    // Initialize/attach linear solvers (if required)
+    *A = SUNDenseMatrix(NEQ, NEQ, ctx);
+    if (check_retval((void*)*A, "SUNDenseMatrix", 0)) return 1;
+    *LS = SUNLinSol_Dense(*y, *A, ctx);
+    if (check_retval((void*)*LS, "SUNLinSol_Dense", 0)) return 1;
+    retval = ARKodeSetLinearSolver(*arkode_mem, *LS, *A);
+    if (check_retval(&retval, "ARKodeSetLinearSolver", 1)) return (1);
+    retval = ARKodeSetJacFn(*arkode_mem, Jn);
+    if (check_retval(&retval, "ARKodeSetJacFn", 1)) return 1;
+
+    // Set desired solver order
+    retval = ARKodeSetOrder(*arkode_mem, order);
+    if (check_retval(&retval, "ARKodeSetOrder", 1)) return 1;
+
+    // Set the user data pointer
+    retval = ARKodeSetUserData(*arkode_mem, (void*)&udata);
+    if (check_retval(&retval, "ARKodeSetUserData", 1)) return 1;
+  }
+  else
+  { // ERK method
+
+    *arkode_mem = ERKStepCreate(fn, T0, *y, ctx);
+    if (check_retval((void*)*arkode_mem, "ERKStepCreate", 0)) return 1;
+
+    // Set maximum stepsize for ERK run
+    retval = ARKodeSetMaxStep(*arkode_mem, ONE / abs(udata.G));
+    if (check_retval(&retval, "ARKodeSetMaxStep", 1)) return (1);
+
+    // Set desired solver order
+    retval = ARKodeSetOrder(*arkode_mem, order);
+    if (check_retval(&retval, "ARKodeSetOrder", 1)) return 1;
+
+    // Set the user data pointer
+    retval = ARKodeSetUserData(*arkode_mem, (void*)&udata);
+    if (check_retval(&retval, "ARKodeSetUserData", 1)) return 1;
+  }
+  return 0;
+}
+
+// Run the adaptive or fixed-step tests, distributing the test cases over
+// nthreads threads (each with its own SUNDIALS context and integrator), and
+// print the results of all cases in the same order as a serial run
+static int run_tests(sunrealtype T0, sunrealtype Tf, int rk_type, int order,
+                     sunbooleantype adaptive, int nthreads, UserData& udata)
+{
+  vector<CaseOutput> output(nthreads);
+  vector<int> flags(nthreads, 0);
+
+  auto worker = [&](int ithread)
+  {
+    sundials::Context ctx;
+    N_Vector y         = NULL; // empty vector for the computed solution
+    void* arkode_mem   = NULL; // empty ARKODE memory structure
+    SUNMatrix A        = NULL; // empty system matrix
+    SUNLinearSolver LS = NULL; // empty system linear solver object
+
+    flags[ithread] = create_integrator(ctx, T0, rk_type, order, udata,
+                                       &arkode_mem, &y, &A, &LS);
+    if (flags[ithread] == 0)
+    {
+      if (adaptive)
+      {
+        flags[ithread] = adaptive_run(arkode_mem, y, T0, Tf, rk_type, order,
+                                      udata, ithread, nthreads,
+                                      output[ithread]);
+      }
+      else
+      {
+        flags[ithread] = fixed_run(arkode_mem, y, T0, Tf, rk_type, order,
+                                   udata, ithread, nthreads, output[ithread]);
+      }
+    }
+
+    // Clean up
+    ARKodeFree(&arkode_mem);
+    if (LS != NULL) SUNLinSolFree(LS); // free system linear solver
+    if (A != NULL) SUNMatDestroy(A);   // free system matrix
+    if (y != NULL) N_VDestroy(y);      // Free y vector
+  };
+
+  if (nthreads == 1) { worker(0); }
+  else
+  {
+    vector<thread> threads;
+    for (int ithread = 0; ithread < nthreads; ithread++)
+    {
+      threads.emplace_back(worker, ithread);
+    }
+    for (auto& th : threads) { th.join(); }
+  }
+
+  // Print the output from all test cases, in order
+  map<size_t, string> results;
+  for (auto& out : output)
+  {
+    for (auto& result : out) { results[result.first] = result.second.str(); }
+  }
+  if (adaptive) { cout << "\nAdaptive-step runs:\n"; }
+  else { cout << "\nFixed-step runs:\n"; }
+  for (auto& result : results) { cout << result.second; }
+  cout << flush;
+
+  for (int flag : flags)
+  {
+    if (flag != 0) return flag;
+  }
+  return 0;
+}
+
 static int adaptive_run(void* arkode_mem, N_Vector y, sunrealtype T0,
-                        sunrealtype Tf, int rk_type, int order, UserData& udata)
+                        sunrealtype Tf, int rk_type, int order, UserData& udata,
+                        int ithread, int nthreads, CaseOutput& out)
 {
   // Reused variables
   int retval;
@@ -348,12 +437,15 @@ static int adaptive_run(void* arkode_mem, N_Vector y, sunrealtype T0,
   sunrealtype* ydata = N_VGetArrayPointer(y);
 
   // Loop over tolerances
-  cout << "\nAdaptive-step runs:\n";
   for (size_t irtol = 0; irtol < rtols.size(); irtol++)
   {
     // Loop over accumulation types
     for (size_t iaccum = 0; iaccum < accum_types.size(); iaccum++)
     {
+      // Skip test cases that are assigned to other threads
+      size_t icase = irtol * accum_types.size() + iaccum;
+      if (icase % nthreads != (size_t)ithread) continue;
+
       // Loop over partition
       for (int ipart = 0; ipart < udata.Npart; ipart++)
       {
@@ -412,10 +504,10 @@ static int adaptive_run(void* arkode_mem, N_Vector y, sunrealtype T0,
         sunrealtype vdsm = abs(ydata[1] - vtrue(t, udata)) /
                            (abstol + rtols[irtol] * abs(vtrue(t, udata)));
         dsm[ipart] = rtols[irtol] * sqrt(0.5 * (udsm * udsm + vdsm * vdsm));
-        cout << "  rtol " << rtols[irtol] << "  rk_type " << rk_type
-             << "  order " << order << "  acc " << accum_types[iaccum] << "  t "
-             << t << "  dsm " << dsm[ipart] << "  dsm_est " << dsm_est[ipart]
-             << "  nsteps " << Nsteps[ipart] << endl;
+        out[icase] << "  rtol " << rtols[irtol] << "  rk_type " << rk_type
+                   << "  order " << order << "  acc " << accum_types[iaccum]
+                   << "  t " << t << "  dsm " << dsm[ipart] << "  dsm_est "
+                   << dsm_est[ipart] << "  nsteps " << Nsteps[ipart] << endl;
       }
     }
   }
@@ -424,7 +516,8 @@ static int adaptive_run(void* arkode_mem, N_Vector y, sunrealtype T0,
 }
 
 static int fixed_run(void* arkode_mem, N_Vector y, sunrealtype T0,
-                     sunrealtype Tf, int rk_type, int order, UserData& udata)
+                     sunrealtype Tf, int rk_type, int order, UserData& udata,
+                     int ithread, int nthreads, CaseOutput& out)
 {
   // local variables
   int retval;
@@ -449,13 +542,18 @@ static int fixed_run(void* arkode_mem, N_Vector y, sunrealtype T0,
   vector<long int> Nsteps(udata.Npart);
   sunrealtype* ydata = N_VGetArrayPointer(y);
 
-  // Loop over step sizes
-  cout << "\nFixed-step runs:\n";
+  // Loop over step sizes (each has a test case for every built-in accumulation
+  // type, and another for the double-step error estimator)
+  size_t ncases = accum_types.size() + 1;
   for (size_t ih = 0; ih < hvals.size(); ih++)
   {
     // Loop over built-in accumulation types
     for (size_t iaccum = 0; iaccum < accum_types.size(); iaccum++)
     {
+      // Skip test cases that are assigned to other threads
+      size_t icase = ih * ncases + iaccum;
+      if (icase % nthreads != (size_t)ithread) continue;
+
       // Loop over partition
       for (int ipart = 0; ipart < udata.Npart; ipart++)
       {
@@ -524,14 +622,16 @@ static int fixed_run(void* arkode_mem, N_Vector y, sunrealtype T0,
         sunrealtype vdsm = abs(ydata[1] - vtrue(t, udata)) /
                            (abstol + reltol * abs(vtrue(t, udata)));
         dsm[ipart] = reltol * sqrt(0.5 * (udsm * udsm + vdsm * vdsm));
-        cout << "  h " << hvals[ih] << "  rk_type " << rk_type << "  order "
-             << order << "  acc " << accum_types[iaccum] << "  t " << t
-             << "  dsm " << dsm[ipart] << "  dsm_est " << dsm_est[ipart]
-             << "  nsteps " << Nsteps[ipart] << endl;
+        out[icase] << "  h " << hvals[ih] << "  rk_type " << rk_type
+                   << "  order " << order << "  acc " << accum_types[iaccum]
+                   << "  t " << t << "  dsm " << dsm[ipart] << "  dsm_est "
+                   << dsm_est[ipart] << "  nsteps " << Nsteps[ipart] << endl;
       }
     }
 
-    // Test double-step error estimator
+    // Test double-step error estimator (unless assigned to another thread)
+    size_t icase = ih * ncases + accum_types.size();
+    if (icase % nthreads != (size_t)ithread) continue;
 
     // Loop over partition
     for (int ipart = 0; ipart < udata.Npart; ipart++)
@@ -618,10 +718,10 @@ static int fixed_run(void* arkode_mem, N_Vector y, sunrealtype T0,
       sunrealtype vdsm = abs(ydata[1] - vtrue(t, udata)) /
                          (abstol + reltol * abs(vtrue(t, udata)));
       dsm[ipart] = reltol * sqrt(0.5 * (udsm * udsm + vdsm * vdsm));
-      cout << "  h " << hvals[ih] << "  rk_type " << rk_type << "  order "
-           << order << "  acc " << 4 << "  t " << t << "  dsm " << dsm[ipart]
-           << "  dsm_est " << dsm_est[ipart] << "  nsteps " << Nsteps[ipart]
-           << endl;
+      out[icase] << "  h " << hvals[ih] << "  rk_type " << rk_type
+                 << "  order " << order << "  acc " << 4 << "  t " << t
+                 << "  dsm " << dsm[ipart] << "  dsm_est " << dsm_est[ipart]
+                 << "  nsteps " << Nsteps[ipart] << endl;
     }
   }
 
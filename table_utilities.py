@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------
+# Programmer(s):  Daniel R. Reynolds @ SMU
+#------------------------------------------------------------
+# Copyright (c) 2025, Southern Methodist University.
+# All rights reserved.
+# For details, see the LICENSE file.
+#------------------------------------------------------------
+
+# imports
+import os
+import pandas as pd
+
+# Tables of results are stored in a typed, columnar format: Parquet if a Parquet
+# engine (pyarrow) is installed, and pandas' pickle format otherwise.
+try:
+    import pyarrow
+    TableFormat = '.parquet'
+except ImportError:
+    TableFormat = '.pkl'
+
+# Flag to also write an Excel copy of every table stored with save_table (unless
+# overridden by its excel argument); Excel files are never read back
+ExportExcel = False
+
+# tables that have already been read, keyed on (file, modification time)
+_table_cache = {}
+
+# utility functions
+def table_name(name):
+    """
+    Given a table name, possibly including one of the extensions '.parquet', '.pkl' or
+    '.xlsx', returns the name without that extension.
+    """
+    base, ext = os.path.splitext(name)
+    return base if ext in ('.parquet', '.pkl', '.xlsx') else name
+
+def table_file(name):
+    """
+    Given a table name, returns the file that holds it: name.parquet or name.pkl (only
+    one of which is kept by save_table), or else name.xlsx (e.g., results written before
+    the columnar format was introduced).  Returns None if there is no such file.
+    """
+    name = table_name(name)
+    for ext in ('.parquet', '.pkl', '.xlsx'):
+        if os.path.isfile(name + ext):
+            return name + ext
+    return None
+
+def save_table(df, name, excel=None):
+    """
+    Stores the pandas DataFrame df (without its index) under the table name name, in
+    the columnar format TableFormat.  Tables with columns that Parquet cannot represent
+    (e.g., arrays stored in cells) are stored in pickle format instead.  If excel is True
+    (default: ExportExcel), then an Excel copy name.xlsx is also written.
+    """
+    name = table_name(name)
+    df = df.reset_index(drop=True)
+    fname = name + TableFormat
+    try:
+        if (TableFormat == '.parquet'):
+            df.to_parquet(fname, index=False)
+        else:
+            df.to_pickle(fname)
+    except (TypeError, ValueError):
+        fname = name + '.pkl'
+        df.to_pickle(fname)
+    for ext in ('.parquet', '.pkl'):
+        if (name + ext != fname) and os.path.isfile(name + ext):
+            os.remove(name + ext)
+    if (ExportExcel if excel is None else excel):
+        df.to_excel(name + '.xlsx', index=False)
+
+def load_table(name):
+    """
+    Returns a pandas DataFrame holding the table stored under the table name name (see
+    table_file).  Files that were already read and have not changed since are returned
+    from memory, so repeated loads of the same table are cheap.
+    """
+    fname = table_file(name)
+    if (fname is None):
+        raise FileNotFoundError('No stored table ' + table_name(name))
+    key = (os.path.abspath(fname), os.path.getmtime(fname))
+    if key not in _table_cache:
+        if fname.endswith('.parquet'):
+            _table_cache[key] = pd.read_parquet(fname)
+        elif fname.endswith('.pkl'):
+            _table_cache[key] = pd.read_pickle(fname)
+        else:
+            _table_cache[key] = pd.read_excel(fname)
+    return _table_cache[key].copy()
+
+def remove_table(name):
+    """
+    Removes all stored files for the table name name.
+    """
+    name = table_name(name)
+    for ext in ('.parquet', '.pkl', '.xlsx'):
+        if os.path.isfile(name + ext):
+            os.remove(name + ext)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------
+# Copyright (c) 2025, Southern Methodist University.
+# All rights reserved.
+# For details, see the LICENSE file.
+#------------------------------------------------------------
+# Checks that the accuracy comparison plots accept results tables in which the
+# method/controller pairs were run at different tolerances, or were pruned from the
+# sweep after the loosest tolerances (run with pytest from the top-level folder).
+#------------------------------------------------------------
+
+# imports
+import os
+import sys
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import plot_utilities_paper
+import plot_utilities_extras
+
+# utility routine to return a results table for all controllers and the given methods at two
+# values of the multirate parameter 'omega', where each pair has its own tolerance grid
+def ragged_table(putil, methods):
+    rng = np.random.default_rng(0)
+    grid = np.logspace(-2, -7, 11)
+    rows = []
+    for _, controllers in putil.con:
+        for control in sorted(controllers):
+            for mri_method in methods:
+                for omega in [50.0, 500.0]:
+                    rtols = np.sort(rng.choice(grid, size=rng.integers(2, len(grid)), replace=False))[::-1]
+                    for rtol in rtols:
+                        rows.append({'control': control, 'mri_method': mri_method, 'omega': omega,
+                                     'rtol': rtol, 'Accuracy': rng.uniform(0.5, 20.0), 'ReturnCode': 0,
+                                     'SlowSteps': 100, 'SlowFails': 0, 'FastSteps': 1000, 'FastFails': 0})
+    return pd.DataFrame(rows)
+
+def test_accuracy_band():
+    rtols, accuracy_min, accuracy_max = plot_utilities_paper.accuracy_band(
+        [(np.array([1e-2, 1e-4]), np.array([1.0, 100.0])),
+         (np.array([1e-3, 1e-5, 1e-4]), np.array([2.0, 4.0, 3.0]))])
+    assert np.allclose(rtols, [1e-5, 1e-4, 1e-3, 1e-2])
+    assert np.allclose(accuracy_min, [4.0, 3.0, 2.0, 1.0])
+    assert np.allclose(accuracy_max, [4.0, 100.0, 10.0, 1.0])
+
+@pytest.mark.parametrize('putil', [plot_utilities_paper, plot_utilities_extras])
+def test_ragged_tolerance_grids(putil, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(matplotlib.rcParams, 'text.usetex', False)
+    table = putil.make_work_error_table(ragged_table(putil, putil.methods_lo), 'omega')
+    putil.make_accuracy_comparison_plot(table, [50.0, 500.0], r'$\omega$', putil.methods_lo, 'ragged', [])
+    matplotlib.pyplot.close('all')
+
+@pytest.mark.parametrize('putil', [plot_utilities_paper, plot_utilities_extras])
+def test_pruned_curves(putil, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(matplotlib.rcParams, 'text.usetex', False)
+    rows = []
+    for ipair, (control, mri_method) in enumerate((control, mri_method) for _, controllers in putil.con
+                                                  for control in sorted(controllers) for mri_method in putil.methods_lo):
+        for omega in [50.0, 500.0]:
+            for irtol, rtol in enumerate([1.e-3, 1.e-4, 1.e-5, 1.e-6, 1.e-7]):
+                rows.append({'control': control, 'mri_method': mri_method, 'omega': omega, 'rtol': rtol,
+                             'Accuracy': 1.0 + ipair, 'ReturnCode': 0, 'Pruned': (ipair % 3 > 0) and (irtol >= 2),
+                             'SlowSteps': 100, 'SlowFails': 0, 'FastSteps': 1000, 'FastFails': 0})
+    table = putil.make_work_error_table(pd.DataFrame(rows), 'omega')
+    putil.make_accuracy_comparison_plot(table, [50.0, 500.0], r'$\omega$', putil.methods_lo, 'pruned', [])
+    matplotlib.pyplot.close('all')